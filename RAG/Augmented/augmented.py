@@ -1,29 +1,44 @@
 from RAG.Retrieval.retrival import Retrieval
-from typing import Dict, Any, List
+from RAG.Retrieval.multiRetrieval import MultiCollectionRetrieval
+from typing import Dict, Any, List, Optional, Tuple, Union
 
 class Augmented:
-    def __init__(self, collection_name: str = "scientific_papers", k: int = 10):
+    def __init__(self, collection_name: Union[str, List[str]] = "scientific_papers", k: int = 10, paper_top_n: int = 20,
+                 vector_backend: str = 'qdrant', download_directory: str = 'archive'):
         """
         Initialize the Augmented system for RAG.
         
         Args:
-            collection_name (str): Name of the Qdrant collection
+            collection_name (Union[str, List[str]]): Name of the Qdrant collection, or a list of
+                collections searched concurrently with merged results
             k (int): Number of text chunks to retrieve for context
+            paper_top_n (int): Number of papers preselected before the chunk search (0 disables)
+            vector_backend (str): 'qdrant' or the in-process 'numpy' store
+            download_directory (str): Directory for PDFs downloaded by lazy full-text indexing
         """
-        self.retrieval = Retrieval(collection_name=collection_name, k=k)
+        collection_names = [collection_name] if isinstance(collection_name, str) else list(collection_name)
+        if len(collection_names) > 1:
+            self.retrieval = MultiCollectionRetrieval(collection_names=collection_names, k=k, paper_top_n=paper_top_n,
+                                                      vector_backend=vector_backend,
+                                                      download_directory=download_directory)
+        else:
+            self.retrieval = Retrieval(collection_name=collection_names[0], k=k, paper_top_n=paper_top_n,
+                                       vector_backend=vector_backend, download_directory=download_directory)
         
-    def create_rag_prompt(self, query: str) -> str:
+    def create_rag_prompt(self, query: str, retrieved_chunks: Optional[List[Dict[str, Any]]] = None) -> str:
         """
         Create a RAG prompt by combining query with retrieved context.
         
         Args:
             query (str): User's question
+            retrieved_chunks (Optional[List[Dict]]): Already retrieved chunks; retrieved if None
             
         Returns:
             str: Complete prompt for LLM
         """
         # Retrieve relevant chunks
-        retrieved_chunks = self.retrieval.retrieve(query)
+        if retrieved_chunks is None:
+            retrieved_chunks = self.retrieval.retrieve(query)
         
         if not retrieved_chunks:
             return f"""You are a scientific research assistant. Answer the following question based on your general knowledge, but mention that you don't have specific documents in your database about this topic.
@@ -76,17 +91,37 @@ ANSWER:"""
         
         return prompt
     
-    def get_context_info(self, query: str) -> Dict[str, Any]:
+    def create_rag_prompts_batch(self, queries: List[str],
+                                 filters: Optional[Dict[str, Any]] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Create RAG prompts and context info for many queries with one batched retrieval.
+        
+        Args:
+            queries (List[str]): User's questions
+            filters (Optional[Dict]): Paper metadata filters for retrieval
+            
+        Returns:
+            List[Tuple[str, Dict]]: Prompt and context info for each query, in input order
+        """
+        batch_chunks = self.retrieval.retrieve_batch(queries, filters=filters)
+        return [
+            (self.create_rag_prompt(query, chunks), self.get_context_info(query, chunks))
+            for query, chunks in zip(queries, batch_chunks)
+        ]
+    
+    def get_context_info(self, query: str, retrieved_chunks: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
         """
         Get information about the retrieved context.
         
         Args:
             query (str): User's question
+            retrieved_chunks (Optional[List[Dict]]): Already retrieved chunks; retrieved if None
             
         Returns:
             Dict: Information about the retrieved context
         """
-        retrieved_chunks = self.retrieval.retrieve(query)
+        if retrieved_chunks is None:
+            retrieved_chunks = self.retrieval.retrieve(query)
         
         if not retrieved_chunks:
             return {
@@ -103,10 +138,12 @@ ANSWER:"""
             "has_context": True,
             "num_chunks": len(retrieved_chunks),
             "sources": sources,
+            "source_titles": {chunk['source']: chunk['title'] for chunk in retrieved_chunks if chunk.get('title')},
             "total_length": total_length,
             "chunks_info": [
                 {
                     "source": chunk['source'],
+                    "collection": chunk.get('collection'),
                     "similarity_score": chunk['similarity_score'],
                     "length": len(chunk['content'])
                 }
@@ -1,29 +1,41 @@
 from RAG.Augmented.augmented import Augmented
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional, Tuple, Union
+import queue
+import threading
+import time
 import requests
 
 class Generation:
     def __init__(self, 
                  model_name: str = "llama3:8b", 
                  ollama_url: str = "http://localhost:11434",
-                 collection_name: str = "scientific_papers",
+                 collection_name: Union[str, List[str]] = "scientific_papers",
                  k: int = 10,
                  temperature: float = 0.1,
-                 max_tokens: int = 2000):
+                 max_tokens: int = 2000,
+                 paper_top_n: int = 20,
+                 vector_backend: str = 'qdrant',
+                 download_directory: str = 'archive'):
         """
         Initialize the Generation system for RAG.
         
         Args:
             model_name (str): Name of the Ollama model to use
             ollama_url (str): URL of the Ollama server
-            collection_name (str): Name of the Qdrant collection
+            collection_name (Union[str, List[str]]): Name of the Qdrant collection, or a list
+                of collections searched together
             k (int): Number of text chunks to retrieve for context
             temperature (float): Sampling temperature for generation
             max_tokens (int): Maximum number of tokens to generate
+            paper_top_n (int): Number of papers preselected before the chunk search (0 disables)
+            vector_backend (str): 'qdrant' for the Qdrant server, 'numpy' for the in-process store
+            download_directory (str): Directory for PDFs downloaded by lazy full-text indexing
         """
         self.model_name = model_name
         self.ollama_url = ollama_url
-        self.augmented = Augmented(collection_name=collection_name, k=k)
+        self.augmented = Augmented(collection_name=collection_name, k=k, paper_top_n=paper_top_n,
+                                   vector_backend=vector_backend, download_directory=download_directory)
         self.temperature = temperature
         self.max_tokens = max_tokens
         
@@ -52,12 +64,13 @@ class Generation:
         except requests.exceptions.RequestException as e:
             return {"error": f"Request failed: {str(e)}"}
     
-    def generate_answer(self, query: str) -> Dict[str, Any]:
+    def generate_answer(self, query: str, filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Generate an answer using RAG approach.
         
         Args:
             query (str): User's question
+            filters (Optional[Dict]): Paper metadata filters for retrieval, e.g. {'year_from': 2022}
             
         Returns:
             Dict: Contains answer, sources, and metadata
@@ -70,12 +83,17 @@ class Generation:
                 "error": None
             }
         
-        # Get context info
-        context_info = self.augmented.get_context_info(query)
+        # Retrieve once and reuse the chunks for both prompt and context info
+        retrieved_chunks = self.augmented.retrieval.retrieve(query, filters=filters)
+        context_info = self.augmented.get_context_info(query, retrieved_chunks)
         
         # Create RAG prompt
-        rag_prompt = self.augmented.create_rag_prompt(query)
+        rag_prompt = self.augmented.create_rag_prompt(query, retrieved_chunks)
         
+        return self._answer_from_prompt(rag_prompt, context_info)
+    
+    def _answer_from_prompt(self, rag_prompt: str, context_info: Dict[str, Any]) -> Dict[str, Any]:
+        """Call the LLM with a ready prompt and format the result"""
         # Generate response
         llm_response = self._call_ollama(rag_prompt)
         
@@ -90,11 +108,157 @@ class Generation:
         return {
             "answer": llm_response.get("response", "No response generated"),
             "sources": context_info.get('sources', []),
+            "source_titles": context_info.get('source_titles', {}),
             "context_used": context_info['has_context'],
             "num_chunks_used": context_info.get('num_chunks', 0),
             "error": None
         }
     
+    def generate_answers_batch(self, queries: List[str], max_workers: int = 4,
+                               filters: Optional[Dict[str, Any]] = None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Generate answers for many questions, yielding results as they finish.
+        
+        Retrieval for the whole batch is done with one embedding call and one
+        Qdrant search_batch; only the LLM calls run per question, at most
+        max_workers at a time.
+        
+        Args:
+            queries (List[str]): User's questions
+            max_workers (int): Maximum number of concurrent LLM requests
+            filters (Optional[Dict]): Paper metadata filters applied to every question
+            
+        Yields:
+            Tuple[int, Dict]: Index of the question in queries and its result
+        """
+        yield from self.generate_answers_pipelined(queries, max_workers=max_workers,
+                                                   retrieval_batch_size=max(1, len(queries)), filters=filters)
+    
+    def generate_answers_pipelined(self, queries: List[str], max_workers: int = 4,
+                                   retrieval_batch_size: int = 32, retrieval_workers: int = 1,
+                                   filters: Optional[Dict[str, Any]] = None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Generate answers for a large question set with overlapping retrieval and generation.
+        
+        Questions are retrieved in batches (one embedding call and one
+        search_batch per batch) by retrieval_workers threads; each prompt is
+        handed to the LLM pool as soon as its batch is retrieved, so the LLM
+        calls of one batch overlap the retrieval of the next. At most
+        max(2 * max_workers, retrieval_batch_size) prompts wait for the LLM
+        at a time, which bounds memory for any number of questions.
+        
+        Every result has a "timings" dict in seconds: "retrieval" (of its
+        batch), "queue" (waiting for a free LLM worker), "generation" and
+        "total" (since the call started).
+        
+        Args:
+            queries (List[str]): User's questions
+            max_workers (int): Maximum number of concurrent LLM requests
+            retrieval_batch_size (int): Questions retrieved together
+            retrieval_workers (int): Retrieval batches run concurrently
+            filters (Optional[Dict]): Paper metadata filters applied to every question
+            
+        Yields:
+            Tuple[int, Dict]: Index of the question in queries and its result, in completion order
+        """
+        start = time.perf_counter()
+        valid_positions = [i for i, query in enumerate(queries) if query.strip()]
+        
+        for i, query in enumerate(queries):
+            if not query.strip():
+                yield i, {
+                    "answer": "Please provide a valid question.",
+                    "sources": [],
+                    "context_used": False,
+                    "error": None,
+                    "timings": {"retrieval": 0.0, "queue": 0.0, "generation": 0.0, "total": 0.0}
+                }
+        
+        if not valid_positions:
+            return
+        
+        retrieval_batch_size = max(1, retrieval_batch_size)
+        max_in_flight = max(2 * max(1, max_workers), retrieval_batch_size)
+        in_flight = [0]
+        slots = threading.Condition()
+        completed: "queue.Queue[Tuple[int, Dict[str, Any]]]" = queue.Queue()
+        # Set when the caller stops reading, e.g. a streaming client disconnected
+        stopped = threading.Event()
+        
+        def generate(position: int, rag_prompt: str, context_info: Dict[str, Any],
+                     retrieval_time: float, queued_at: float) -> None:
+            if stopped.is_set():
+                return
+            started = time.perf_counter()
+            try:
+                result = self._answer_from_prompt(rag_prompt, context_info)
+            except Exception as e:
+                result = {"answer": f"Error: {str(e)}", "sources": [], "context_used": False, "error": str(e)}
+            finished = time.perf_counter()
+            result["timings"] = {
+                "retrieval": retrieval_time,
+                "queue": started - queued_at,
+                "generation": finished - started,
+                "total": finished - start,
+            }
+            with slots:
+                in_flight[0] -= 1
+                slots.notify_all()
+            completed.put((position, result))
+        
+        def retrieve(batch: List[int]) -> None:
+            # Wait until the LLM pool has room for the whole batch (or nothing is in flight)
+            with slots:
+                slots.wait_for(lambda: stopped.is_set() or in_flight[0] == 0
+                               or in_flight[0] + len(batch) <= max_in_flight)
+                if stopped.is_set():
+                    return
+                in_flight[0] += len(batch)
+            retrieval_start = time.perf_counter()
+            try:
+                prompts = self.augmented.create_rag_prompts_batch([queries[i] for i in batch], filters=filters)
+            except Exception as e:
+                with slots:
+                    in_flight[0] -= len(batch)
+                    slots.notify_all()
+                elapsed = time.perf_counter() - start
+                for position in batch:
+                    completed.put((position, {
+                        "answer": f"Error: {str(e)}", "sources": [], "context_used": False, "error": str(e),
+                        "timings": {"retrieval": time.perf_counter() - retrieval_start, "queue": 0.0,
+                                    "generation": 0.0, "total": elapsed}
+                    }))
+                return
+            retrieval_time = time.perf_counter() - retrieval_start
+            queued_at = time.perf_counter()
+            for position, (rag_prompt, context_info) in zip(batch, prompts):
+                if stopped.is_set():
+                    return
+                try:
+                    generation_pool.submit(generate, position, rag_prompt, context_info, retrieval_time, queued_at)
+                except RuntimeError:
+                    # The pool was shut down because the caller stopped reading
+                    return
+        
+        batches = [valid_positions[i:i + retrieval_batch_size]
+                   for i in range(0, len(valid_positions), retrieval_batch_size)]
+        generation_pool = ThreadPoolExecutor(max_workers=max(1, max_workers))
+        retrieval_pool = ThreadPoolExecutor(max_workers=max(1, retrieval_workers))
+        try:
+            for batch in batches:
+                retrieval_pool.submit(retrieve, batch)
+            for _ in valid_positions:
+                yield completed.get()
+        finally:
+            # On close (GeneratorExit) nobody reads the remaining answers: drop the
+            # queued retrievals and LLM calls instead of waiting for them. Calls
+            # already running finish in the background.
+            stopped.set()
+            with slots:
+                slots.notify_all()
+            retrieval_pool.shutdown(wait=False, cancel_futures=True)
+            generation_pool.shutdown(wait=False, cancel_futures=True)
+    
     def test_connection(self) -> Dict[str, Any]:
         """
         Test connection to Ollama server.
@@ -0,0 +1,54 @@
+from qdrant_client.models import FieldCondition, Filter, MatchAny, Range
+from typing import Any, Dict, Optional
+
+# Supported filter keys and the payload fields they apply to
+_LIST_FILTERS = {
+    'categories': 'metadata.categories',
+    'authors': 'metadata.authors',
+    'arxiv_ids': 'metadata.arxiv_id',
+    'article_names': 'metadata.article_name',
+}
+
+
+def build_metadata_filter(filters: Optional[Dict[str, Any]]) -> Optional[Filter]:
+    """
+    Build a Qdrant filter over paper metadata.
+
+    Example: {'year_from': 2022, 'categories': ['astro-ph.HE']} returns only
+    chunks of papers published in 2022 or later in that category.
+
+    Args:
+        filters (Optional[Dict]): Any of 'year_from', 'year_to' (int) and
+            'categories', 'authors', 'arxiv_ids', 'article_names' (lists of str)
+
+    Returns:
+        Optional[Filter]: Qdrant filter, or None if no filters were given
+    """
+    if not filters:
+        return None
+
+    unknown = set(filters) - set(_LIST_FILTERS) - {'year_from', 'year_to'}
+    if unknown:
+        raise ValueError(f"Unknown metadata filters: {', '.join(sorted(unknown))}")
+
+    conditions = []
+
+    year_from = filters.get('year_from')
+    year_to = filters.get('year_to')
+    if year_from is not None or year_to is not None:
+        conditions.append(FieldCondition(
+            key='metadata.year',
+            range=Range(
+                gte=int(year_from) if year_from is not None else None,
+                lte=int(year_to) if year_to is not None else None
+            )
+        ))
+
+    for name, field in _LIST_FILTERS.items():
+        values = filters.get(name)
+        if values:
+            if isinstance(values, str):
+                values = [values]
+            conditions.append(FieldCondition(key=field, match=MatchAny(any=list(values))))
+
+    return Filter(must=conditions) if conditions else None
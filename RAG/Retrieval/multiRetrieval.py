@@ -0,0 +1,179 @@
+from RAG.Retrieval.retrival import Retrieval
+from RAG.Retrieval.queryEmbeddingCache import QueryEmbeddingCache, query_batch_embedder
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+import numpy as np
+
+SCORE_NORMALIZATIONS = ('minmax', 'zscore', 'none')
+
+
+def normalize_scores(scores: List[float], method: str = 'none') -> List[float]:
+    """
+    Normalize the similarity scores of one collection's results.
+
+    'minmax' and 'zscore' rescale every collection to the same range, so
+    the best hit of a collection scores the same whether it is relevant
+    or not. Use them only for collections embedded with different models,
+    whose raw scores are not comparable.
+
+    Args:
+        scores (List[float]): Similarity scores, higher is better
+        method (str): 'minmax' (to [0, 1]), 'zscore' or 'none'
+
+    Returns:
+        List[float]: Normalized scores in input order
+    """
+    if method not in SCORE_NORMALIZATIONS:
+        raise ValueError(f"Unknown score normalization: {method}. Use one of {', '.join(SCORE_NORMALIZATIONS)}.")
+    if method == 'none' or not scores:
+        return list(scores)
+
+    values = np.asarray(scores, dtype=np.float64)
+    if method == 'minmax':
+        spread = values.max() - values.min()
+        normalized = (values - values.min()) / spread if spread > 0 else np.ones_like(values)
+    else:
+        std = values.std()
+        normalized = (values - values.mean()) / std if std > 0 else np.zeros_like(values)
+    return normalized.tolist()
+
+
+def merge_results(per_collection: List[List[Dict[str, Any]]], collection_names: List[str], k: int,
+                  normalization: str = 'none') -> List[Dict[str, Any]]:
+    """
+    Tag, normalize and merge the results of each collection into the top k.
+
+    Args:
+        per_collection (List[List[Dict]]): Retrieved chunks of each collection
+        collection_names (List[str]): Name of each collection
+        k (int): Number of merged chunks to return
+        normalization (str): Per-collection score normalization (see normalize_scores)
+
+    Returns:
+        List[Dict]: Best chunks with 'collection' and 'normalized_score'
+    """
+    merged = []
+    for name, chunks in zip(collection_names, per_collection):
+        scores = normalize_scores([chunk['similarity_score'] for chunk in chunks], normalization)
+        for chunk, score in zip(chunks, scores):
+            merged.append({**chunk, 'collection': name, 'normalized_score': score})
+    merged.sort(key=lambda chunk: (chunk['normalized_score'], chunk['similarity_score']), reverse=True)
+    return merged[:k]
+
+
+class MultiCollectionRetrieval:
+    """
+    Retrieval over several Qdrant collections at once.
+
+    The query is embedded once, every collection is searched concurrently
+    and the results are merged into a single top-k list. All collections
+    are embedded with the same model and cosine distance, so raw scores are
+    merged as is by default. Each chunk is tagged with its origin 'collection'.
+    Exposes the same retrieve/retrieve_batch interface as Retrieval.
+    """
+
+    def __init__(self, collection_names: List[str], k: int = 10,
+                 query_cache: Optional[QueryEmbeddingCache] = None,
+                 paper_top_n: int = 20,
+                 normalization: str = 'none',
+                 max_workers: Optional[int] = None,
+                 vector_backend: str = 'qdrant',
+                 download_directory: str = 'archive'):
+        """
+        Initialize retrieval for every collection.
+
+        Args:
+            collection_names (List[str]): Qdrant collections to search
+            k (int): Number of merged text chunks to return
+            query_cache (Optional[QueryEmbeddingCache]): Query embedding cache (default: shared cache)
+            paper_top_n (int): Papers preselected per collection before the chunk search (0 disables)
+            normalization (str): Per-collection score normalization ('none', 'minmax' or 'zscore',
+                see normalize_scores)
+            max_workers (Optional[int]): Concurrent collection searches (default: one per collection)
+            vector_backend (str): 'qdrant' or the in-process 'numpy' store
+            download_directory (str): Directory for PDFs downloaded by lazy full-text indexing
+        """
+        if not collection_names:
+            raise ValueError("At least one collection is required")
+        if normalization not in SCORE_NORMALIZATIONS:
+            raise ValueError(f"Unknown score normalization: {normalization}. Use one of {', '.join(SCORE_NORMALIZATIONS)}.")
+
+        # The first collection loads the embedding model, the others share it
+        first = Retrieval(collection_name=collection_names[0], k=k, query_cache=query_cache, paper_top_n=paper_top_n,
+                          vector_backend=vector_backend, download_directory=download_directory)
+        self.retrievals = [first] + [
+            Retrieval(collection_name=name, k=k, query_cache=first.query_cache, paper_top_n=paper_top_n,
+                      embeddings=first.embedding_article.embeddings, vector_backend=vector_backend,
+                      download_directory=download_directory)
+            for name in collection_names[1:]
+        ]
+        self.collection_names = list(collection_names)
+        self.k = k
+        self.normalization = normalization
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or len(collection_names))
+
+    def _merge(self, per_collection: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Tag, normalize and merge the results of each collection into the top k"""
+        return merge_results(per_collection, self.collection_names, self.k, self.normalization)
+
+    def retrieve(self, query: str, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Retrieve the best chunks for a query across all collections.
+
+        Args:
+            query (str): The search query
+            filters (Optional[Dict]): Paper metadata filters applied in every collection
+
+        Returns:
+            List[Dict]: Merged chunks with 'collection' and 'normalized_score'
+        """
+        if not query.strip():
+            return []
+
+        try:
+            vector = self.retrievals[0]._embed_query(query)
+        except Exception as e:
+            print(f"Error during retrieval: {e}")
+            return []
+
+        per_collection = list(self.executor.map(
+            lambda retrieval: retrieval.retrieve_by_vector(vector, filters), self.retrievals
+        ))
+        return self._merge(per_collection)
+
+    def retrieve_batch(self, queries: List[str], filters: Optional[Dict[str, Any]] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Retrieve the best chunks for many queries across all collections.
+
+        Queries are embedded once; every collection then answers all of them
+        with one search_batch request, concurrently with the other collections.
+
+        Args:
+            queries (List[str]): The search queries
+            filters (Optional[Dict]): Paper metadata filters applied to every query
+
+        Returns:
+            List[List[Dict]]: Merged chunks for each query, in input order
+        """
+        results: List[List[Dict[str, Any]]] = [[] for _ in queries]
+        positions = [i for i, query in enumerate(queries) if query.strip()]
+        if not positions:
+            return results
+
+        first = self.retrievals[0]
+        try:
+            vectors = first.query_cache.embed_queries(
+                first.embedding_article.model_name,
+                [queries[i] for i in positions],
+                query_batch_embedder(first.embedding_article.embeddings)
+            )
+        except Exception as e:
+            print(f"Error during batch retrieval: {e}")
+            return results
+
+        per_collection = list(self.executor.map(
+            lambda retrieval: retrieval.retrieve_batch_by_vectors(vectors, filters), self.retrievals
+        ))
+        for i, position in enumerate(positions):
+            results[position] = self._merge([chunks[i] for chunks in per_collection])
+        return results
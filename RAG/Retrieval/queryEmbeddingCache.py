@@ -0,0 +1,235 @@
+import atexit
+import json
+import os
+import re
+import tempfile
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_query(text: str) -> str:
+    """Normalize query text so trivially different spellings share a cache entry"""
+    return _WHITESPACE_RE.sub(' ', unicodedata.normalize('NFC', text)).strip()
+
+
+def query_batch_embedder(embeddings: Any) -> Callable[[List[str]], List[List[float]]]:
+    """
+    Return a function embedding many queries exactly as embeddings.embed_query would.
+
+    Batch and single-question paths write the same cache entries, so the
+    batch function must not use document semantics when a model encodes
+    queries differently (e.g. with a query instruction). HuggingFaceEmbeddings
+    embeds a query as a one-text document batch, so its queries are encoded
+    in one embed_documents call; other models embed query by query.
+
+    Args:
+        embeddings (Any): LangChain embeddings model
+
+    Returns:
+        Callable: Function embedding a list of queries
+    """
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+
+    if type(embeddings).embed_query is HuggingFaceEmbeddings.embed_query:
+        return embeddings.embed_documents
+    return lambda texts: [embeddings.embed_query(text) for text in texts]
+
+
+class QueryEmbeddingCache:
+    """
+    Bounded, thread-safe LRU cache of query embeddings.
+
+    Entries are keyed by (model name, normalized query text) and stored as
+    float32 arrays. The cache can optionally be persisted to an .npz file
+    and reloaded on the next start.
+    """
+
+    def __init__(self, max_entries: int = 4096, persist_path: Optional[str] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries (int): Maximum number of embeddings kept in memory
+            persist_path (Optional[str]): .npz file used to persist the cache across restarts
+        """
+        self.max_entries = max_entries
+        self.persist_path = persist_path
+        self._entries: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if persist_path:
+            self.load()
+
+    def get(self, model_name: str, text: str) -> Optional[np.ndarray]:
+        """Return the cached embedding or None, updating hit statistics"""
+        key = (model_name, normalize_query(text))
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, model_name: str, text: str, vector) -> np.ndarray:
+        """Store an embedding, evicting the least recently used entry when full"""
+        key = (model_name, normalize_query(text))
+        array = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            self._entries[key] = array
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return array
+
+    def embed_query(self, model_name: str, text: str, embed_fn: Callable[[str], List[float]]) -> List[float]:
+        """
+        Return the embedding of a query, computing it with embed_fn on a miss.
+
+        Args:
+            model_name (str): Name of the embedding model
+            text (str): Query text
+            embed_fn (Callable): Function embedding a single text
+
+        Returns:
+            List[float]: Query embedding
+        """
+        vector = self.get(model_name, text)
+        if vector is None:
+            vector = self.put(model_name, text, embed_fn(text))
+        return vector.tolist()
+
+    def embed_queries(self, model_name: str, texts: List[str],
+                      embed_batch_fn: Callable[[List[str]], List[List[float]]]) -> List[List[float]]:
+        """
+        Return embeddings for many queries, computing all misses in one batch.
+
+        Args:
+            model_name (str): Name of the embedding model
+            texts (List[str]): Query texts
+            embed_batch_fn (Callable): Function embedding a list of texts
+
+        Returns:
+            List[List[float]]: Query embeddings in input order
+        """
+        vectors: List[Optional[np.ndarray]] = [self.get(model_name, text) for text in texts]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+
+        if missing:
+            computed = embed_batch_fn([texts[i] for i in missing])
+            for i, vector in zip(missing, computed):
+                vectors[i] = self.put(model_name, texts[i], vector)
+
+        return [vector.tolist() for vector in vectors]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size and hit-rate statistics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+    def clear(self) -> None:
+        """Remove all entries and reset statistics"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def save(self) -> bool:
+        """
+        Persist the cache to persist_path, if configured.
+
+        Returns:
+            bool: Whether the cache file was written
+        """
+        if not self.persist_path:
+            return False
+        with self._lock:
+            keys = [list(key) for key in self._entries]
+            vectors = list(self._entries.values())
+        if not vectors:
+            return False
+
+        directory = os.path.dirname(self.persist_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Every worker saves at exit; a temporary file per process keeps concurrent saves apart
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(prefix=f"{os.path.basename(self.persist_path)}.",
+                                            suffix='.tmp', dir=directory or '.')
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, keys=np.array(json.dumps(keys)), vectors=np.stack(vectors))
+            os.replace(tmp_path, self.persist_path)
+        except (OSError, ValueError) as e:
+            print(f"Could not save query embedding cache to {self.persist_path}: {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+        return True
+
+    def load(self) -> None:
+        """Load entries previously saved to persist_path"""
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return
+        try:
+            with np.load(self.persist_path) as data:
+                keys = json.loads(str(data['keys']))
+                vectors = data['vectors'].astype(np.float32)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Could not load query embedding cache from {self.persist_path}: {e}")
+            return
+
+        with self._lock:
+            for key, vector in zip(keys[-self.max_entries:], vectors[-self.max_entries:]):
+                self._entries[tuple(key)] = vector
+
+
+_shared_cache: Optional[QueryEmbeddingCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_query_embedding_cache() -> QueryEmbeddingCache:
+    """Return the process-wide query embedding cache shared by all Retrieval instances"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = QueryEmbeddingCache()
+        return _shared_cache
+
+
+def configure_query_embedding_cache(max_entries: int = 4096, persist_path: Optional[str] = None) -> QueryEmbeddingCache:
+    """
+    Replace the process-wide cache, e.g. to enable persistence across restarts.
+
+    A persisted cache is saved automatically when the interpreter exits.
+
+    Args:
+        max_entries (int): Maximum number of embeddings kept in memory
+        persist_path (Optional[str]): .npz file used to persist the cache
+
+    Returns:
+        QueryEmbeddingCache: The new shared cache
+    """
+    global _shared_cache
+    cache = QueryEmbeddingCache(max_entries=max_entries, persist_path=persist_path)
+    with _shared_cache_lock:
+        _shared_cache = cache
+    if persist_path:
+        atexit.register(cache.save)
+    return cache
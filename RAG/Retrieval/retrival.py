@@ -1,25 +1,113 @@
 from dataPrepraration.embedding.embeddingArticle import EmbeddingArticle
-from typing import List, Dict, Any
+from RAG.Retrieval.queryEmbeddingCache import QueryEmbeddingCache, get_query_embedding_cache, query_batch_embedder
+from RAG.Retrieval.metadataFilter import build_metadata_filter
+from qdrant_client.models import SearchRequest
+from typing import List, Dict, Any, Optional
 
 class Retrieval:
-    def __init__(self, collection_name: str = "scientific_papers", k: int = 10):
+    def __init__(self, collection_name: str = "scientific_papers", k: int = 10,
+                 query_cache: Optional[QueryEmbeddingCache] = None,
+                 paper_top_n: int = 20,
+                 embeddings: Optional[Any] = None,
+                 vector_backend: str = 'qdrant',
+                 download_directory: str = 'archive'):
         """
         Initialize the Retrieval system using existing embedding setup.
         
         Args:
             collection_name (str): Name of the Qdrant collection
             k (int): Number of text chunks to retrieve
+            query_cache (Optional[QueryEmbeddingCache]): Query embedding cache (default: shared process-wide cache)
+            paper_top_n (int): Number of papers preselected from the abstract-level collection
+                before the chunk search; 0 searches all chunks
+            embeddings (Optional[Any]): Already loaded embedding model to share (default: load a new one)
+            vector_backend (str): 'qdrant' or the in-process 'numpy' store
+            download_directory (str): Directory for PDFs downloaded by lazy full-text indexing
         """
-        self.embedding_article = EmbeddingArticle(collection_name=collection_name)
+        self.embedding_article = EmbeddingArticle(collection_name=collection_name, embeddings=embeddings,
+                                                  vector_backend=vector_backend)
         self.vectorstore = self.embedding_article.vectorstore
         self.k = k
+        self.query_cache = query_cache or get_query_embedding_cache()
+        self.paper_top_n = paper_top_n
+        self.download_directory = download_directory
+        self.use_paper_index = paper_top_n > 0 and self._paper_index_available()
 
-    def retrieve(self, query: str) -> List[Dict[str, Any]]:
+    def _paper_index_available(self) -> bool:
+        """Check whether the abstract-level paper collection exists and is not empty"""
+        try:
+            return self.embedding_article.client.count(
+                collection_name=self.embedding_article.paper_collection_name, exact=False
+            ).count > 0
+        except Exception:
+            return False
+
+    def _preselect_filters(self, vectors: List[List[float]],
+                           filters: Optional[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Restrict each query's chunk search to its top papers.
+        
+        The paper collection is searched with one search_batch request; the
+        matching article names are added to the metadata filters of the
+        chunk search. Queries without paper matches keep the original filters.
+        
+        Args:
+            vectors (List[List[float]]): Query embeddings
+            filters (Optional[Dict]): Metadata filters requested by the caller
+            
+        Returns:
+            List[Optional[Dict]]: Chunk search filters for each query
+        """
+        if not self.use_paper_index:
+            return [filters] * len(vectors)
+        
+        paper_filter = build_metadata_filter(filters)
+        batch_points = self.embedding_article.client.search_batch(
+            collection_name=self.embedding_article.paper_collection_name,
+            requests=[
+                SearchRequest(vector=vector, filter=paper_filter, limit=self.paper_top_n, with_payload=True)
+                for vector in vectors
+            ]
+        )
+        
+        query_filters = []
+        for points in batch_points:
+            article_names = [self._format_point(point)['source'] for point in points]
+            if filters and filters.get('article_names'):
+                allowed = set(filters['article_names'])
+                article_names = [name for name in article_names if name in allowed]
+            
+            if article_names:
+                query_filters.append({**(filters or {}), 'article_names': article_names})
+            else:
+                query_filters.append(filters)
+        return query_filters
+
+    def _schedule_full_text(self, metadatas: List[Dict[str, Any]]) -> None:
+        """Queue papers retrieved only by their abstract for background full-text indexing"""
+        abstract_only = [metadata for metadata in metadatas if metadata.get('full_text_indexed') is False]
+        if not abstract_only:
+            return
+        try:
+            from dataPrepraration.lazyIndexing import get_lazy_indexer
+            get_lazy_indexer(self.embedding_article, self.download_directory).record_hits(abstract_only)
+        except Exception as e:
+            print(f"Could not schedule full-text indexing: {e}")
+
+    def _embed_query(self, query: str) -> List[float]:
+        """Embed a query, reusing a cached embedding when available"""
+        return self.query_cache.embed_query(
+            self.embedding_article.model_name, query, self.embedding_article.embeddings.embed_query
+        )
+
+    def retrieve(self, query: str, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """
         Retrieve relevant text chunks based on the query.
         
         Args:
             query (str): The search query
+            filters (Optional[Dict]): Paper metadata filters applied inside the vector search,
+                e.g. {'year_from': 2022} (see build_metadata_filter)
             
         Returns:
             List[Dict]: List of retrieved chunks with content and source info
@@ -28,8 +116,35 @@ class Retrieval:
             return []
         
         try:
+            vector = self._embed_query(query)
+        except Exception as e:
+            print(f"Error during retrieval: {e}")
+            return []
+        return self.retrieve_by_vector(vector, filters)
+
+    def retrieve_by_vector(self, vector: List[float], filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Retrieve relevant text chunks for an already embedded query.
+        
+        Args:
+            vector (List[float]): Query embedding
+            filters (Optional[Dict]): Paper metadata filters (see retrieve)
+            
+        Returns:
+            List[Dict]: List of retrieved chunks with content and source info
+            
+        Raises:
+            ValueError: If filters has unknown keys
+        """
+        # Invalid filters are the caller's error, not an empty result
+        build_metadata_filter(filters)
+        try:
+            query_filters = self._preselect_filters([vector], filters)[0]
+            
             # Perform similarity search - returns k chunks
-            results = self.vectorstore.similarity_search_with_score(query, k=self.k)
+            results = self.vectorstore.similarity_search_with_score_by_vector(
+                vector, k=self.k, filter=build_metadata_filter(query_filters)
+            )
             
             # Format results
             retrieved_chunks = []
@@ -37,12 +152,104 @@ class Retrieval:
                 retrieved_chunks.append({
                     'content': doc.page_content,
                     'source': doc.metadata.get('article_name', 'Unknown'),
+                    'title': doc.metadata.get('title'),
+                    'section': doc.metadata.get('section'),
                     'similarity_score': float(score)
                 })
             
+            self._schedule_full_text([doc.metadata for doc, _ in results])
             return retrieved_chunks
             
         except Exception as e:
             print(f"Error during retrieval: {e}")
             return []
+
+    def retrieve_batch(self, queries: List[str], filters: Optional[Dict[str, Any]] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Retrieve relevant text chunks for many queries at once.
+
+        Queries missing from the embedding cache are embedded in a single batch
+        and all are searched with one Qdrant search_batch request instead of
+        one round-trip per query.
+        
+        Args:
+            queries (List[str]): The search queries
+            filters (Optional[Dict]): Paper metadata filters applied to every query
+            
+        Returns:
+            List[List[Dict]]: Retrieved chunks for each query, in input order
+        """
+        results: List[List[Dict[str, Any]]] = [[] for _ in queries]
+        positions = [i for i, query in enumerate(queries) if query.strip()]
+        if not positions:
+            return results
+        
+        try:
+            vectors = self.query_cache.embed_queries(
+                self.embedding_article.model_name,
+                [queries[i] for i in positions],
+                query_batch_embedder(self.embedding_article.embeddings)
+            )
+        except Exception as e:
+            print(f"Error during batch retrieval: {e}")
+            return results
+        
+        for position, chunks in zip(positions, self.retrieve_batch_by_vectors(vectors, filters)):
+            results[position] = chunks
+        return results
+
+    def retrieve_batch_by_vectors(self, vectors: List[List[float]],
+                                  filters: Optional[Dict[str, Any]] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Retrieve relevant text chunks for already embedded queries with one search_batch request.
+        
+        Args:
+            vectors (List[List[float]]): Query embeddings
+            filters (Optional[Dict]): Paper metadata filters applied to every query
+            
+        Returns:
+            List[List[Dict]]: Retrieved chunks for each vector, in input order
+            
+        Raises:
+            ValueError: If filters has unknown keys
+        """
+        build_metadata_filter(filters)
+        results: List[List[Dict[str, Any]]] = [[] for _ in vectors]
+        if not vectors:
+            return results
         
+        try:
+            query_filters = self._preselect_filters(vectors, filters)
+            requests = [
+                SearchRequest(vector=vector, filter=build_metadata_filter(query_filter), limit=self.k, with_payload=True)
+                for vector, query_filter in zip(vectors, query_filters)
+            ]
+            batch_points = self.embedding_article.client.search_batch(
+                collection_name=self.embedding_article.collection_name,
+                requests=requests
+            )
+            
+            for position, points in enumerate(batch_points):
+                results[position] = [self._format_point(point) for point in points]
+            
+            self._schedule_full_text([
+                (point.payload or {}).get('metadata') or {} for points in batch_points for point in points
+            ])
+            return results
+            
+        except Exception as e:
+            print(f"Error during batch retrieval: {e}")
+            return results
+
+    @staticmethod
+    def _format_point(point) -> Dict[str, Any]:
+        """Format a raw Qdrant point the same way as LangChain search results"""
+        payload = point.payload or {}
+        metadata = payload.get('metadata') or {}
+        return {
+            'content': payload.get('page_content', ''),
+            'source': metadata.get('article_name', 'Unknown'),
+            'title': metadata.get('title'),
+            'section': metadata.get('section'),
+            'similarity_score': float(point.score)
+        }
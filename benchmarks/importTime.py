@@ -0,0 +1,78 @@
+"""
+Import-time profile of the web app, the CLI and the RAG pipeline.
+
+Runs each target in a fresh interpreter with `python -X importtime` and
+reports the total import time and the slowest top-level packages, so heavy
+dependencies that sneak into a module-level import are easy to spot.
+
+Usage:
+    python benchmarks/importTime.py [web|cli|pipeline ...] [--top N]
+"""
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+TARGETS = {
+    # What a Django worker imports before serving its first request
+    'web': (
+        "import os, sys; sys.path.insert(0, 'webAPP'); "
+        "os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'webAPP.settings'); "
+        "import django; django.setup(); import webAPP.urls"
+    ),
+    # rag_engine.py startup before the first question
+    'cli': "import rag_engine",
+    # The full pipeline, loaded on the first answer
+    'pipeline': "import RAG.Generation.generation; import dataPrepraration.databasePreparation",
+}
+
+
+def profile(code: str) -> tuple:
+    """Return (total seconds, {top-level package: cumulative seconds}) for importing code"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    packages = defaultdict(int)
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        head, cumulative_us, name = line.split('|', 2)
+        # Top-level entries (no indentation) add up to the total import time
+        if not name.startswith('  '):
+            total += int(cumulative_us)
+        packages[name.strip().split('.')[0]] += int(head.split(':')[1])
+    return total / 1e6, {name: us / 1e6 for name, us in packages.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('targets', nargs='*', help=f"Targets to profile: {', '.join(TARGETS)} (default: all)")
+    parser.add_argument('--top', type=int, default=10, help="Number of slowest packages to show")
+    args = parser.parse_args()
+
+    unknown = set(args.targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"unknown targets: {', '.join(sorted(unknown))}")
+
+    for target in args.targets or TARGETS:
+        try:
+            total, packages = profile(TARGETS[target])
+        except RuntimeError as e:
+            print(f"{target:<9} failed: {e}\n")
+            continue
+        print(f"{target:<9} {total:6.2f} s")
+        for name, seconds in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+            print(f"    {name:<30} {seconds:6.3f} s")
+        print()
+
+
+if __name__ == "__main__":
+    main()
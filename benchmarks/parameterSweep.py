@@ -0,0 +1,362 @@
+"""
+Parameter sweep of the latency/quality trade-off of the RAG pipeline.
+
+Ingests the papers of a topic once per distinct (max_results, chunk_size,
+chunk_overlap) of a parameter grid into the in-process vector store, answers
+a labelled question set at every grid point and reports per point:
+
+    recall, hit_rate, mrr     labelled papers found among the retrieved chunks
+    context_overlap           share of answer words found in the retrieved context
+    citation_rate             answers citing a numbered source ([1], [2], ...)
+    keyword_recall            labelled answer keywords present in the answer
+    chunks, index_mib         size of the index
+    ingestion_s               time to split, embed and index the papers
+    retrieval/total p50, p95  per-question latency in milliseconds
+
+The arXiv search, PDF downloads and text extraction run once for the largest
+max_results (smaller values use the first results of the same search); chunk
+embeddings come from the content-addressed chunk cache, so chunkings already
+embedded in this or an earlier sweep are not encoded again. Query embeddings
+are computed before timing, so latencies compare search and generation only.
+
+Questions file (JSONL), one object per line:
+    {"question": "...", "relevant": ["2301.01234", ...], "answer_keywords": ["...", ...]}
+"relevant" lists arXiv ids (with or without version); "answer_keywords" is optional.
+
+Grid (JSON file or inline JSON), each key a list of values:
+    {"chunk_size": [128, 254], "chunk_overlap": [25, 50], "k": [5, 10],
+     "max_tokens": [500, 2000], "temperature": [0.1], "max_results": [20, 50]}
+chunk_size/chunk_overlap are tokens for the native splitter and characters
+for --splitter recursive; omitted keys keep the pipeline defaults.
+
+Usage:
+    python benchmarks/parameterSweep.py questions.jsonl --topic "black hole imaging" --grid grid.json
+        [--retrieval-only] [--min-recall 0.8] [--output results.jsonl] [--keep]
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+DEFAULTS = {
+    'max_results': 20,
+    'chunk_size': None,
+    'chunk_overlap': None,
+    'k': 10,
+    'paper_top_n': 20,
+    'max_tokens': 2000,
+    'temperature': 0.1,
+}
+# Parameters that need a separate index
+INGESTION_KEYS = ('max_results', 'chunk_size', 'chunk_overlap')
+
+MIB = 2 ** 20
+_WORD_RE = re.compile(r'[a-z][a-z0-9-]{3,}')
+_CITATION_RE = re.compile(r'\[(\d+)\]')
+_VERSION_RE = re.compile(r'v\d+$')
+
+
+def load_questions(path: str) -> list:
+    questions = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            question = record.get('question') or record.get('query')
+            if not question:
+                raise ValueError(f"{path}:{line_number}: missing \"question\"")
+            questions.append({
+                'id': record.get('id', line_number),
+                'question': question,
+                'relevant': {_paper_id(name) for name in record.get('relevant', [])},
+                'answer_keywords': [keyword.lower() for keyword in record.get('answer_keywords', [])],
+            })
+    return questions
+
+
+def load_grid(spec: str) -> list:
+    """Expand a grid (JSON file or string) into a list of parameter dicts"""
+    if os.path.exists(spec):
+        with open(spec, 'r', encoding='utf-8') as f:
+            grid = json.load(f)
+    else:
+        grid = json.loads(spec)
+    unknown = set(grid) - set(DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown grid parameters: {', '.join(sorted(unknown))} (known: {', '.join(DEFAULTS)})")
+    keys = list(grid)
+    values = [grid[key] if isinstance(grid[key], list) else [grid[key]] for key in keys]
+    return [{**DEFAULTS, **dict(zip(keys, combination))} for combination in itertools.product(*values)]
+
+
+def _paper_id(article_name: str) -> str:
+    return _VERSION_RE.sub('', article_name.strip())
+
+
+def _mean(values: list):
+    return round(float(np.mean(values)), 3) if values else None
+
+
+def _percentile(values: list, q: float) -> float:
+    return round(float(np.percentile(values, q)) * 1000, 1) if values else 0.0
+
+
+def _index_bytes(client, store_path: str, collection: str) -> int:
+    """Vectors and payloads of a collection (the vector file itself is preallocated in larger steps)"""
+    from dataPrepraration.embedding.embeddingArticle import VECTOR_SIZE
+    points = client.count(collection_name=collection).count
+    payloads = os.path.join(store_path, collection, 'payloads.jsonl')
+    return points * VECTOR_SIZE * 4 + (os.path.getsize(payloads) if os.path.exists(payloads) else 0)
+
+
+def grounding(answer: str, chunks: list, num_sources: int) -> tuple:
+    """(share of answer words found in the context, whether the answer cites a valid source number)"""
+    answer_words = set(_WORD_RE.findall(answer.lower()))
+    context_words = set(_WORD_RE.findall(' '.join(chunk['content'] for chunk in chunks).lower()))
+    overlap = len(answer_words & context_words) / len(answer_words) if answer_words else 0.0
+    cited = any(1 <= int(number) <= num_sources for number in _CITATION_RE.findall(answer))
+    return overlap, cited
+
+
+class Sweep:
+    def __init__(self, topic: str, questions: list, splitter: str, store_path: str,
+                 download_directory: str, generate: bool, model_name: str, ollama_url: str):
+        from dataPrepraration.embedding.numpyVectorStore import configure_numpy_store, get_numpy_client
+
+        self.topic = topic
+        self.questions = questions
+        self.splitter = splitter
+        self.store_path = store_path
+        self.download_directory = download_directory
+        self.generate = generate
+        self.model_name = model_name
+        self.ollama_url = ollama_url
+        configure_numpy_store(store_path)
+        self.client = get_numpy_client()
+        self.collections = []
+
+    def extract(self, max_results: int) -> float:
+        """Search, download and extract the papers of the topic once; returns the seconds taken"""
+        from dataPrepraration.databasePreparation import DatabasePreparation
+
+        start = time.perf_counter()
+        self.preparation = DatabasePreparation(
+            user_query=self.topic, max_results=max_results, download_directory=self.download_directory,
+            vector_backend='numpy', dedup_report_path=None
+        )
+        arxiv_api = self.preparation.find_papers()
+        self.articles = self.preparation.extract_articles(arxiv_api, self.preparation.relevant_papers) if arxiv_api else []
+        # Search rank of each paper, to emulate smaller max_results with the same search
+        self.search_rank = {paper['filename']: rank for rank, paper in enumerate(self.preparation.found_papers)}
+        return time.perf_counter() - start
+
+    def _splitter_options(self, point: dict) -> dict:
+        if self.splitter == 'recursive':
+            return {'text_splitter': 'recursive', 'chunk_size': point['chunk_size'] or 512,
+                    'chunk_overlap': point['chunk_overlap'] if point['chunk_overlap'] is not None else 120}
+        return {'text_splitter': 'native', 'chunk_tokens': point['chunk_size'],
+                'chunk_overlap_tokens': point['chunk_overlap'] if point['chunk_overlap'] is not None else 50}
+
+    def ingest(self, point: dict) -> dict:
+        """Index the papers with the point's chunking into a fresh collection"""
+        from dataPrepraration.embedding.deduplication import ChunkDeduplicator
+        from dataPrepraration.embedding.embeddingArticle import PAPER_COLLECTION_SUFFIX, EmbeddingArticle
+
+        key = json.dumps([self.splitter] + [point[name] for name in INGESTION_KEYS])
+        collection = f"sweep_{hashlib.md5(key.encode()).hexdigest()[:10]}"
+        for name in (collection, f"{collection}{PAPER_COLLECTION_SUFFIX}"):
+            if self.client.collection_exists(name):
+                self.client.delete_collection(name)
+        self.collections.append(collection)
+
+        articles = [article for article in self.articles
+                    if self.search_rank.get(article['filename'], 0) < point['max_results']]
+        embedding_article = EmbeddingArticle(collection_name=collection, vector_backend='numpy',
+                                             **self._splitter_options(point))
+        cache_before = embedding_article.chunk_cache.stats()
+        self.preparation.deduplicator = ChunkDeduplicator()
+
+        start = time.perf_counter()
+        papers = self.preparation.embed_articles(embedding_article, articles) if articles else []
+        ingestion = time.perf_counter() - start
+
+        cache_after = embedding_article.chunk_cache.stats()
+        return {
+            'collection': collection,
+            'papers': len(papers),
+            'chunks': self.client.count(collection_name=collection).count,
+            'index_mib': round(sum(_index_bytes(self.client, self.store_path, name)
+                                   for name in (collection, f"{collection}{PAPER_COLLECTION_SUFFIX}")) / MIB, 2),
+            'ingestion_s': round(ingestion, 2),
+            'embeddings_cached': cache_after['hits'] - cache_before['hits'],
+            'embeddings_encoded': cache_after['misses'] - cache_before['misses'],
+        }
+
+    def evaluate(self, point: dict, collection: str) -> dict:
+        """Answer the question set at one grid point"""
+        from RAG.Generation.generation import Generation
+        from RAG.Retrieval.queryEmbeddingCache import query_batch_embedder
+
+        rag_system = Generation(model_name=self.model_name, ollama_url=self.ollama_url, collection_name=collection,
+                                k=point['k'], temperature=point['temperature'], max_tokens=point['max_tokens'],
+                                paper_top_n=point['paper_top_n'], vector_backend='numpy')
+        augmented = rag_system.augmented
+        retrieval = augmented.retrieval
+        # Embed all questions before timing (the query cache then serves them)
+        retrieval.query_cache.embed_queries(retrieval.embedding_article.model_name,
+                                            [item['question'] for item in self.questions],
+                                            query_batch_embedder(retrieval.embedding_article.embeddings))
+
+        recalls, hits, reciprocal_ranks = [], [], []
+        overlaps, citations, keyword_recalls, errors = [], [], [], 0
+        retrieval_times, total_times = [], []
+        for item in self.questions:
+            start = time.perf_counter()
+            chunks = retrieval.retrieve(item['question'])
+            retrieved = time.perf_counter()
+            retrieval_times.append(retrieved - start)
+
+            if item['relevant']:
+                ranked = [_paper_id(chunk['source']) for chunk in chunks]
+                found = item['relevant'] & set(ranked)
+                recalls.append(len(found) / len(item['relevant']))
+                hits.append(bool(found))
+                first = next((rank for rank, paper in enumerate(ranked, 1) if paper in item['relevant']), None)
+                reciprocal_ranks.append(1 / first if first else 0.0)
+
+            if not self.generate:
+                total_times.append(retrieved - start)
+                continue
+            context_info = augmented.get_context_info(item['question'], chunks)
+            result = rag_system._answer_from_prompt(augmented.create_rag_prompt(item['question'], chunks), context_info)
+            total_times.append(time.perf_counter() - start)
+            if result.get('error'):
+                errors += 1
+                continue
+            overlap, cited = grounding(result['answer'], chunks, len(context_info['sources']))
+            overlaps.append(overlap)
+            citations.append(cited)
+            if item['answer_keywords']:
+                answer = result['answer'].lower()
+                keyword_recalls.append(sum(keyword in answer for keyword in item['answer_keywords'])
+                                       / len(item['answer_keywords']))
+
+        return {
+            'recall': _mean(recalls),
+            'hit_rate': _mean(hits),
+            'mrr': _mean(reciprocal_ranks),
+            'context_overlap': _mean(overlaps),
+            'citation_rate': _mean(citations),
+            'keyword_recall': _mean(keyword_recalls),
+            'generation_errors': errors,
+            'retrieval_p50_ms': _percentile(retrieval_times, 50),
+            'retrieval_p95_ms': _percentile(retrieval_times, 95),
+            'total_p50_ms': _percentile(total_times, 50),
+            'total_p95_ms': _percentile(total_times, 95),
+        }
+
+    def cleanup(self) -> None:
+        from dataPrepraration.embedding.embeddingArticle import PAPER_COLLECTION_SUFFIX
+        for collection in self.collections:
+            for name in (collection, f"{collection}{PAPER_COLLECTION_SUFFIX}"):
+                if self.client.collection_exists(name):
+                    self.client.delete_collection(name)
+
+
+def print_table(results: list) -> None:
+    columns = [('max_results', 'res'), ('chunk_size', 'chunk'), ('chunk_overlap', 'ovl'), ('k', 'k'),
+               ('max_tokens', 'tok'), ('temperature', 'temp'), ('recall', 'recall'), ('mrr', 'mrr'),
+               ('context_overlap', 'ground'), ('citation_rate', 'cite'), ('chunks', 'chunks'),
+               ('index_mib', 'MiB'), ('ingestion_s', 'ingest'), ('total_p50_ms', 'p50 ms'), ('total_p95_ms', 'p95 ms')]
+    print("  ".join(f"{title:>7}" for _, title in columns))
+    for result in results:
+        print("  ".join(f"{'-' if result.get(key) is None else result[key]!s:>7}" for key, _ in columns))
+
+
+def cheapest(results: list, min_recall: float, min_grounding: float):
+    """Lowest p95 latency (then smallest index) among points meeting the quality bar"""
+    eligible = [
+        result for result in results
+        if (result['recall'] or 0) >= min_recall and (min_grounding <= 0 or (result['context_overlap'] or 0) >= min_grounding)
+    ]
+    return min(eligible, key=lambda result: (result['total_p95_ms'], result['index_mib']), default=None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('questions', help="Labelled questions (JSONL)")
+    parser.add_argument('--topic', required=True, help="Topic whose papers are ingested (as for database preparation)")
+    parser.add_argument('--grid', default='{}', help="Parameter grid: JSON file or inline JSON")
+    parser.add_argument('--splitter', choices=['native', 'recursive'], default='native')
+    parser.add_argument('--retrieval-only', action='store_true', help="Skip LLM generation (no Ollama needed)")
+    parser.add_argument('--model', default='llama3:8b', help="Ollama model")
+    parser.add_argument('--ollama-url', default='http://localhost:11434')
+    parser.add_argument('--download-directory', default=os.path.join(ROOT, 'archive'))
+    parser.add_argument('--store', default=os.path.join(ROOT, 'cache', 'sweep_store'),
+                        help="Directory of the sweep's in-process vector store")
+    parser.add_argument('--output', default=os.path.join(ROOT, 'cache', 'parameter_sweep.jsonl'),
+                        help="JSONL file receiving one result per grid point")
+    parser.add_argument('--min-recall', type=float, default=0.0, help="Quality bar for the recommendation")
+    parser.add_argument('--min-grounding', type=float, default=0.0, help="Minimum context_overlap for the recommendation")
+    parser.add_argument('--keep', action='store_true', help="Keep the sweep collections")
+    args = parser.parse_args()
+
+    questions = load_questions(args.questions)
+    points = load_grid(args.grid)
+    print(f"{len(questions)} questions, {len(points)} grid points")
+
+    sweep = Sweep(args.topic, questions, args.splitter, args.store, args.download_directory,
+                  generate=not args.retrieval_only, model_name=args.model, ollama_url=args.ollama_url)
+    extraction = sweep.extract(max(point['max_results'] for point in points))
+    print(f"Search and extraction of {len(sweep.articles)} articles: {extraction:.1f} s")
+
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    results = []
+    indexes = {}
+    try:
+        with open(args.output, 'w', encoding='utf-8') as out:
+            for point in sorted(points, key=lambda point: json.dumps([point[name] for name in INGESTION_KEYS])):
+                key = json.dumps([point[name] for name in INGESTION_KEYS])
+                if key not in indexes:
+                    indexes[key] = sweep.ingest(point)
+                index = indexes[key]
+                result = {**point, **{name: value for name, value in index.items() if name != 'collection'},
+                          **sweep.evaluate(point, index['collection']), 'extraction_s': round(extraction, 2)}
+                results.append(result)
+                out.write(json.dumps(result) + "\n")
+                out.flush()
+    finally:
+        if not args.keep:
+            sweep.cleanup()
+
+    print()
+    print_table(results)
+    best = cheapest(results, args.min_recall, args.min_grounding)
+    print()
+    if best is None:
+        bar = f"recall >= {args.min_recall}"
+        if args.min_grounding > 0:
+            bar += f" and context_overlap >= {args.min_grounding}"
+        print(f"No grid point reaches {bar}")
+    else:
+        print("Cheapest point meeting the quality bar: "
+              + ", ".join(f"{name}={best[name]}" for name in DEFAULTS)
+              + f" (recall {best['recall']}, p95 {best['total_p95_ms']} ms, {best['index_mib']} MiB)")
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark of the native SentenceTokenSplitter against LangChain's
+RecursiveCharacterTextSplitter (chunk_size=512, chunk_overlap=120).
+
+Reports throughput, chunk counts and how many chunks exceed the embedding
+model's window (i.e. get silently truncated when embedded).
+
+Usage:
+    python benchmarks/splitterBenchmark.py [path to PDF directory or .txt file] [--repeat N]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from dataPrepraration.embedding.textSplitter import SentenceTokenSplitter
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+MODEL_WINDOW = 256
+
+
+def load_texts(path: str) -> list:
+    """Load texts from a .txt file or a directory of PDFs, or generate a synthetic corpus"""
+    if path and path.endswith('.txt'):
+        with open(path, 'r', encoding='utf-8') as f:
+            return [f.read()]
+    if path and os.path.isdir(path):
+        from dataPrepraration.pdfToText.pdfToText import PDFToText
+        return PDFToText(pdf_path=path).convert_to_text()
+
+    import random
+    random.seed(0)
+    words = ("black hole accretion disk magnetic field relativistic jet spectral energy "
+             "distribution neural network training data convolutional observation telescope").split()
+    sentences = [" ".join(random.choice(words) for _ in range(random.randint(6, 40))).capitalize() + "."
+                 for _ in range(5000)]
+    return [" ".join(sentences[i:i + 500]) for i in range(0, len(sentences), 500)]
+
+
+def load_tokenizer():
+    """Load the embedding model's fast tokenizer, or None if transformers is unavailable"""
+    try:
+        from transformers import AutoTokenizer
+        return AutoTokenizer.from_pretrained(MODEL_NAME)
+    except Exception as e:
+        print(f"Tokenizer unavailable, using approximate token counts: {e}")
+        return None
+
+
+def count_tokens(tokenizer, splitter: SentenceTokenSplitter, chunk: str) -> int:
+    if tokenizer is not None:
+        return len(tokenizer.backend_tokenizer.encode(chunk, add_special_tokens=False).ids)
+    return len(splitter._token_spans(chunk)[0])
+
+
+def run(name: str, split_fn, texts: list, repeat: int, tokenizer, counter: SentenceTokenSplitter) -> None:
+    total_chars = sum(len(text) for text in texts)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        chunks = [chunk for text in texts for chunk in split_fn(text)]
+    elapsed = (time.perf_counter() - start) / repeat
+
+    token_counts = [count_tokens(tokenizer, counter, chunk) for chunk in chunks]
+    truncated = sum(1 for count in token_counts if count > MODEL_WINDOW - 2)
+    print(f"{name:<12} {elapsed * 1000:9.1f} ms  {total_chars / elapsed / 1e6:7.2f} MB/s  "
+          f"{len(chunks):6d} chunks  avg {sum(token_counts) / max(len(chunks), 1):6.1f} tokens  "
+          f"{truncated:5d} over window")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', nargs='?', default='', help="PDF directory or .txt file (default: synthetic text)")
+    parser.add_argument('--repeat', type=int, default=3, help="Number of timed repetitions")
+    args = parser.parse_args()
+
+    texts = load_texts(args.path)
+    tokenizer = load_tokenizer()
+    native = SentenceTokenSplitter(tokenizer=tokenizer, max_tokens=MODEL_WINDOW - 2, overlap_tokens=50)
+    print(f"{len(texts)} texts, {sum(len(text) for text in texts)} characters\n")
+
+    run('native', native.split_text, texts, args.repeat, tokenizer, native)
+
+    try:
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+    except ImportError as e:
+        print(f"LangChain unavailable, skipping recursive splitter: {e}")
+        return
+    recursive = RecursiveCharacterTextSplitter(chunk_size=512, chunk_overlap=120)
+    run('recursive', recursive.split_text, texts, args.repeat, tokenizer, native)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Per-worker memory with and without preloading the models before fork.
+
+Forks N workers that each embed a query and extract keywords, the way a
+web worker does on its first request, and reports each worker's RSS, PSS
+(shared pages split between processes) and private memory.
+
+    lazy     every worker loads its own models after fork
+    preload  the parent loads the models once, workers share them copy-on-write
+
+Usage:
+    python benchmarks/workerMemory.py [--workers N] [--mode lazy|preload|both]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from dataPrepraration.embedding import sharedModels
+
+QUERY = "What machine learning methods are used in black hole research?"
+MIB = 2 ** 20
+
+
+def worker(write_fd: int, num_threads: int) -> None:
+    sharedModels.after_fork(num_threads)
+    embeddings = sharedModels.get_embeddings(device='cpu')
+    embeddings.embed_query(QUERY)
+    sharedModels.get_keybert(device='cpu').extract_keywords(QUERY, top_n=3)
+    with os.fdopen(write_fd, 'w') as f:
+        f.write(json.dumps(sharedModels.memory_usage()))
+    # Stay alive until the parent has measured every worker
+    time.sleep(2)
+
+
+def run(mode: str, workers: int) -> None:
+    if mode == 'preload':
+        sharedModels.preload_models()
+    parent = sharedModels.memory_usage()
+
+    num_threads = max(1, (os.cpu_count() or 1) // workers)
+    sys.stdout.flush()
+    pipes, pids = [], []
+    for _ in range(workers):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            worker(write_fd, num_threads)
+            os._exit(0)
+        os.close(write_fd)
+        pipes.append(read_fd)
+        pids.append(pid)
+
+    usages = []
+    for read_fd in pipes:
+        with os.fdopen(read_fd) as f:
+            usages.append(json.loads(f.read()))
+    for pid in pids:
+        os.waitpid(pid, 0)
+
+    print(f"{mode}: parent RSS {parent['rss'] / MIB:.0f} MiB, {workers} workers x {num_threads} threads")
+    for i, usage in enumerate(usages):
+        print(f"  worker {i}: RSS {usage['rss'] / MIB:7.0f} MiB  PSS {usage['pss'] / MIB:7.0f} MiB  "
+              f"private {usage['private'] / MIB:7.0f} MiB")
+    print(f"  total PSS {sum(usage['pss'] for usage in usages) / MIB:.0f} MiB\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--mode', choices=['lazy', 'preload', 'both'], default='both')
+    args = parser.parse_args()
+
+    if args.mode == 'both':
+        # Preloading changes the parent for good, so each mode runs in its own process
+        for mode in ('lazy', 'preload'):
+            pid = os.fork()
+            if pid == 0:
+                run(mode, args.workers)
+                sys.stdout.flush()
+                os._exit(0)
+            os.waitpid(pid, 0)
+    else:
+        run(args.mode, args.workers)
+
+
+if __name__ == "__main__":
+    main()
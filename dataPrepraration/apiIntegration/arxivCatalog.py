@@ -0,0 +1,193 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+import json
+import os
+import tempfile
+import threading
+import time
+
+DEFAULT_CATALOG_PATH = os.path.join('cache', 'arxiv_catalog.json')
+
+
+class ArxivCatalog:
+    """
+    Persistent local catalog of arXiv searches.
+
+    Stores the metadata of every paper seen and, per query string, the ids of
+    its results, when it was fetched and the newest submission date among its
+    ingested papers. Repeated searches are answered from the catalog within a
+    TTL and refreshes only ask arXiv for papers submitted after the newest
+    ingested one.
+
+    The newest submission date is a watermark: it only advances through
+    commit(), which the caller invokes once the papers are ingested, so a
+    failed or interrupted ingestion is retried by the next refresh.
+    """
+
+    def __init__(self, catalog_path: Optional[str] = DEFAULT_CATALOG_PATH):
+        """
+        Initialize the catalog and load existing entries from disk.
+
+        Args:
+            catalog_path (Optional[str]): JSON file to persist to. None keeps the catalog in memory only.
+        """
+        self.catalog_path = catalog_path
+        self._lock = threading.Lock()
+        data = self._load()
+        self._papers: Dict[str, Dict[str, Any]] = data.get('papers', {})
+        self._queries: Dict[str, Dict[str, Any]] = data.get('queries', {})
+
+    def _load(self) -> Dict[str, Any]:
+        """Load the catalog from disk, ignoring a missing or corrupt file"""
+        if not self.catalog_path or not os.path.exists(self.catalog_path):
+            return {}
+        try:
+            with open(self.catalog_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Could not read arXiv catalog {self.catalog_path}: {e}")
+            return {}
+
+    def _save(self) -> None:
+        """Write the catalog atomically so a crash never leaves a truncated file"""
+        if not self.catalog_path:
+            return
+        directory = os.path.dirname(self.catalog_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # A temporary file per writer keeps concurrent saves of several processes apart
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(prefix=f"{os.path.basename(self.catalog_path)}.",
+                                            suffix='.tmp', dir=directory or '.')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'papers': self._papers, 'queries': self._queries}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.catalog_path)
+        except OSError as e:
+            print(f"Could not write arXiv catalog {self.catalog_path}: {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @staticmethod
+    def _to_json(paper: Dict[str, Any]) -> Dict[str, Any]:
+        published = paper.get('published')
+        return {**paper, 'published': published.isoformat() if published else None}
+
+    @staticmethod
+    def _from_json(paper: Dict[str, Any]) -> Dict[str, Any]:
+        published = paper.get('published')
+        return {**paper, 'published': datetime.fromisoformat(published) if published else None}
+
+    @staticmethod
+    def _paper_id(paper: Dict[str, Any]) -> str:
+        return paper.get('short_id') or paper['filename']
+
+    def get(self, query: str, max_results: int, ttl: Optional[float]) -> Optional[List[Dict[str, Any]]]:
+        """
+        Return the cached results of a query if they are fresh enough.
+
+        Args:
+            query (str): arXiv query string
+            max_results (int): Requested number of results; a smaller cached search does not count
+            ttl (Optional[float]): Maximum age in seconds (None: never expires)
+
+        Returns:
+            Optional[List[Dict]]: Cached papers, or None on a miss
+        """
+        with self._lock:
+            entry = self._queries.get(query)
+            if entry is None or entry['max_results'] < max_results:
+                return None
+            if ttl is not None and time.time() - entry['fetched_at'] > ttl:
+                return None
+            return [self._from_json(self._papers[paper_id])
+                    for paper_id in entry['ids'][:max_results] if paper_id in self._papers]
+
+    def put(self, query: str, max_results: int, papers: List[Dict[str, Any]]) -> None:
+        """Store the full results of a query (the ingestion watermark is kept, see commit)"""
+        with self._lock:
+            for paper in papers:
+                self._papers[self._paper_id(paper)] = self._to_json(paper)
+            previous = self._queries.get(query) or {}
+            self._queries[query] = {
+                'fetched_at': time.time(),
+                'max_results': max_results,
+                'ids': [self._paper_id(paper) for paper in papers],
+                'latest_published': previous.get('latest_published'),
+                'ingested': previous.get('ingested', []),
+            }
+            self._save()
+
+    def latest_published(self, query: str) -> Optional[datetime]:
+        """Return the newest submission date ingested for a query, or None if nothing was committed"""
+        with self._lock:
+            entry = self._queries.get(query)
+            if entry is None or not entry.get('latest_published'):
+                return None
+            return datetime.fromisoformat(entry['latest_published'])
+
+    def new_papers(self, query: str, papers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Return the papers of an incremental refresh that were not ingested for a query yet.
+
+        Nothing is stored; see commit.
+
+        Args:
+            query (str): arXiv query string
+            papers (List[Dict]): Papers submitted since the last refresh
+
+        Returns:
+            List[Dict]: Papers not committed for the query so far
+        """
+        with self._lock:
+            entry = self._queries.get(query) or {}
+            # Catalogs written before 'ingested' existed recorded results only once ingested
+            known = set(entry.get('ingested', entry.get('ids', [])))
+            return [paper for paper in papers if self._paper_id(paper) not in known]
+
+    def commit(self, query: str, papers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Record papers of a query as ingested and advance its watermark.
+
+        Call only once the papers are ingested: incremental refreshes never
+        ask arXiv again for papers older than the watermark.
+
+        Args:
+            query (str): arXiv query string
+            papers (List[Dict]): Papers found for the query in the run that succeeded
+
+        Returns:
+            List[Dict]: Papers that were not in the query's results yet
+        """
+        with self._lock:
+            entry = self._queries.setdefault(
+                query, {'fetched_at': time.time(), 'max_results': 0, 'ids': [], 'latest_published': None}
+            )
+            known = set(entry['ids'])
+            new_papers = [paper for paper in papers if self._paper_id(paper) not in known]
+            for paper in papers:
+                self._papers[self._paper_id(paper)] = self._to_json(paper)
+            entry['ids'] = [self._paper_id(paper) for paper in new_papers] + entry['ids']
+            entry['max_results'] += len(new_papers)
+            ingested = entry.get('ingested', [])
+            ingested_set = set(ingested)
+            entry['ingested'] = ingested + [
+                paper_id for paper_id in dict.fromkeys(self._paper_id(paper) for paper in papers)
+                if paper_id not in ingested_set
+            ]
+            entry['latest_published'] = self._latest_published(papers, entry['latest_published'])
+            self._save()
+            return new_papers
+
+    @staticmethod
+    def _latest_published(papers: List[Dict[str, Any]], current: Optional[str]) -> Optional[str]:
+        dates = [paper['published'] for paper in papers if paper.get('published')]
+        if current:
+            dates.append(datetime.fromisoformat(current))
+        if not dates:
+            return None
+        latest = max(date if date.tzinfo else date.replace(tzinfo=timezone.utc) for date in dates)
+        return latest.isoformat()
+
+    def __len__(self) -> int:
+        return len(self._papers)
@@ -1,11 +1,26 @@
+from urllib.request import urlretrieve
+from datetime import datetime, timezone
+from typing import Optional
+from dataPrepraration.apiIntegration.arxivCatalog import ArxivCatalog
 import arxiv
 import os
 
 class ArxivAPI:
-    def __init__(self, keyword_list: tuple[str, ...], max_results: int = 10, download_directory: str = './archive'):
+    def __init__(self, keyword_list: tuple[str, ...], max_results: int = 10, download_directory: str = './archive',
+                 catalog: Optional[ArxivCatalog] = None, cache_ttl: Optional[float] = 24 * 3600):
+        """
+        Args:
+            keyword_list (tuple): Keywords combined with OR into the arXiv query.
+            max_results (int): Maximum number of results per search.
+            download_directory (str): Directory for downloaded PDFs.
+            catalog (Optional[ArxivCatalog]): Local catalog of earlier searches (None disables caching).
+            cache_ttl (Optional[float]): Seconds a cached search stays valid (None: never expires).
+        """
         self.keyword_list = keyword_list
         self.max_results = max_results
         self.download_directory = download_directory
+        self.catalog = catalog
+        self.cache_ttl = cache_ttl
 
     def _create_download_directory(self):
         """
@@ -14,48 +29,172 @@ class ArxivAPI:
         if not os.path.exists(self.download_directory):
             os.makedirs(self.download_directory)
 
-    def search(self) -> list[str]:
+    @property
+    def query_string(self) -> str:
+        """Keywords combined into one arXiv query string"""
+        return " OR ".join(self.keyword_list)
+
+    @staticmethod
+    def _paper_from_result(result: arxiv.Result) -> dict:
+        return {
+            'title': result.title,
+            'summary': result.summary,
+            'authors': [author.name for author in result.authors],
+            'published': result.published,
+            'arxiv_id': result.entry_id,
+            'short_id': result.get_short_id(),
+            'categories': list(result.categories),
+            'primary_category': result.primary_category,
+            'pdf_url': result.pdf_url,
+            'filename': result.entry_id.split('/')[-1]
+        }
+
+    def _download_all(self, papers: list[dict]) -> list[dict]:
+        """Download PDFs and keep only papers whose download succeeded"""
+        self._create_download_directory()
+        return [paper for paper in papers if self.download_paper(paper)]
+
+    def search(self, download: bool = True, refresh: bool = False) -> list[dict]:
         """
         Search for papers on arXiv based on the keyword_list.
 
+        Results of an identical earlier search are served from the catalog
+        while they are younger than cache_ttl.
+
         Args:
-            keyword_list (str): The search keyword_list.
-            max_results (int): Maximum number of results to return.
+            download (bool): Download the PDF of every result. If False, only metadata
+                is returned and PDFs can be fetched later with download_paper().
+            refresh (bool): Ignore cached results and ask arXiv again.
 
         Returns:
             list: A list of dictionaries containing paper information.
         """
-        # Create download directory first
-        self._create_download_directory()
+        query_string = self.query_string
         
-        # Combine keywords into one query string
-        query_string = " OR ".join(self.keyword_list)
+        papers = None
+        if self.catalog is not None and not refresh:
+            papers = self.catalog.get(query_string, self.max_results, self.cache_ttl)
+            if papers is not None:
+                print(f"Using {len(papers)} cached arXiv results for: {query_string}")
         
+        if papers is None:
+            search = arxiv.Search(
+                query=query_string,
+                max_results=self.max_results,
+                sort_by=arxiv.SortCriterion.Relevance
+            )
+            papers = [self._paper_from_result(result) for result in search.results()]
+            if self.catalog is not None:
+                self.catalog.put(query_string, self.max_results, papers)
+        
+        # Download PDFs, keeping only papers whose download succeeded
+        return self._download_all(papers) if download else papers
+
+    def search_new(self, download: bool = True) -> list[dict]:
+        """
+        Fetch only papers submitted since the last search of the same keywords.
+
+        arXiv is asked for the newest submissions first and the scan stops at
+        the newest paper already ingested, so the cost is proportional to the
+        number of new papers. A query with nothing ingested yet falls back to
+        a regular search. The papers are not marked as ingested here; call
+        commit() once they are.
+
+        Args:
+            download (bool): Download the PDF of every new paper.
+
+        Returns:
+            list: New papers (empty if nothing was submitted since the last run).
+        """
+        if self.catalog is None:
+            raise ValueError("Incremental search requires a catalog")
+        
+        query_string = self.query_string
+        since = self.catalog.latest_published(query_string)
+        if since is None:
+            return self.search(download=download, refresh=True)
+        
+        since_utc = since.astimezone(timezone.utc)
+        until = datetime.now(timezone.utc)
         search = arxiv.Search(
-            query=query_string,
+            query=f"({query_string}) AND submittedDate:[{since_utc:%Y%m%d%H%M} TO {until:%Y%m%d%H%M}]",
             max_results=self.max_results,
-            sort_by=arxiv.SortCriterion.Relevance
+            sort_by=arxiv.SortCriterion.SubmittedDate,
+            sort_order=arxiv.SortOrder.Descending
         )
         
-        results = []
+        papers = []
         for result in search.results():
-            try:
-                # Download PDF first, then add to results only if successful
-                result.download_pdf(dirpath=self.download_directory, filename=f"{result.entry_id.split('/')[-1]}.pdf")
-                
-                results.append({
-                    'title': result.title,
-                    'summary': result.summary,
-                    'authors': [author.name for author in result.authors],
-                    'published': result.published,
-                    'arxiv_id': result.entry_id
-                })
-                
-            except Exception as e:
-                print(f"Failed to download {result.entry_id}: {e}")
-                continue
+            if result.published <= since:
+                break
+            papers.append(self._paper_from_result(result))
         
-        return results
+        papers = self.catalog.new_papers(query_string, papers)
+        print(f"Found {len(papers)} new papers since {since:%Y-%m-%d %H:%M} for: {query_string}")
+        return self._download_all(papers) if download else papers
+
+    def commit(self, papers: list[dict]) -> None:
+        """
+        Mark papers found for the keywords as ingested in the catalog.
+
+        Advances the point from which search_new() asks arXiv, so it must be
+        called only after the papers were ingested successfully.
+
+        Args:
+            papers (list): Papers returned by search() or search_new()
+        """
+        if self.catalog is not None:
+            self.catalog.commit(self.query_string, papers)
+
+    def download_paper(self, paper: dict) -> bool:
+        """
+        Download the PDF of a paper returned by search().
+
+        Args:
+            paper (dict): Paper information with 'pdf_url' and 'filename'.
+
+        Returns:
+            bool: True if the PDF was downloaded successfully.
+        """
+        self._create_download_directory()
+        try:
+            pdf_path = self.pdf_path(paper)
+            if os.path.exists(pdf_path):
+                return True
+            # Download next to the target so an interrupted download is never mistaken for a PDF
+            urlretrieve(paper['pdf_url'], f"{pdf_path}.part")
+            os.replace(f"{pdf_path}.part", pdf_path)
+            return True
+        except Exception as e:
+            print(f"Failed to download {paper.get('arxiv_id')}: {e}")
+            return False
+
+    def pdf_path(self, paper: dict) -> str:
+        """Return the local path of a paper's PDF in the download directory"""
+        return os.path.join(self.download_directory, f"{paper['filename']}.pdf")
+
+    @staticmethod
+    def paper_metadata(paper: dict) -> dict:
+        """
+        Convert a search result into a JSON-serializable payload for vector store chunks.
+
+        Args:
+            paper (dict): One result returned by search().
+
+        Returns:
+            dict: Title, authors, year, categories and arXiv id of the paper.
+        """
+        published = paper.get('published')
+        return {
+            'title': paper.get('title', ''),
+            'authors': paper.get('authors', []),
+            'published': published.isoformat() if published else None,
+            'year': published.year if published else None,
+            'categories': paper.get('categories', []),
+            'primary_category': paper.get('primary_category'),
+            'arxiv_id': paper.get('short_id') or paper.get('arxiv_id', '').split('/')[-1],
+            'pdf_url': paper.get('pdf_url'),
+        }
     
 if __name__ == "__main__":
     # Example usage
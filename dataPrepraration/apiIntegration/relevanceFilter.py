@@ -0,0 +1,96 @@
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+
+
+class RelevanceFilter:
+    """
+    Pre-download relevance filter for arXiv search results.
+
+    The keyword search ORs all keywords together and returns many loosely
+    related papers. Before anything is downloaded, the title and summary of
+    every result are embedded in one batch and compared with the user query;
+    only results above a similarity threshold and/or within a top fraction
+    are kept.
+    """
+
+    def __init__(self, embeddings: Any, min_similarity: Optional[float] = 0.25,
+                 top_fraction: Optional[float] = None):
+        """
+        Initialize the filter.
+
+        Args:
+            embeddings (Any): LangChain embeddings with embed_query and embed_documents
+            min_similarity (Optional[float]): Minimum cosine similarity to the query (None disables)
+            top_fraction (Optional[float]): Keep only this fraction of the best results, e.g. 0.5 (None disables)
+        """
+        if top_fraction is not None and not 0 < top_fraction <= 1:
+            raise ValueError("top_fraction must be in (0, 1]")
+        self.embeddings = embeddings
+        self.min_similarity = min_similarity
+        self.top_fraction = top_fraction
+
+    @staticmethod
+    def _paper_text(paper: Dict[str, Any]) -> str:
+        return f"{paper.get('title', '')}\n\n{paper.get('summary', '')}".strip()
+
+    def score(self, query: str, papers: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        Compute cosine similarity of each paper's title and summary to the query.
+
+        Args:
+            query (str): Original user query (in English)
+            papers (List[Dict]): Results of ArxivAPI.search(download=False)
+
+        Returns:
+            np.ndarray: Similarity of each paper, in input order
+        """
+        if not papers:
+            return np.zeros(0, dtype=np.float32)
+
+        query_vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+        paper_vectors = np.asarray(
+            self.embeddings.embed_documents([self._paper_text(paper) for paper in papers]),
+            dtype=np.float32
+        )
+        query_vector /= np.linalg.norm(query_vector) or 1.0
+        paper_vectors /= np.maximum(np.linalg.norm(paper_vectors, axis=1, keepdims=True), 1e-12)
+        return paper_vectors @ query_vector
+
+    def filter(self, query: str, papers: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Split search results into relevant and skipped papers.
+
+        Every paper gets a 'relevance' score. Kept papers are ordered from the
+        most to the least relevant.
+
+        Args:
+            query (str): Original user query (in English)
+            papers (List[Dict]): Results of ArxivAPI.search(download=False)
+
+        Returns:
+            Tuple[List[Dict], List[Dict]]: (kept, skipped) papers
+        """
+        scores = self.score(query, papers)
+        for paper, score in zip(papers, scores):
+            paper['relevance'] = float(score)
+
+        order = np.argsort(-scores, kind='stable')
+        keep = np.ones(len(papers), dtype=bool)
+        if self.min_similarity is not None:
+            keep &= scores >= self.min_similarity
+        if self.top_fraction is not None and len(papers):
+            top_n = max(1, int(np.ceil(len(papers) * self.top_fraction)))
+            in_top = np.zeros(len(papers), dtype=bool)
+            in_top[order[:top_n]] = True
+            keep &= in_top
+
+        kept = [papers[i] for i in order if keep[i]]
+        skipped = [papers[i] for i in order if not keep[i]]
+        return kept, skipped
+
+    @staticmethod
+    def report(kept: List[Dict[str, Any]], skipped: List[Dict[str, Any]]) -> None:
+        """Print which search results were skipped as irrelevant"""
+        print(f"Relevance filter kept {len(kept)} of {len(kept) + len(skipped)} papers")
+        for paper in skipped:
+            print(f"  - skipped ({paper['relevance']:.2f}): {paper.get('title', paper.get('filename'))}")
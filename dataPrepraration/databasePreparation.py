@@ -1,62 +1,322 @@
 from dataPrepraration.extraction.keywordsExtraction import KeywordsExtractor
+from dataPrepraration.extraction.translation import DEFAULT_TRANSLATOR_BACKEND, get_translator_backend
 from dataPrepraration.apiIntegration.arxiveAPI import ArxivAPI
+from dataPrepraration.apiIntegration.arxivCatalog import ArxivCatalog
+from dataPrepraration.apiIntegration.relevanceFilter import RelevanceFilter
 from dataPrepraration.embedding.embeddingArticle import EmbeddingArticle
+from dataPrepraration.embedding.collectionVersions import CollectionVersions
+from dataPrepraration.embedding.deduplication import DEFAULT_REPORT_PATH, ChunkDeduplicator
+from dataPrepraration.embedding.sharedModels import get_embeddings
 from dataPrepraration.pdfToText.pdfToText import PDFToText
+from dataPrepraration.pdfToText.sectionParser import section_at
+from typing import Any, Dict, List, Optional
+import os
 
 
 class DatabasePreparation:
-    def __init__(self, user_query: str = "", max_results: int = 10, download_directory: str = 'archive'):
+    def __init__(self, user_query: str = "", max_results: int = 10, download_directory: str = 'archive',
+                 collection_name: str = "scientific_papers", mode: str = 'full',
+                 min_relevance: Optional[float] = 0.25, top_fraction: Optional[float] = None,
+                 incremental: bool = False, catalog: Optional[ArxivCatalog] = None,
+                 rebuild: bool = False, vector_backend: str = 'qdrant',
+                 dedup_threshold: Optional[float] = 0.85,
+                 dedup_report_path: Optional[str] = DEFAULT_REPORT_PATH,
+                 translator_backend: str = DEFAULT_TRANSLATOR_BACKEND):
+        """
+        Initialize database preparation for a topic.
+
+        Args:
+            user_query (str): Question or topic used to search arXiv
+            max_results (int): Maximum number of papers to fetch
+            download_directory (str): Directory for downloaded PDFs
+            collection_name (str): Qdrant collection to fill
+            mode (str): 'full' downloads and embeds full texts now; 'abstracts' indexes
+                arXiv abstracts immediately and embeds a paper's full text in the
+                background the first time it is retrieved
+            min_relevance (Optional[float]): Minimum similarity of a result's title and summary
+                to the query for it to be ingested (None disables the threshold)
+            top_fraction (Optional[float]): Ingest only this fraction of the most relevant
+                results (None disables the limit)
+            incremental (bool): Ingest only papers submitted since the last run for the same
+                keywords (scheduled refresh of a topic)
+            catalog (Optional[ArxivCatalog]): Local catalog of arXiv searches (default: on-disk catalog)
+            rebuild (bool): Ingest into a shadow copy of the collection and atomically switch
+                the collection alias to it once indexed, so live queries are never affected
+            vector_backend (str): 'qdrant' or the in-process 'numpy' store
+            dedup_threshold (Optional[float]): Similarity at which a chunk is skipped as a
+                near-duplicate of an earlier chunk of this run (None disables deduplication)
+            dedup_report_path (Optional[str]): JSONL file recording skipped chunks and
+                duplicate papers of each run (None disables the report)
+            translator_backend (str): Backend translating non-English queries ('google', or
+                'argos' for nodes without internet access; see TRANSLATOR_BACKENDS)
+        """
+        if mode not in ('full', 'abstracts'):
+            raise ValueError(f"Unknown preparation mode: {mode}. Use 'full' or 'abstracts'.")
         self.user_query = user_query
         self.max_results = max_results
         self.download_directory = download_directory
+        self.collection_name = collection_name
+        self.mode = mode
+        self.min_relevance = min_relevance
+        self.top_fraction = top_fraction
+        self.incremental = incremental
+        self.catalog = catalog if catalog is not None else ArxivCatalog()
+        self.rebuild = rebuild
+        self.vector_backend = vector_backend
+        self.dedup_threshold = dedup_threshold
+        self.dedup_report_path = dedup_report_path
+        self.translator = get_translator_backend(translator_backend)
+        self.deduplicator: Optional[ChunkDeduplicator] = None
+        self.relevant_papers: List[Dict[str, Any]] = []
+        self.skipped_papers: List[Dict[str, Any]] = []
 
-    def prepare_database(self):
+    @staticmethod
+    def _abstract_text(document: dict, max_chars: int = 2000) -> str:
+        """Return the abstract section of an extracted document, or its beginning"""
+        for section in document['sections']:
+            if section['kind'] == 'abstract':
+                return document['text'][section['start']:section['end']][:max_chars]
+        return document['text'][:max_chars]
+
+    @staticmethod
+    def embed_article(embedding_article: EmbeddingArticle, article_data: Dict[str, Any],
+                      deduplicator: Optional[ChunkDeduplicator] = None) -> int:
+        """
+        Split an extracted article and add its chunks to the vectorstore.
+
+        Args:
+            embedding_article (EmbeddingArticle): Target vectorstore
+            article_data (Dict): 'text', 'filename', 'sections' and 'metadata' of the article
+            deduplicator (Optional[ChunkDeduplicator]): Drops near-duplicate chunks before embedding
+
+        Returns:
+            int: Number of chunks added
+        """
+        split = embedding_article._split_text_with_offsets(article_data['text'])
+        chunks = [chunk for chunk, _, _ in split]
+        if not chunks:
+            return 0
+        return len(embedding_article._add_documents(
+            chunks, article_data['filename'],
+            offsets=[(start, end) for _, start, end in split],
+            sections=[section_at(article_data['sections'], start) for _, start, _ in split],
+            paper_metadata=article_data['metadata'],
+            deduplicator=deduplicator
+        ))
+
+    def _index_abstracts(self, embedding_article: EmbeddingArticle, papers: List[Dict[str, Any]]) -> None:
+        """
+        Index arXiv abstracts as chunks and paper entries without downloading PDFs.
+
+        Full texts are fetched later by the lazy full-text indexer when a
+        paper's abstract is retrieved.
+        """
+        for paper in papers:
+            metadata = {**ArxivAPI.paper_metadata(paper), 'full_text_indexed': False}
+            duplicate_of = self._check_duplicate_paper(paper['filename'], paper['title'], paper['summary'])
+            if duplicate_of:
+                metadata['duplicate_of'] = duplicate_of
+            embedding_article._add_documents(
+                [f"{paper['title']}\n\n{paper['summary']}"], paper['filename'],
+                sections=['Abstract'], paper_metadata=metadata, deduplicator=self.deduplicator, kind='abstract'
+            )
+
+        embedding_article.add_papers([
+            {
+                'article_name': paper['filename'],
+                'title': paper['title'],
+                'summary': paper['summary'],
+                'metadata': {**ArxivAPI.paper_metadata(paper), 'full_text_indexed': False}
+            }
+            for paper in papers
+        ])
+        print(f"Indexed {len(papers)} abstracts, full texts will be indexed on first retrieval")
+
+    def _check_duplicate_paper(self, article_name: str, title: str, summary: str) -> Optional[str]:
+        """Return the earlier paper of this run that a paper nearly duplicates, if any"""
+        if self.deduplicator is None:
+            return None
+        duplicate_of = self.deduplicator.check_paper(article_name, title or '', summary or '')
+        if duplicate_of:
+            print(f"Paper {article_name} is a near-duplicate of {duplicate_of}")
+        return duplicate_of
+
+    def _report_duplicates(self) -> None:
+        """Print and record what deduplication skipped in this run"""
+        if self.deduplicator is None:
+            return
+        report = self.deduplicator.report()
+        print(f"Deduplication: {report['chunks_skipped']} of {report['chunks_kept'] + report['chunks_skipped']} "
+              f"chunks skipped, {report['duplicate_papers']} near-duplicate papers")
+        if self.dedup_report_path:
+            self.deduplicator.save_report(self.dedup_report_path, {
+                'query': self.user_query, 'collection': self.collection_name, 'mode': self.mode
+            })
+
+    def find_papers(self, embeddings: Optional[Any] = None) -> Optional[ArxivAPI]:
+        """
+        Search arXiv for the query's keywords and keep the results relevant to the query.
+
+        Sets found_papers (in search order), relevant_papers and skipped_papers.
+
+        Args:
+            embeddings (Optional[Any]): Embedding model used by the relevance filter
+                (default: the process-wide shared model)
+
+        Returns:
+            Optional[ArxivAPI]: The search client for downloading, or None if nothing was found
+        """
+        self.found_papers, self.relevant_papers, self.skipped_papers = [], [], []
         # Step 1: Extract keywords from the provided text
-        extractor = KeywordsExtractor(self.user_query)
+        extractor = KeywordsExtractor(self.user_query, translator=self.translator)
         keyword_list = extractor.get_keywords()
         print(f"Extracted keywords: {keyword_list}")
 
-        # Step 2: Search and download papers from arXiv
-        arxiv_api = ArxivAPI(keyword_list=keyword_list, max_results=self.max_results, download_directory=self.download_directory)
-        papers = arxiv_api.search()
-        print(f"Successfully downloaded {len(papers)} papers")
+        # Step 2: Search arXiv and keep only results relevant to the query
+        arxiv_api = ArxivAPI(keyword_list=keyword_list, max_results=self.max_results,
+                             download_directory=self.download_directory, catalog=self.catalog)
+        if self.incremental:
+            found = arxiv_api.search_new(download=False)
+        else:
+            found = arxiv_api.search(download=False)
+        print(f"Found {len(found)} papers")
+        self.found_papers = found
+        if not found:
+            print("No papers were found.")
+            return None
+
+        relevance_filter = RelevanceFilter(
+            embeddings or get_embeddings(), min_similarity=self.min_relevance, top_fraction=self.top_fraction
+        )
+        self.relevant_papers, self.skipped_papers = relevance_filter.filter(extractor.translated_text, found)
+        relevance_filter.report(self.relevant_papers, self.skipped_papers)
+        return arxiv_api
+
+    def prepare_database(self):
+        self.deduplicator = ChunkDeduplicator(threshold=self.dedup_threshold) if self.dedup_threshold is not None else None
+        arxiv_api = self.find_papers()
+        if arxiv_api is None:
+            return
+        
+        embedding_article = EmbeddingArticle(collection_name=self.collection_name, vector_backend=self.vector_backend)
+        
+        if not self.rebuild:
+            self._ingest(embedding_article, arxiv_api)
+            arxiv_api.commit(self.found_papers)
+            self._report_duplicates()
+            print("Database preparation completed successfully!")
+            return
+        
+        # Blue/green rebuild: live queries keep using the active version
+        versions = CollectionVersions(embedding_article.client, self.collection_name)
+        # The shadow starts as a copy of the active version so other topics are kept; papers
+        # ingested again overwrite their copied points, whose ids are deterministic (see point_id)
+        shadow = versions.create_shadow(copy_active=True)
+        try:
+            self._ingest(EmbeddingArticle(collection_name=shadow, embeddings=embedding_article.embeddings,
+                                          vector_backend=self.vector_backend), arxiv_api)
+            versions.wait_until_indexed(shadow)
+        except Exception:
+            versions.drop(shadow)
+            raise
+        versions.activate(shadow, replace_collection=True)
+        # Only now are the papers searchable; an incremental refresh skips them from here on
+        arxiv_api.commit(self.found_papers)
+        self._report_duplicates()
+        print("Database preparation completed successfully!")
+
+    def _ingest(self, embedding_article: EmbeddingArticle, arxiv_api: ArxivAPI) -> None:
+        """Download, extract and embed the relevant papers into a collection"""
+        if self.mode == 'abstracts':
+            if self.relevant_papers:
+                self._index_abstracts(embedding_article, self.relevant_papers)
+            return
+        
+        articles = self.extract_articles(arxiv_api, self.relevant_papers)
+        if articles:
+            self.embed_articles(embedding_article, articles)
+
+    def extract_articles(self, arxiv_api: ArxivAPI, papers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Download papers and extract their texts with section structure and arXiv metadata.
+
+        Args:
+            arxiv_api (ArxivAPI): Search client returned by find_papers
+            papers (List[Dict]): Search results to download
 
+        Returns:
+            List[Dict]: 'text', 'filename', 'sections', 'metadata', 'title' and 'summary' of each article
+        """
+        papers = [paper for paper in papers if arxiv_api.download_paper(paper)]
+        print(f"Successfully downloaded {len(papers)} papers")
+        
         if not papers:
             print("No papers were downloaded. Cannot proceed with text extraction.")
-            return
+            return []
 
-        # Step 3: Convert downloaded PDFs to text
-        pdf_to_text = PDFToText(pdf_path=self.download_directory)
-        texts = pdf_to_text.convert_to_text()
+        # Step 3: Convert the downloaded PDFs to text with their section structure
+        # (only this run's papers, so earlier downloads are not embedded again)
+        documents = []
+        for paper in papers:
+            documents.extend(PDFToText(pdf_path=arxiv_api.pdf_path(paper)).convert_to_documents())
         
-        if not texts:
+        if not documents:
             print("No texts were extracted from PDFs.")
-            return
+            return []
 
-        # Step 4: Get PDF filenames for metadata
-        pdf_paths = pdf_to_text._path_to_pdfs()
-        
-        # Create articles list with filenames as metadata
+        # Step 4: Use PDF filenames (without path and extension) as article names
+        # and attach the arXiv metadata of the matching search result
+        papers_by_filename = {paper['filename']: paper for paper in papers}
         articles_with_names = []
-        for i, text in enumerate(texts):
-            if i < len(pdf_paths):
-                filename = pdf_paths[i].split('/')[-1].replace('.pdf', '')  # Get filename without path and extension
-                articles_with_names.append({'text': text, 'filename': filename})
-            else:
-                articles_with_names.append({'text': text, 'filename': f'Document_{i+1}'})
-        
+        for document in documents:
+            filename = os.path.splitext(os.path.basename(document['path']))[0]
+            paper = papers_by_filename.get(filename)
+            articles_with_names.append({
+                'text': document['text'],
+                'filename': filename,
+                'sections': document['sections'],
+                'metadata': ArxivAPI.paper_metadata(paper) if paper else None,
+                'title': paper['title'] if paper else document['title'],
+                'summary': paper['summary'] if paper else self._abstract_text(document)
+            })
+        return articles_with_names
+
+    def embed_articles(self, embedding_article: EmbeddingArticle, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Embed extracted articles and add their paper entries to the vectorstore.
+
+        Args:
+            embedding_article (EmbeddingArticle): Target vectorstore
+            articles (List[Dict]): Articles returned by extract_articles
+
+        Returns:
+            List[Dict]: Paper entries of the articles that produced chunks
+        """
         # Step 5: Embed articles and add them to the vectorstore
-        texts_only = [article['text'] for article in articles_with_names]
-        embedding_article = EmbeddingArticle(articles=texts_only)
+        # Override the embed_articles method to use proper filenames and section names
+        embedded_papers = []
+        for i, article_data in enumerate(articles):
+            duplicate_of = self._check_duplicate_paper(article_data['filename'], article_data['title'], article_data['summary'])
+            if duplicate_of:
+                article_data = {**article_data, 'metadata': {**(article_data['metadata'] or {}), 'duplicate_of': duplicate_of}}
+            num_chunks = self.embed_article(embedding_article, article_data, deduplicator=self.deduplicator)
+            if num_chunks:
+                print(f"Embedded article: {article_data['filename']} ({num_chunks} chunks)")
+                embedded_papers.append({
+                    'article_name': article_data['filename'],
+                    'title': article_data['title'],
+                    'summary': article_data['summary'],
+                    'metadata': article_data['metadata']
+                })
         
-        # Override the embed_articles method to use proper filenames
-        for i, article_data in enumerate(articles_with_names):
-            chunks = embedding_article._split_text(article_data['text'])
-            if chunks:
-                embedding_article._add_documents(chunks, article_data['filename'])
-                print(f"Embedded article: {article_data['filename']} ({len(chunks)} chunks)")
+        # Step 6: Add abstract-level entries used to preselect papers at query time
+        embedding_article.add_papers(embedded_papers)
+        print(f"Indexed {len(embedded_papers)} paper abstracts")
         
-        print("Database preparation completed successfully!")
+        stats = embedding_article.chunk_cache.stats()
+        print(f"Chunk embedding cache: {stats['hits']} hits, {stats['misses']} encoded, "
+              f"{stats['evictions']} evicted")
+        return embedded_papers
 
 if __name__ == "__main__":
     query = 'what machine learning methods are used in black hole research and why?'
@@ -68,4 +328,3 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"An error occurred during database preparation: {e}")
         print(f"Error: {e}")
-    
@@ -0,0 +1,346 @@
+from langchain_core.embeddings import Embeddings
+from typing import Any, Callable, Dict, List, Optional
+import contextlib
+import fcntl
+import hashlib
+import json
+import os
+import re
+import threading
+import numpy as np
+
+DEFAULT_CACHE_PATH = os.path.join('cache', 'chunk_embeddings')
+
+# Size limit of one model's cache; 1 GiB holds ~680k all-MiniLM-L6-v2 chunks
+DEFAULT_MAX_BYTES = 2 ** 30
+
+# Eviction compacts the cache down to this fraction of max_bytes, so it does
+# not run again after the next few additions
+COMPACT_TO = 0.8
+
+KEY_BYTES = 16
+
+_META_FILE = "meta.json"
+_KEYS_FILE = "keys.bin"
+_VECTORS_FILE = "vectors.bin"
+
+
+def chunk_key(text: str) -> bytes:
+    """Content address of a chunk: 16-byte BLAKE2b digest of its exact text"""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=KEY_BYTES).digest()
+
+
+class _ModelCache:
+    """
+    Embeddings of one model on disk.
+
+    keys.bin holds one 16-byte content hash per row and vectors.bin the
+    float32 embeddings in the same order; both are append-only. A vector is
+    always written before its key, so every key read has a complete vector.
+    Eviction rewrites both files keeping the most recently used rows and
+    bumps 'generation' in meta.json, which makes other processes reload.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.RLock()
+        self._reset(generation=None, dim=None)
+
+    def _reset(self, generation: Optional[int], dim: Optional[int]) -> None:
+        self.generation = generation
+        self.dim = dim
+        self.index: Dict[bytes, int] = {}
+        self.last_used = np.zeros(0, dtype=np.int64)
+        self._tick = 0
+        self._keys_offset = 0
+        self._vectors: Optional[np.memmap] = None
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        with open(self._file('.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_meta(self) -> Dict[str, Any]:
+        try:
+            with open(self._file(_META_FILE), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_meta(self, dim: int, generation: int) -> None:
+        tmp_path = f"{self._file(_META_FILE)}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'dim': dim, 'generation': generation}, f)
+        os.replace(tmp_path, self._file(_META_FILE))
+
+    @property
+    def rows(self) -> int:
+        return len(self.index)
+
+    @property
+    def size_bytes(self) -> int:
+        return self.rows * (KEY_BYTES + 4 * (self.dim or 0))
+
+    def refresh(self) -> None:
+        """Read keys appended since the last access; reload everything after another process compacted"""
+        with self._lock:
+            meta = self._read_meta()
+            if not meta:
+                return
+            if meta['generation'] != self.generation:
+                self._reset(meta['generation'], meta['dim'])
+            try:
+                keys_size = os.path.getsize(self._file(_KEYS_FILE))
+            except OSError:
+                return
+            # Ignore a key still being written
+            keys_size -= keys_size % KEY_BYTES
+            if keys_size <= self._keys_offset:
+                return
+            with open(self._file(_KEYS_FILE), 'rb') as f:
+                f.seek(self._keys_offset)
+                data = f.read(keys_size - self._keys_offset)
+            first_row = self.rows
+            for i in range(len(data) // KEY_BYTES):
+                self.index[data[i * KEY_BYTES:(i + 1) * KEY_BYTES]] = first_row + i
+            self._keys_offset = keys_size
+            # Rows never used in this process rank by age: newer rows are kept longer
+            self.last_used = np.concatenate([self.last_used, np.arange(first_row, self.rows, dtype=np.int64) - self.rows])
+
+    def _vector_matrix(self) -> np.ndarray:
+        if self._vectors is None or len(self._vectors) < self.rows:
+            self._vectors = np.memmap(self._file(_VECTORS_FILE), dtype=np.float32, mode='r',
+                                      shape=(self.rows, self.dim))
+        return self._vectors
+
+    def lookup(self, keys: List[bytes]) -> List[Optional[np.ndarray]]:
+        """Return the cached vector of each key, or None"""
+        with self._lock:
+            self.refresh()
+            rows = [self.index.get(key) for key in keys]
+            found = [row for row in rows if row is not None]
+            if not found:
+                return [None] * len(keys)
+            self._tick += 1
+            self.last_used[found] = self._tick
+            matrix = self._vector_matrix()
+            return [np.array(matrix[row]) if row is not None else None for row in rows]
+
+    def append(self, keys: List[bytes], vectors: np.ndarray, max_bytes: int) -> int:
+        """
+        Append new entries and evict old ones if the cache grew beyond max_bytes.
+
+        Returns:
+            int: Number of evicted entries
+        """
+        with self._lock, self._file_lock():
+            self.refresh()
+            if self.generation is None:
+                self._write_meta(vectors.shape[1], 0)
+                self.refresh()
+                open(self._file(_KEYS_FILE), 'ab').close()
+            if vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match the cache ({self.dim})")
+
+            new = {}
+            for key, vector in zip(keys, vectors):
+                if key not in self.index and key not in new:
+                    new[key] = vector
+            if not new:
+                return 0
+
+            with open(self._file(_VECTORS_FILE), 'ab') as f:
+                f.write(np.asarray(list(new.values()), dtype=np.float32).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            with open(self._file(_KEYS_FILE), 'ab') as f:
+                f.write(b''.join(new))
+            self.refresh()
+            self._tick += 1
+            self.last_used[-len(new):] = self._tick
+
+            if self.size_bytes > max_bytes:
+                return self._compact(int(max_bytes * COMPACT_TO))
+            return 0
+
+    def _compact(self, target_bytes: int) -> int:
+        """Rewrite the cache with the most recently used rows that fit target_bytes; the caller holds the file lock"""
+        keep_rows = max(target_bytes // (KEY_BYTES + 4 * self.dim), 0)
+        order = np.argsort(-self.last_used, kind='stable')[:keep_rows]
+        order.sort()
+
+        keys = list(self.index)
+        matrix = self._vector_matrix()
+        with open(f"{self._file(_VECTORS_FILE)}.tmp", 'wb') as f:
+            for start in range(0, len(order), 65536):
+                f.write(np.asarray(matrix[order[start:start + 65536]], dtype=np.float32).tobytes())
+        with open(f"{self._file(_KEYS_FILE)}.tmp", 'wb') as f:
+            f.write(b''.join(keys[row] for row in order))
+
+        evicted = self.rows - len(order)
+        last_used = self.last_used[order]
+        os.replace(f"{self._file(_VECTORS_FILE)}.tmp", self._file(_VECTORS_FILE))
+        os.replace(f"{self._file(_KEYS_FILE)}.tmp", self._file(_KEYS_FILE))
+        self._write_meta(self.dim, self.generation + 1)
+
+        tick = self._tick
+        self.refresh()
+        self.last_used[:] = last_used
+        self._tick = tick
+        return evicted
+
+
+class ChunkEmbeddingCache:
+    """
+    Persistent, content-addressed cache of chunk embeddings.
+
+    Entries are keyed by (model name, hash of the exact chunk text), so
+    re-preparing a topic, writing to another collection or rebuilding a
+    collection reads known chunks from disk instead of encoding them again.
+    Each model's cache is bounded by max_bytes; when it grows beyond that,
+    the least recently used entries are evicted.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            path (str): Directory holding one subdirectory per model
+            max_bytes (int): Size limit of each model's cache (keys and vectors)
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self._models: Dict[str, _ModelCache] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _model_cache(self, model_name: str) -> _ModelCache:
+        with self._lock:
+            if model_name not in self._models:
+                directory = os.path.join(self.path, re.sub(r'[^A-Za-z0-9_.-]', '_', model_name))
+                self._models[model_name] = _ModelCache(directory)
+            return self._models[model_name]
+
+    def embed_documents(self, model_name: str, texts: List[str],
+                        embed_batch_fn: Callable[[List[str]], List[List[float]]]) -> List[List[float]]:
+        """
+        Return embeddings of chunks, encoding only those not cached yet (in one batch).
+
+        Args:
+            model_name (str): Name of the embedding model
+            texts (List[str]): Chunk texts
+            embed_batch_fn (Callable): Function embedding a list of texts
+
+        Returns:
+            List[List[float]]: Chunk embeddings in input order
+        """
+        if not texts:
+            return []
+        model_cache = self._model_cache(model_name)
+        keys = [chunk_key(text) for text in texts]
+        try:
+            vectors = model_cache.lookup(keys)
+        except (OSError, ValueError) as e:
+            print(f"Could not read chunk embedding cache: {e}")
+            vectors = [None] * len(texts)
+
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        with self._lock:
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            computed = np.asarray(embed_batch_fn([texts[i] for i in missing]), dtype=np.float32)
+            for i, vector in zip(missing, computed):
+                vectors[i] = vector
+            try:
+                evicted = model_cache.append([keys[i] for i in missing], computed, self.max_bytes)
+            except (OSError, ValueError) as e:
+                print(f"Could not write chunk embedding cache: {e}")
+                evicted = 0
+            with self._lock:
+                self.evictions += evicted
+
+        return [vector.tolist() for vector in vectors]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit-rate statistics of this process and the size of each model's cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'max_bytes': self.max_bytes,
+                'models': {},
+            }
+            models = dict(self._models)
+        for model_name, model_cache in models.items():
+            model_cache.refresh()
+            stats['models'][model_name] = {'entries': model_cache.rows, 'bytes': model_cache.size_bytes}
+        return stats
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings that look up document embeddings in a ChunkEmbeddingCache
+    before encoding them with the wrapped model. Queries are not cached here
+    (see RAG.Retrieval.queryEmbeddingCache).
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, cache: ChunkEmbeddingCache):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache = cache
+
+    @property
+    def client(self) -> Any:
+        """The wrapped sentence-transformers model"""
+        return getattr(self.embeddings, 'client', None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.cache.embed_documents(self.model_name, list(texts), self.embeddings.embed_documents)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+
+_shared_cache: Optional[ChunkEmbeddingCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_chunk_embedding_cache() -> ChunkEmbeddingCache:
+    """Return the process-wide chunk embedding cache used by EmbeddingArticle"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = ChunkEmbeddingCache()
+        return _shared_cache
+
+
+def configure_chunk_embedding_cache(path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES) -> ChunkEmbeddingCache:
+    """
+    Replace the process-wide cache, e.g. to move it or change its size limit.
+
+    Args:
+        path (str): Directory of the cache
+        max_bytes (int): Size limit of each model's cache
+
+    Returns:
+        ChunkEmbeddingCache: The new shared cache
+    """
+    global _shared_cache
+    cache = ChunkEmbeddingCache(path=path, max_bytes=max_bytes)
+    with _shared_cache_lock:
+        _shared_cache = cache
+    return cache
@@ -0,0 +1,244 @@
+from dataPrepraration.embedding.collectionVersions import CollectionVersions
+from dataPrepraration.embedding.embeddingArticle import PAPER_COLLECTION_SUFFIX, VECTOR_SIZE
+from qdrant_client.models import PointStruct
+from typing import Any, Dict, Iterator, Optional, Tuple
+import hashlib
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+import time
+import numpy as np
+
+SNAPSHOT_FORMAT = "research-rag-snapshot"
+SNAPSHOT_VERSION = 1
+
+MANIFEST_NAME = "manifest.json"
+
+# Snapshot part name -> collection name suffix
+PARTS = {'chunks': "", 'papers': PAPER_COLLECTION_SUFFIX}
+
+BATCH_SIZE = 1024
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _export_part(client, collection_name: str, directory: str) -> Dict[str, Any]:
+    """
+    Write all points of a collection as raw float32 vectors and JSONL id/payload lines.
+
+    Returns:
+        Dict: Number of points and vector dimension
+    """
+    os.makedirs(directory, exist_ok=True)
+    count, dim = 0, None
+    offset = None
+    with open(os.path.join(directory, 'vectors.f32'), 'wb') as vectors_file, \
+            open(os.path.join(directory, 'points.jsonl'), 'w', encoding='utf-8') as points_file:
+        if client.collection_exists(collection_name):
+            while True:
+                points, offset = client.scroll(
+                    collection_name=collection_name, limit=BATCH_SIZE, offset=offset,
+                    with_payload=True, with_vectors=True
+                )
+                if points:
+                    vectors = np.asarray([point.vector for point in points], dtype=np.float32)
+                    dim = vectors.shape[1]
+                    vectors_file.write(vectors.tobytes())
+                    for point in points:
+                        points_file.write(json.dumps({'id': point.id, 'payload': point.payload}, ensure_ascii=False) + "\n")
+                    count += len(points)
+                if offset is None:
+                    break
+    return {'points': count, 'dim': dim}
+
+
+def _ingested_papers(directory: str) -> list:
+    """List the papers of a snapshot from the exported paper collection"""
+    papers = []
+    with open(os.path.join(directory, 'points.jsonl'), 'r', encoding='utf-8') as f:
+        for line in f:
+            metadata = (json.loads(line)['payload'] or {}).get('metadata') or {}
+            papers.append({
+                key: metadata.get(key)
+                for key in ('article_name', 'arxiv_id', 'title', 'published', 'full_text_indexed')
+                if key in metadata
+            })
+    return papers
+
+
+def export_snapshot(client, collection_name: str, output_path: str,
+                    config: Optional[Dict[str, Any]] = None,
+                    embedding_model: str = "all-MiniLM-L6-v2") -> Dict[str, Any]:
+    """
+    Export a prepared collection and its paper collection to a compressed snapshot file.
+
+    The snapshot holds the vectors and payloads of both collections, a list
+    of the ingested papers, the configuration and a SHA-256 checksum of every
+    file, so another node can be provisioned without downloading, extracting
+    or embedding anything.
+
+    Args:
+        client: Qdrant client (or NumpyVectorClient)
+        collection_name (str): Collection (or alias) to export
+        output_path (str): Snapshot file to write (.tar.gz)
+        config (Optional[Dict]): Configuration stored with the snapshot
+        embedding_model (str): Model the vectors were computed with
+
+    Returns:
+        Dict: The snapshot manifest
+    """
+    if not client.collection_exists(collection_name):
+        raise ValueError(f"Collection {collection_name} does not exist")
+
+    work_dir = tempfile.mkdtemp(prefix='snapshot-')
+    try:
+        parts, files = {}, {}
+        for part, suffix in PARTS.items():
+            parts[part] = _export_part(client, f"{collection_name}{suffix}", os.path.join(work_dir, part))
+            for name in ('vectors.f32', 'points.jsonl'):
+                files[f"{part}/{name}"] = _sha256(os.path.join(work_dir, part, name))
+            print(f"Exported {parts[part]['points']} points of {collection_name}{suffix}")
+
+        manifest = {
+            'format': SNAPSHOT_FORMAT,
+            'version': SNAPSHOT_VERSION,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'collection': collection_name,
+            'embedding_model': embedding_model,
+            'vector_size': VECTOR_SIZE,
+            'distance': 'Cosine',
+            'parts': parts,
+            'files': files,
+            'papers': _ingested_papers(os.path.join(work_dir, 'papers')),
+            'config': config or {},
+        }
+        with open(os.path.join(work_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+        # The manifest goes first so it can be read without decompressing the vectors
+        directory = os.path.dirname(output_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with tarfile.open(f"{output_path}.part", 'w:gz') as tar:
+            tar.add(os.path.join(work_dir, MANIFEST_NAME), arcname=MANIFEST_NAME)
+            for name in files:
+                tar.add(os.path.join(work_dir, name), arcname=name)
+        os.replace(f"{output_path}.part", output_path)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"Snapshot of {collection_name} written to {output_path}")
+    return manifest
+
+
+def read_manifest(snapshot_path: str) -> Dict[str, Any]:
+    """Return the manifest of a snapshot file"""
+    with tarfile.open(snapshot_path, 'r:gz') as tar:
+        member = tar.next()
+        if member is None or member.name != MANIFEST_NAME:
+            raise ValueError(f"{snapshot_path} is not a collection snapshot (no manifest)")
+        manifest = json.load(tar.extractfile(member))
+    if manifest.get('format') != SNAPSHOT_FORMAT:
+        raise ValueError(f"{snapshot_path} is not a collection snapshot")
+    if manifest.get('version', 0) > SNAPSHOT_VERSION:
+        raise ValueError(f"Snapshot version {manifest['version']} is newer than supported ({SNAPSHOT_VERSION})")
+    return manifest
+
+
+def _extract_verified(snapshot_path: str, manifest: Dict[str, Any], work_dir: str) -> None:
+    """Extract the data files of a snapshot and check them against the manifest checksums"""
+    expected = manifest['files']
+    with tarfile.open(snapshot_path, 'r:gz') as tar:
+        for member in tar:
+            if member.name == MANIFEST_NAME:
+                continue
+            if member.name not in expected or not member.isfile():
+                raise ValueError(f"Unexpected entry in snapshot: {member.name}")
+            target = os.path.join(work_dir, member.name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with tar.extractfile(member) as source, open(target, 'wb') as f:
+                shutil.copyfileobj(source, f, 1 << 20)
+
+    for name, checksum in expected.items():
+        path = os.path.join(work_dir, name)
+        if not os.path.exists(path):
+            raise ValueError(f"Snapshot is missing {name}")
+        if _sha256(path) != checksum:
+            raise ValueError(f"Checksum mismatch for {name}: the snapshot is corrupted")
+
+
+def _read_part(directory: str, dim: int) -> Iterator[Tuple[list, np.ndarray, list]]:
+    """Yield (ids, vectors, payloads) batches of an extracted snapshot part"""
+    row_bytes = dim * 4
+    with open(os.path.join(directory, 'vectors.f32'), 'rb') as vectors_file, \
+            open(os.path.join(directory, 'points.jsonl'), 'r', encoding='utf-8') as points_file:
+        while True:
+            lines = [line for _, line in zip(range(BATCH_SIZE), points_file)]
+            if not lines:
+                return
+            vectors = np.frombuffer(vectors_file.read(row_bytes * len(lines)), dtype=np.float32)
+            if vectors.size != dim * len(lines):
+                raise ValueError(f"Snapshot part {directory} has fewer vectors than points")
+            records = [json.loads(line) for line in lines]
+            yield [record['id'] for record in records], vectors.reshape(len(lines), dim), \
+                [record['payload'] for record in records]
+
+
+def import_snapshot(client, snapshot_path: str, collection_name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Bulk-load a snapshot into a new version of a collection and activate it.
+
+    All checksums are verified before anything is written. The points are
+    loaded into a shadow version with indexing disabled, which is indexed
+    once and then switched in atomically (see CollectionVersions), so a
+    serving node keeps answering from its current data during the import.
+
+    Args:
+        client: Qdrant client (or NumpyVectorClient)
+        snapshot_path (str): Snapshot file written by export_snapshot
+        collection_name (Optional[str]): Collection alias to import into
+            (default: the collection the snapshot was taken from)
+
+    Returns:
+        Dict: The snapshot manifest
+    """
+    manifest = read_manifest(snapshot_path)
+    if manifest['vector_size'] != VECTOR_SIZE:
+        raise ValueError(f"Snapshot vectors have {manifest['vector_size']} dimensions, expected {VECTOR_SIZE}")
+    collection_name = collection_name or manifest['collection']
+
+    work_dir = tempfile.mkdtemp(prefix='snapshot-')
+    try:
+        _extract_verified(snapshot_path, manifest, work_dir)
+        print(f"Verified checksums of {len(manifest['files'])} snapshot files")
+
+        versions = CollectionVersions(client, collection_name)
+        shadow = versions.create_shadow(copy_active=False)
+        try:
+            for part, suffix in PARTS.items():
+                loaded = 0
+                for ids, vectors, payloads in _read_part(os.path.join(work_dir, part), manifest['vector_size']):
+                    client.upsert(collection_name=f"{shadow}{suffix}", points=[
+                        PointStruct(id=point_id, vector=vector.tolist(), payload=payload)
+                        for point_id, vector, payload in zip(ids, vectors, payloads)
+                    ], wait=True)
+                    loaded += len(ids)
+                if loaded != manifest['parts'][part]['points']:
+                    raise ValueError(f"Loaded {loaded} {part} points, the manifest lists {manifest['parts'][part]['points']}")
+                print(f"Loaded {loaded} points into {shadow}{suffix}")
+            versions.wait_until_indexed(shadow)
+        except Exception:
+            versions.drop(shadow)
+            raise
+        versions.activate(shadow, replace_collection=True)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return manifest
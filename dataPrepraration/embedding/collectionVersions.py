@@ -0,0 +1,206 @@
+from dataPrepraration.embedding.embeddingArticle import PAPER_COLLECTION_SUFFIX, PAYLOAD_INDEXES, VECTOR_SIZE
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    CollectionStatus, CreateAlias, CreateAliasOperation, DeleteAlias, DeleteAliasOperation,
+    Distance, OptimizersConfigDiff, PointStruct, VectorParams
+)
+from typing import List, Optional
+import time
+
+# Physical collections are named "<alias>__v<timestamp>"; the paper-level
+# collection of a version gets the usual suffix: "<alias>__v<timestamp>_papers"
+VERSION_SEPARATOR = "__v"
+
+# Indexing threshold restored after bulk loading a shadow version (Qdrant's default)
+DEFAULT_INDEXING_THRESHOLD = 20000
+
+
+class CollectionVersions:
+    """
+    Blue/green versions of a collection behind a Qdrant alias.
+
+    Retrieval always queries the alias name. A rebuild ingests into a new
+    shadow version with HNSW indexing disabled, builds the index once the
+    data is loaded and then repoints the alias (and the alias of the paper
+    collection) in one atomic update, so searches never hit a half-built
+    collection or compete with bulk indexing. Old versions stay available
+    for rollback until garbage collected.
+    """
+
+    def __init__(self, client: QdrantClient, alias: str):
+        """
+        Args:
+            client (QdrantClient): Qdrant client
+            alias (str): Collection name used by retrieval
+        """
+        self.client = client
+        self.alias = alias
+        self.paper_alias = f"{alias}{PAPER_COLLECTION_SUFFIX}"
+
+    def _aliases(self) -> dict:
+        """Return {alias: collection} for all aliases on the server"""
+        return {alias.alias_name: alias.collection_name for alias in self.client.get_aliases().aliases}
+
+    def active_version(self) -> Optional[str]:
+        """Return the collection the alias currently points to, or None"""
+        return self._aliases().get(self.alias)
+
+    def versions(self) -> List[str]:
+        """Return all versions of the collection, oldest first"""
+        prefix = f"{self.alias}{VERSION_SEPARATOR}"
+        names = [collection.name for collection in self.client.get_collections().collections]
+        return sorted(
+            name for name in names
+            if name.startswith(prefix) and not name.endswith(PAPER_COLLECTION_SUFFIX)
+        )
+
+    def _create_collection(self, name: str) -> None:
+        """Create an empty collection with bulk-load settings (no HNSW indexing yet)"""
+        self.client.create_collection(
+            collection_name=name,
+            vectors_config=VectorParams(size=VECTOR_SIZE, distance=Distance.COSINE),
+            optimizers_config=OptimizersConfigDiff(indexing_threshold=0)
+        )
+        for field_name, field_schema in PAYLOAD_INDEXES.items():
+            self.client.create_payload_index(collection_name=name, field_name=field_name, field_schema=field_schema)
+
+    def create_shadow(self, copy_active: bool = True) -> str:
+        """
+        Create a new, not yet active version.
+
+        Args:
+            copy_active (bool): Start from a copy of the active version's points
+                (vectors included, nothing is re-embedded) so the rebuild adds to it
+
+        Returns:
+            str: Name of the shadow collection to ingest into
+        """
+        version = f"{self.alias}{VERSION_SEPARATOR}{time.strftime('%Y%m%d%H%M%S')}"
+        while self.client.collection_exists(version):
+            time.sleep(1)
+            version = f"{self.alias}{VERSION_SEPARATOR}{time.strftime('%Y%m%d%H%M%S')}"
+
+        self._create_collection(version)
+        self._create_collection(f"{version}{PAPER_COLLECTION_SUFFIX}")
+
+        # A plain collection with the alias name (created before versioning) is copied too
+        source = self.active_version() or (self.alias if self.client.collection_exists(self.alias) else None)
+        if copy_active and source:
+            self._copy_points(source, version)
+            self._copy_points(f"{source}{PAPER_COLLECTION_SUFFIX}", f"{version}{PAPER_COLLECTION_SUFFIX}")
+        print(f"Created shadow collection {version}")
+        return version
+
+    def _copy_points(self, source: str, target: str, batch_size: int = 256) -> None:
+        """Copy all points with their vectors from one collection to another"""
+        if not self.client.collection_exists(source):
+            return
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=source, limit=batch_size, offset=offset, with_payload=True, with_vectors=True
+            )
+            if points:
+                self.client.upsert(collection_name=target, points=[
+                    PointStruct(id=point.id, vector=point.vector, payload=point.payload) for point in points
+                ], wait=True)
+            if offset is None:
+                return
+
+    def wait_until_indexed(self, version: str, timeout: float = 1800, poll_interval: float = 2.0) -> None:
+        """
+        Enable HNSW indexing on a shadow version and wait until it is built.
+
+        Args:
+            version (str): Shadow collection name
+            timeout (float): Seconds to wait before giving up
+            poll_interval (float): Seconds between status checks
+        """
+        for name in (version, f"{version}{PAPER_COLLECTION_SUFFIX}"):
+            self.client.update_collection(
+                collection_name=name,
+                optimizers_config=OptimizersConfigDiff(indexing_threshold=DEFAULT_INDEXING_THRESHOLD)
+            )
+
+        deadline = time.monotonic() + timeout
+        for name in (version, f"{version}{PAPER_COLLECTION_SUFFIX}"):
+            while self.client.get_collection(name).status != CollectionStatus.GREEN:
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Indexing of {name} did not finish within {timeout} seconds")
+                time.sleep(poll_interval)
+
+    def activate(self, version: str, replace_collection: bool = False) -> None:
+        """
+        Atomically repoint the alias and the paper alias to a version.
+
+        Args:
+            version (str): Collection to activate
+            replace_collection (bool): If a plain (non-alias) collection with the alias
+                name exists from before versioning, delete it first. Searches fail
+                during the short gap until the alias is created.
+        """
+        if not self.client.collection_exists(version):
+            raise ValueError(f"Collection {version} does not exist")
+
+        aliases = self._aliases()
+        for name in (self.alias, self.paper_alias):
+            if name not in aliases and self.client.collection_exists(name):
+                if not replace_collection:
+                    raise ValueError(
+                        f"Collection {name} is not an alias yet. Activate with replace_collection=True "
+                        f"to replace it by the versioned collection."
+                    )
+                print(f"Replacing collection {name} by alias")
+                self.client.delete_collection(name)
+
+        operations = []
+        for alias_name, collection_name in ((self.alias, version),
+                                            (self.paper_alias, f"{version}{PAPER_COLLECTION_SUFFIX}")):
+            if alias_name in aliases:
+                operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias_name)))
+            operations.append(CreateAliasOperation(
+                create_alias=CreateAlias(collection_name=collection_name, alias_name=alias_name)
+            ))
+        self.client.update_collection_aliases(change_aliases_operations=operations)
+        print(f"Alias {self.alias} now points to {version}")
+
+    def rollback(self) -> str:
+        """
+        Repoint the alias to the version preceding the active one.
+
+        Returns:
+            str: Version that became active
+        """
+        versions = self.versions()
+        active = self.active_version()
+        if active not in versions or versions.index(active) == 0:
+            raise ValueError(f"No previous version of {self.alias} to roll back to")
+        previous = versions[versions.index(active) - 1]
+        self.activate(previous)
+        return previous
+
+    def garbage_collect(self, keep: int = 2) -> List[str]:
+        """
+        Delete old versions, keeping the newest ones and always the active one.
+
+        Args:
+            keep (int): Number of newest versions to keep
+
+        Returns:
+            List[str]: Deleted versions
+        """
+        active = self.active_version()
+        versions = self.versions()
+        stale = [version for version in versions[:max(len(versions) - keep, 0)] if version != active]
+        for version in stale:
+            self.drop(version)
+        return stale
+
+    def drop(self, version: str) -> None:
+        """Delete an inactive version together with its paper collection"""
+        if version == self.active_version():
+            raise ValueError(f"Cannot delete the active version {version}")
+        for name in (version, f"{version}{PAPER_COLLECTION_SUFFIX}"):
+            if self.client.collection_exists(name):
+                self.client.delete_collection(name)
+        print(f"Deleted collection version {version}")
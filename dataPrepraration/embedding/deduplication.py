@@ -0,0 +1,228 @@
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import json
+import os
+import re
+import numpy as np
+
+# Universal hashing modulo a Mersenne prime; with 31-bit values the products
+# a * x stay below 2**62 and fit numpy's uint64
+_PRIME = np.uint64((1 << 31) - 1)
+
+DEFAULT_REPORT_PATH = os.path.join('cache', 'dedup_report.jsonl')
+
+_TOKEN_RE = re.compile(r'\w+')
+_DIGITS_RE = re.compile(r'\d+')
+
+
+def _tokens(text: str) -> List[str]:
+    """Lowercased words with digit runs collapsed, so headers differing only in page numbers match"""
+    return _TOKEN_RE.findall(_DIGITS_RE.sub('0', text.lower()))
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _lsh_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    Pick (bands, rows per band) for a similarity threshold.
+
+    Two signatures become candidates with probability 1 - (1 - s**r)**b,
+    which rises steeply around s = (1/b)**(1/r). The steepest point is kept
+    at or just below the threshold, so true duplicates are rarely missed;
+    candidates are verified against the threshold afterwards.
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        if (1 / bands) ** (1 / rows) <= threshold:
+            best = (bands, rows)
+    return best
+
+
+class NearDuplicateIndex:
+    """
+    MinHash/LSH index of texts for near-duplicate lookups.
+
+    Texts are shingled into overlapping word n-grams; the Jaccard similarity
+    of two shingle sets is estimated from MinHash signatures, and LSH banding
+    makes a lookup touch only the few entries sharing a band with the query.
+    """
+
+    def __init__(self, threshold: float = 0.85, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        """
+        Args:
+            threshold (float): Estimated Jaccard similarity at which texts count as duplicates
+            num_perm (int): MinHash permutations (signature length)
+            shingle_size (int): Words per shingle
+            seed (int): Seed of the hash permutations
+        """
+        if not 0 < threshold <= 1:
+            raise ValueError(f"Similarity threshold must be in (0, 1], got {threshold}")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = _lsh_bands(threshold, num_perm)
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(_PRIME), size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, int(_PRIME), size=(num_perm, 1), dtype=np.uint64)
+
+        self._exact: Dict[str, Any] = {}
+        self._buckets: Dict[Tuple[int, bytes], List[Any]] = {}
+        self._signatures: Dict[Any, np.ndarray] = {}
+
+    def _shingles(self, tokens: List[str]) -> List[str]:
+        if len(tokens) <= self.shingle_size:
+            return [' '.join(tokens)]
+        return [' '.join(tokens[i:i + self.shingle_size]) for i in range(len(tokens) - self.shingle_size + 1)]
+
+    def signature(self, tokens: List[str]) -> np.ndarray:
+        """MinHash signature of a token list"""
+        hashes = np.array([_hash64(shingle) for shingle in set(self._shingles(tokens))], dtype=np.uint64) % _PRIME
+        return ((self._a * hashes[np.newaxis, :] + self._b) % _PRIME).min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    def find(self, text: str) -> Tuple[Optional[Any], float, Optional[np.ndarray], str]:
+        """
+        Look up the most similar indexed text above the threshold.
+
+        Returns:
+            Tuple: (key of the duplicate or None, estimated similarity, signature, exact-match digest)
+        """
+        tokens = _tokens(text)
+        digest = hashlib.blake2b(' '.join(tokens).encode('utf-8'), digest_size=16).hexdigest()
+        if digest in self._exact:
+            return self._exact[digest], 1.0, None, digest
+        if not tokens:
+            return None, 0.0, None, digest
+
+        signature = self.signature(tokens)
+        best_key, best_similarity = None, 0.0
+        seen = set()
+        for band_key in self._band_keys(signature):
+            for key in self._buckets.get(band_key, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                similarity = float(np.mean(self._signatures[key] == signature))
+                if similarity >= self.threshold and similarity > best_similarity:
+                    best_key, best_similarity = key, similarity
+        return best_key, best_similarity, signature, digest
+
+    def add(self, key: Any, signature: Optional[np.ndarray], digest: str) -> None:
+        """Index a text under key using the signature and digest returned by find()"""
+        self._exact.setdefault(digest, key)
+        if signature is None:
+            return
+        self._signatures[key] = signature
+        for band_key in self._band_keys(signature):
+            self._buckets.setdefault(band_key, []).append(key)
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+
+class ChunkDeduplicator:
+    """
+    Drop near-duplicate chunks and flag near-duplicate papers before embedding.
+
+    One instance covers an ingestion run: boilerplate repeated in every
+    paper (headers, footers, licence notes) and chunks of other versions or
+    cross-listings of the same paper are only embedded once. Everything
+    skipped is recorded with the entry it duplicates.
+    """
+
+    def __init__(self, threshold: float = 0.85, paper_threshold: float = 0.9,
+                 num_perm: int = 128, shingle_size: int = 5):
+        """
+        Args:
+            threshold (float): Similarity at which a chunk is a duplicate of an earlier one
+            paper_threshold (float): Similarity of title and abstract at which a paper is
+                flagged as a duplicate of an earlier one
+            num_perm (int): MinHash permutations
+            shingle_size (int): Words per shingle
+        """
+        self.chunk_index = NearDuplicateIndex(threshold, num_perm, shingle_size)
+        self.paper_index = NearDuplicateIndex(paper_threshold, num_perm, shingle_size, seed=2)
+        self.kept_chunks = 0
+        self.skipped_chunks: List[Dict[str, Any]] = []
+        self.duplicate_papers: List[Dict[str, Any]] = []
+
+    def filter_chunks(self, chunks: List[str], article_name: str) -> List[int]:
+        """
+        Return the positions of the chunks to embed, recording the skipped ones.
+
+        Args:
+            chunks (List[str]): Chunks of one article, in order
+            article_name (str): Article the chunks belong to
+
+        Returns:
+            List[int]: Positions of chunks that are not near-duplicates of earlier chunks
+        """
+        kept = []
+        for position, chunk in enumerate(chunks):
+            duplicate_of, similarity, signature, digest = self.chunk_index.find(chunk)
+            if duplicate_of is not None:
+                self.skipped_chunks.append({
+                    'article_name': article_name,
+                    'chunk': position,
+                    'duplicate_of': {'article_name': duplicate_of[0], 'chunk': duplicate_of[1]},
+                    'similarity': round(similarity, 3),
+                    'text': chunk[:200],
+                })
+                continue
+            self.chunk_index.add((article_name, position), signature, digest)
+            kept.append(position)
+        self.kept_chunks += len(kept)
+        return kept
+
+    def check_paper(self, article_name: str, title: str, summary: str) -> Optional[str]:
+        """
+        Flag a paper whose title and abstract nearly match an earlier paper's.
+
+        Returns:
+            Optional[str]: Article name of the earlier paper, or None
+        """
+        duplicate_of, similarity, signature, digest = self.paper_index.find(f"{title}\n{summary}")
+        if duplicate_of is not None and duplicate_of != article_name:
+            self.duplicate_papers.append({
+                'article_name': article_name,
+                'title': title,
+                'duplicate_of': duplicate_of,
+                'similarity': round(similarity, 3),
+            })
+            return duplicate_of
+        self.paper_index.add(article_name, signature, digest)
+        return None
+
+    def report(self) -> Dict[str, Any]:
+        """Return a summary of what was kept and skipped"""
+        total = self.kept_chunks + len(self.skipped_chunks)
+        return {
+            'chunks_kept': self.kept_chunks,
+            'chunks_skipped': len(self.skipped_chunks),
+            'skipped_fraction': len(self.skipped_chunks) / total if total else 0.0,
+            'duplicate_papers': len(self.duplicate_papers),
+        }
+
+    def save_report(self, path: str, run_info: Optional[Dict[str, Any]] = None) -> None:
+        """Append the skipped chunks and duplicate papers of this run to a JSONL file"""
+        if not self.skipped_chunks and not self.duplicate_papers:
+            return
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        try:
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({
+                    **(run_info or {}),
+                    **self.report(),
+                    'duplicate_paper_list': self.duplicate_papers,
+                    'skipped_chunk_list': self.skipped_chunks,
+                }, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"Could not write deduplication report to {path}: {e}")
@@ -1,75 +1,289 @@
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_community.vectorstores import Qdrant
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams
+from qdrant_client.models import Distance, VectorParams, PayloadSchemaType
 from langchain.schema import Document
-from typing import List, Optional
+from dataPrepraration.embedding.textSplitter import SentenceTokenSplitter
+from dataPrepraration.embedding.sharedModels import get_embeddings
+from dataPrepraration.embedding.chunkEmbeddingCache import CachedEmbeddings, ChunkEmbeddingCache, get_chunk_embedding_cache
+from dataPrepraration.embedding.deduplication import ChunkDeduplicator
+from typing import Any, Dict, List, Optional, Tuple
+import uuid
+
+# Paper metadata fields that retrieval can filter on inside the vector search
+PAYLOAD_INDEXES = {
+    'metadata.year': PayloadSchemaType.INTEGER,
+    'metadata.categories': PayloadSchemaType.KEYWORD,
+    'metadata.authors': PayloadSchemaType.KEYWORD,
+    'metadata.arxiv_id': PayloadSchemaType.KEYWORD,
+    'metadata.article_name': PayloadSchemaType.KEYWORD,
+}
+
+# Suffix of the paper-level collection holding one abstract embedding per paper
+PAPER_COLLECTION_SUFFIX = "_papers"
+
+# Dimension of all-MiniLM-L6-v2 embeddings
+VECTOR_SIZE = 384
+
+# 'qdrant' stores vectors on a Qdrant server, 'numpy' in-process (see numpyVectorStore)
+VECTOR_BACKENDS = ('qdrant', 'numpy')
+
+# Namespace of the deterministic point ids (see point_id)
+POINT_ID_NAMESPACE = uuid.UUID('6f1c1b52-3d0e-4d7a-9a57-2f4f0c6b8e41')
+
+def point_id(article_name: str, number: int, kind: str = 'chunk') -> str:
+    """
+    Return the deterministic id of a point, so ingesting a paper again overwrites its points.
+
+    Args:
+        article_name (str): Paper the point belongs to
+        number (int): Position of the chunk in the paper's split text
+        kind (str): 'chunk' (full text), 'abstract' (abstracts-mode chunk) or 'paper' (paper entry)
+
+    Returns:
+        str: UUID accepted as point id by Qdrant and the numpy store
+    """
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{kind}:{article_name}:{number}"))
+
+def create_vector_client(vector_backend: str = 'qdrant', host: str = "localhost", port: int = 6333) -> QdrantClient:
+    """
+    Return the vector store client of a backend.
+
+    Args:
+        vector_backend (str): 'qdrant' for the Qdrant server at host:port, 'numpy' for the
+            process-wide in-process store
+        host (str): Qdrant host
+        port (int): Qdrant port
+
+    Returns:
+        QdrantClient: Qdrant client, or a NumpyVectorClient with the same interface
+    """
+    if vector_backend not in VECTOR_BACKENDS:
+        raise ValueError(f"Unknown vector backend: {vector_backend}. Use one of {', '.join(VECTOR_BACKENDS)}.")
+    if vector_backend == 'numpy':
+        from dataPrepraration.embedding.numpyVectorStore import get_numpy_client
+        return get_numpy_client()
+    return QdrantClient(host=host, port=port)
 
 class EmbeddingArticle:
     def __init__(self,
                  model_name: str = "all-MiniLM-L6-v2",
-                 device: str = 'cuda',
+                 device: Optional[str] = None,
                  host: str = "localhost", 
                  port: int = 6333,
                  collection_name: str = "scientific_papers",
                  chunk_size: int = 512,
                  chunk_overlap: int = 120,
-                 articles: List[str] = []):
-        
+                 articles: List[str] = [],
+                 text_splitter: str = 'native',
+                 chunk_tokens: Optional[int] = None,
+                 chunk_overlap_tokens: int = 50,
+                 embeddings: Optional[HuggingFaceEmbeddings] = None,
+                 vector_backend: str = 'qdrant',
+                 chunk_cache: Optional[ChunkEmbeddingCache] = None):
+        """
+        Initialize embeddings, the Qdrant collection and the text splitter.
+
+        Args:
+            text_splitter (str): 'native' for the sentence- and token-aware splitter,
+                'recursive' for LangChain's RecursiveCharacterTextSplitter
+            chunk_size (int): Characters per chunk ('recursive' splitter only)
+            chunk_overlap (int): Overlapping characters ('recursive' splitter only)
+            chunk_tokens (Optional[int]): Tokens per chunk ('native' splitter only,
+                default: the embedding model's window minus special tokens)
+            chunk_overlap_tokens (int): Overlapping tokens ('native' splitter only)
+            embeddings (Optional[HuggingFaceEmbeddings]): Already loaded model_name embeddings
+                (default: the process-wide shared model, loaded on first use)
+            vector_backend (str): 'qdrant' for the Qdrant server at host:port, 'numpy' for the
+                in-process store (host and port are ignored)
+            chunk_cache (Optional[ChunkEmbeddingCache]): Cache consulted before encoding chunks
+                (default: the process-wide on-disk cache)
+        """
         # Initialize embeddings
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name=model_name,
-            model_kwargs={'device': device}
-        )
+        self.model_name = model_name
+        self.embeddings = embeddings or get_embeddings(model_name, device)
+        # Chunks are encoded through the content-addressed cache, queries are not
+        self.chunk_cache = chunk_cache or get_chunk_embedding_cache()
+        self.document_embeddings = CachedEmbeddings(self.embeddings, model_name, self.chunk_cache)
         
-        # Initialize Qdrant client
-        self.client = QdrantClient(host=host, port=port)
+        # Initialize vector store client
+        self.client = create_vector_client(vector_backend, host, port)
+        self.vector_backend = vector_backend
         self.collection_name = collection_name
+        self.paper_collection_name = f"{collection_name}{PAPER_COLLECTION_SUFFIX}"
+        self._paper_vectorstore = None
         
         # Create collection if it doesn't exist
         self._create_collection_if_not_exists()
         
         # Initialize text splitter
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap
-        )
+        if text_splitter == 'native':
+            self.text_splitter = self._create_native_splitter(chunk_tokens, chunk_overlap_tokens)
+        elif text_splitter == 'recursive':
+            from langchain.text_splitter import RecursiveCharacterTextSplitter
+            self.text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap
+            )
+        else:
+            raise ValueError(f"Unknown text splitter: {text_splitter}. Use 'native' or 'recursive'.")
         
         # Initialize vectorstore
-        self.vectorstore = Qdrant(
-            client=self.client,
-            collection_name=collection_name,
-            embeddings=self.embeddings
-        )
+        self.vectorstore = self._create_vectorstore(collection_name)
     
         self.articles = articles
 
+    def _create_vectorstore(self, collection_name: str) -> Qdrant:
+        """Create the LangChain-style vectorstore of a collection for the configured backend"""
+        if self.vector_backend == 'numpy':
+            from dataPrepraration.embedding.numpyVectorStore import NumpyVectorStore
+            return NumpyVectorStore(client=self.client, collection_name=collection_name,
+                                    embeddings=self.document_embeddings)
+        return Qdrant(client=self.client, collection_name=collection_name, embeddings=self.document_embeddings)
+
     def embedding(self) -> HuggingFaceEmbeddings:
         """Return the embeddings model"""
         return self.embeddings
     
-    def _create_collection_if_not_exists(self):
-        """Create Qdrant collection if it doesn't exist"""
+    def _create_collection_if_not_exists(self, collection_name: Optional[str] = None):
+        """Create Qdrant collection if it doesn't exist and make sure metadata fields are indexed"""
+        collection_name = collection_name or self.collection_name
         try:
             # Check if collection exists
-            self.client.get_collection(self.collection_name)
+            collection_info = self.client.get_collection(collection_name)
         except Exception:
-            vector_size = 384
             self.client.create_collection(
-                collection_name=self.collection_name,
-                vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE)
+                collection_name=collection_name,
+                vectors_config=VectorParams(size=VECTOR_SIZE, distance=Distance.COSINE)
             )
+            self._create_payload_indexes(PAYLOAD_INDEXES, collection_name)
+            return
+        
+        # Collections created before metadata indexing existed
+        indexed_fields = set((collection_info.payload_schema or {}).keys())
+        missing = {field: schema for field, schema in PAYLOAD_INDEXES.items() if field not in indexed_fields}
+        if missing:
+            self._create_payload_indexes(missing, collection_name)
+    
+    def _create_payload_indexes(self, indexes: Dict[str, PayloadSchemaType], collection_name: Optional[str] = None):
+        """Index paper metadata fields so filtered searches run inside Qdrant"""
+        for field_name, field_schema in indexes.items():
+            try:
+                self.client.create_payload_index(
+                    collection_name=collection_name or self.collection_name,
+                    field_name=field_name,
+                    field_schema=field_schema
+                )
+            except Exception as e:
+                print(f"Could not create payload index on {field_name}: {e}")
+    
+    def _create_native_splitter(self, chunk_tokens: Optional[int], chunk_overlap_tokens: int) -> SentenceTokenSplitter:
+        """Create a splitter sized to what the embedding model can actually see"""
+        model = getattr(self.embeddings, 'client', None)
+        tokenizer = getattr(model, 'tokenizer', None)
+        if not getattr(tokenizer, 'is_fast', False):
+            tokenizer = None
+        
+        if chunk_tokens is None:
+            # [CLS] and [SEP] take two positions of the model window
+            chunk_tokens = (getattr(model, 'max_seq_length', None) or 256) - 2
+        
+        return SentenceTokenSplitter(
+            tokenizer=tokenizer,
+            max_tokens=chunk_tokens,
+            overlap_tokens=min(chunk_overlap_tokens, chunk_tokens // 2)
+        )
     
     def _split_text(self, text: str) -> List[str]:
         """Split text into chunks"""
         return self.text_splitter.split_text(text)
     
-    def _add_documents(self, documents: List[str], article_name: str) -> List[str]:
-        """Add documents to the vectorstore"""
+    def _split_text_with_offsets(self, text: str) -> List[Tuple[str, int, int]]:
+        """Split text into chunks together with their (start, end) character offsets"""
+        if isinstance(self.text_splitter, SentenceTokenSplitter):
+            return self.text_splitter.split_text_with_offsets(text)
+        
+        # LangChain splitters return copies; locate them in the original text
+        chunks = []
+        search_from = 0
+        for chunk in self.text_splitter.split_text(text):
+            start = text.find(chunk, search_from)
+            if start == -1:
+                start = text.find(chunk)
+            chunks.append((chunk, start, start + len(chunk)))
+            search_from = max(start, 0) + 1
+        return chunks
+    
+    def _add_documents(self, documents: List[str], article_name: str,
+                       offsets: Optional[List[Tuple[int, int]]] = None,
+                       sections: Optional[List[Optional[str]]] = None,
+                       paper_metadata: Optional[Dict[str, Any]] = None,
+                       deduplicator: Optional[ChunkDeduplicator] = None,
+                       kind: str = 'chunk') -> List[str]:
+        """
+        Add documents to the vectorstore, optionally with offsets, section names and paper metadata.
+        
+        With a deduplicator, near-duplicates of chunks it has already seen are
+        dropped before they are embedded. Point ids are derived from the
+        article name, kind and chunk position (see point_id).
+        """
+        ids = [point_id(article_name, i, kind) for i in range(len(documents))]
+        if deduplicator is not None:
+            kept = deduplicator.filter_chunks(documents, article_name)
+            if len(kept) < len(documents):
+                documents = [documents[i] for i in kept]
+                ids = [ids[i] for i in kept]
+                offsets = [offsets[i] for i in kept] if offsets is not None else None
+                sections = [sections[i] for i in kept] if sections is not None else None
+            if not documents:
+                return []
+        
         # Convert strings to Document objects
-        doc_objects = [Document(page_content=doc, metadata={'article_name': article_name}) for doc in documents]
-        return self.vectorstore.add_documents(doc_objects)
+        doc_objects = []
+        for i, doc in enumerate(documents):
+            metadata = {**(paper_metadata or {}), 'article_name': article_name}
+            if offsets is not None:
+                metadata['char_start'], metadata['char_end'] = offsets[i]
+            if sections is not None and sections[i]:
+                metadata['section'] = sections[i]
+            doc_objects.append(Document(page_content=doc, metadata=metadata))
+        return self.vectorstore.add_documents(doc_objects, ids=ids)
+    
+    @property
+    def paper_vectorstore(self) -> Qdrant:
+        """Vectorstore of the paper-level collection, created on first use"""
+        if self._paper_vectorstore is None:
+            self._create_collection_if_not_exists(self.paper_collection_name)
+            self._paper_vectorstore = self._create_vectorstore(self.paper_collection_name)
+        return self._paper_vectorstore
+    
+    def add_papers(self, papers: List[Dict[str, Any]]) -> List[str]:
+        """
+        Add one abstract-level entry per paper to the paper collection.
+        
+        Retrieval searches this much smaller collection first and restricts
+        the chunk search to the best matching papers.
+        
+        Args:
+            papers (List[Dict]): Papers with 'article_name', 'title', 'summary'
+                and optional 'metadata' (payload shared with the paper's chunks)
+        
+        Returns:
+            List[str]: Ids of the added points
+        """
+        papers = [paper for paper in papers if paper.get('title') or paper.get('summary')]
+        doc_objects = [
+            Document(
+                page_content=f"{paper.get('title', '')}\n\n{paper.get('summary', '')}".strip(),
+                metadata={**(paper.get('metadata') or {}), 'article_name': paper['article_name']}
+            )
+            for paper in papers
+        ]
+        if not doc_objects:
+            return []
+        return self.paper_vectorstore.add_documents(
+            doc_objects, ids=[point_id(paper['article_name'], 0, 'paper') for paper in papers]
+        )
     
     def embed_articles(self) -> None:
         """Embed articles and add them to the vectorstore"""
@@ -120,6 +334,13 @@ class EmbeddingArticle:
             print(f"Collection '{self.collection_name}' deleted successfully.")
         except Exception as e:
             print(f"Error deleting collection: {e}")
+        
+        try:
+            if self.client.collection_exists(self.paper_collection_name):
+                self.client.delete_collection(self.paper_collection_name)
+                print(f"Collection '{self.paper_collection_name}' deleted successfully.")
+        except Exception as e:
+            print(f"Error deleting paper collection: {e}")
             
 if __name__ == "__main__":
     # Example usage
@@ -0,0 +1,596 @@
+from langchain.schema import Document
+from qdrant_client.models import (
+    AliasDescription, CollectionDescription, CollectionsAliasesResponse, CollectionsResponse,
+    CollectionStatus, CountResult, CreateAliasOperation, DeleteAliasOperation, Distance,
+    FieldCondition, Filter, MatchAny, MatchValue, PointStruct, Range, Record, RenameAliasOperation,
+    ScoredPoint, SearchRequest, VectorParams
+)
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+import contextlib
+import fcntl
+import json
+import os
+import shutil
+import threading
+import uuid
+import numpy as np
+
+DEFAULT_STORE_PATH = "vectorstore"
+
+# float16 halves memory and disk but each scan converts the matrix to float32,
+# which makes searches several times slower than with float32 storage
+STORE_DTYPES = {'float16': np.float16, 'float32': np.float32}
+
+# Rows scored per matrix product, bounds the float32 copy of a float16 matrix
+SCORE_BLOCK_ROWS = 65536
+
+_META_FILE = "meta.json"
+_VECTORS_FILE = "vectors.bin"
+_PAYLOADS_FILE = "payloads.jsonl"
+_ALIASES_FILE = "aliases.json"
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length so cosine similarity is a dot product"""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1)
+
+
+def _payload_value(payload: Dict[str, Any], key: str) -> Any:
+    """Return the value of a dotted payload key such as 'metadata.year'"""
+    value = payload
+    for part in key.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+class _Collection:
+    """
+    One collection on disk.
+
+    vectors.bin is a memory-mapped (capacity x dim) matrix of unit vectors,
+    payloads.jsonl an append-only log of point payloads and payload updates.
+    Writes take an exclusive file lock; every access first replays what
+    other processes appended to the log, so forked web workers see new points.
+    Within a process, readers take a snapshot (mapped matrix, row count and
+    matching rows) under the collection lock and score it without holding
+    the lock: writes only append rows or map a grown file, which leaves an
+    earlier mapping valid.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, _META_FILE), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        self.dim = meta['dim']
+        self.dtype = STORE_DTYPES[meta['dtype']]
+
+        self.ids: List[Union[str, int]] = []
+        self.id_to_row: Dict[Union[str, int], int] = {}
+        self.payloads: List[Dict[str, Any]] = []
+        self._log_offset = 0
+        self._vectors: Optional[np.memmap] = None
+        self._capacity = 0
+        self._columns: Dict[Tuple[str, str], Any] = {}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def create(path: str, dim: int, dtype: str) -> None:
+        """Create the files of an empty collection"""
+        os.makedirs(path, exist_ok=True)
+        open(os.path.join(path, _VECTORS_FILE), 'wb').close()
+        open(os.path.join(path, _PAYLOADS_FILE), 'w').close()
+        with open(os.path.join(path, _META_FILE), 'w', encoding='utf-8') as f:
+            json.dump({'dim': dim, 'dtype': dtype, 'distance': 'Cosine'}, f)
+
+    @property
+    def count(self) -> int:
+        return len(self.ids)
+
+    @contextlib.contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        with open(os.path.join(self.path, '.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _map_vectors(self) -> None:
+        """(Re)map the vector file after it grew"""
+        row_bytes = self.dim * np.dtype(self.dtype).itemsize
+        capacity = os.path.getsize(os.path.join(self.path, _VECTORS_FILE)) // row_bytes
+        if capacity == self._capacity:
+            return
+        self._vectors = np.memmap(os.path.join(self.path, _VECTORS_FILE), dtype=self.dtype,
+                                  mode='r+', shape=(capacity, self.dim)) if capacity else None
+        self._capacity = capacity
+
+    def _apply(self, record: Dict[str, Any]) -> None:
+        """Apply one payload log record to the in-memory table"""
+        if 'set' in record:
+            for row in record['rows']:
+                target = self.payloads[row]
+                if record.get('key'):
+                    target = target.setdefault(record['key'], {})
+                target.update(record['set'])
+            return
+
+        row = record['row']
+        if row == len(self.ids):
+            self.ids.append(record['id'])
+            self.payloads.append(record['payload'])
+        else:
+            self.payloads[row] = record['payload']
+        self.id_to_row[record['id']] = row
+
+    def refresh(self) -> None:
+        """Replay log records appended since the last access (by this or another process)"""
+        with self._lock:
+            log_path = os.path.join(self.path, _PAYLOADS_FILE)
+            if os.path.getsize(log_path) == self._log_offset:
+                return
+            with open(log_path, 'r', encoding='utf-8') as f:
+                f.seek(self._log_offset)
+                for line in f:
+                    # A line without newline is still being written by another process
+                    if not line.endswith('\n'):
+                        break
+                    self._apply(json.loads(line))
+                    self._log_offset += len(line.encode('utf-8'))
+            self._columns.clear()
+            self._map_vectors()
+
+    def _append_records(self, records: List[Dict[str, Any]]) -> None:
+        """Append records to the log and apply them; the caller holds the file lock"""
+        with open(os.path.join(self.path, _PAYLOADS_FILE), 'a', encoding='utf-8') as f:
+            data = ''.join(json.dumps(record) + '\n' for record in records)
+            f.write(data)
+        for record in records:
+            self._apply(record)
+        self._log_offset += len(data.encode('utf-8'))
+        self._columns.clear()
+
+    def _reserve(self, rows: int) -> None:
+        """Grow the vector file to hold at least rows vectors (doubling)"""
+        if rows <= self._capacity:
+            return
+        capacity = max(rows, 2 * self._capacity, 1024)
+        if self._vectors is not None:
+            self._vectors.flush()
+        with open(os.path.join(self.path, _VECTORS_FILE), 'r+b') as f:
+            f.truncate(capacity * self.dim * np.dtype(self.dtype).itemsize)
+        self._map_vectors()
+
+    def upsert(self, ids: Sequence[Union[str, int]], vectors: np.ndarray, payloads: Sequence[Dict[str, Any]]) -> None:
+        with self._lock, self._file_lock():
+            self.refresh()
+            self._reserve(self.count + len(ids))
+
+            # Vectors are written before their log records, so a reader that
+            # sees a row in the log always finds its vector
+            records = []
+            next_row = self.count
+            pending = {}
+            for point_id, payload in zip(ids, payloads):
+                row = self.id_to_row.get(point_id, pending.get(point_id))
+                if row is None:
+                    row = pending[point_id] = next_row
+                    next_row += 1
+                records.append({'row': row, 'id': point_id, 'payload': payload or {}})
+            rows = [record['row'] for record in records]
+            self._vectors[rows] = _normalize(np.asarray(vectors, dtype=np.float32)).astype(self.dtype)
+            self._vectors.flush()
+            self._append_records(records)
+
+    def set_payload(self, rows: List[int], payload: Dict[str, Any], key: Optional[str]) -> None:
+        with self._lock, self._file_lock():
+            self.refresh()
+            if rows:
+                self._append_records([{'rows': rows, 'set': payload, 'key': key}])
+
+    def vector(self, row: int) -> List[float]:
+        with self._lock:
+            vectors = self._vectors
+        return vectors[row].astype(np.float32).tolist()
+
+    def _numeric_column(self, key: str) -> np.ndarray:
+        """Float values of a payload field per row (NaN where missing), cached until the next write"""
+        if ('num', key) not in self._columns:
+            values = [_payload_value(payload, key) for payload in self.payloads]
+            self._columns[('num', key)] = np.array(
+                [value if isinstance(value, (int, float)) and not isinstance(value, bool) else np.nan
+                 for value in values], dtype=np.float64
+            )
+        return self._columns[('num', key)]
+
+    def _inverted_column(self, key: str) -> Dict[Any, np.ndarray]:
+        """{value: rows} of a payload field (list values index every element), cached until the next write"""
+        if ('inv', key) not in self._columns:
+            index: Dict[Any, List[int]] = {}
+            for row, payload in enumerate(self.payloads):
+                value = _payload_value(payload, key)
+                for item in (value if isinstance(value, list) else [value]):
+                    if isinstance(item, (str, int, bool)):
+                        index.setdefault(item, []).append(row)
+            self._columns[('inv', key)] = {value: np.array(rows, dtype=np.int64) for value, rows in index.items()}
+        return self._columns[('inv', key)]
+
+    def _condition_mask(self, condition: Union[FieldCondition, Filter]) -> np.ndarray:
+        if isinstance(condition, Filter):
+            return self.filter_mask(condition)
+        if not isinstance(condition, FieldCondition):
+            raise ValueError(f"Unsupported filter condition: {type(condition).__name__}")
+
+        mask = np.ones(self.count, dtype=bool)
+        if condition.range is not None:
+            values = self._numeric_column(condition.key)
+            bounds = condition.range
+            with np.errstate(invalid='ignore'):
+                mask &= ~np.isnan(values)
+                if bounds.gte is not None:
+                    mask &= values >= bounds.gte
+                if bounds.gt is not None:
+                    mask &= values > bounds.gt
+                if bounds.lte is not None:
+                    mask &= values <= bounds.lte
+                if bounds.lt is not None:
+                    mask &= values < bounds.lt
+        if condition.match is not None:
+            if isinstance(condition.match, MatchAny):
+                wanted = condition.match.any
+            elif isinstance(condition.match, MatchValue):
+                wanted = [condition.match.value]
+            else:
+                raise ValueError(f"Unsupported match: {type(condition.match).__name__}")
+            index = self._inverted_column(condition.key)
+            matched = np.zeros(self.count, dtype=bool)
+            for value in wanted:
+                if value in index:
+                    matched[index[value]] = True
+            mask &= matched
+        return mask
+
+    def filter_mask(self, query_filter: Filter) -> np.ndarray:
+        """Boolean row mask of the points matching a Qdrant filter (must, should, must_not)"""
+        def as_list(conditions):
+            if conditions is None:
+                return []
+            return conditions if isinstance(conditions, list) else [conditions]
+
+        # The payload columns are rebuilt lazily and cleared by writes
+        with self._lock:
+            mask = np.ones(self.count, dtype=bool)
+            for condition in as_list(query_filter.must):
+                mask &= self._condition_mask(condition)
+            should = as_list(query_filter.should)
+            if should:
+                any_mask = np.zeros(self.count, dtype=bool)
+                for condition in should:
+                    any_mask |= self._condition_mask(condition)
+                mask &= any_mask
+            for condition in as_list(query_filter.must_not):
+                mask &= ~self._condition_mask(condition)
+            return mask
+
+    def matching_rows(self, query_filter: Optional[Filter] = None) -> np.ndarray:
+        """Rows of the points matching a filter (all rows without one), consistent with one row count"""
+        with self._lock:
+            if query_filter is None:
+                return np.arange(self.count)
+            return np.flatnonzero(self.filter_mask(query_filter))
+
+    def _snapshot(self, query_filter: Optional[Filter]) -> Tuple[Optional[np.memmap], Optional[np.ndarray], int]:
+        """Mapped vectors, matching rows (None: all) and row count as of now"""
+        with self._lock:
+            rows = np.flatnonzero(self.filter_mask(query_filter)) if query_filter is not None else None
+            return self._vectors, rows, self.count
+
+    def search(self, queries: np.ndarray, limit: int,
+               query_filter: Optional[Filter] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Exact top-k cosine search of several queries sharing one filter.
+
+        Returns:
+            List[Tuple[np.ndarray, np.ndarray]]: (rows, scores) per query, best first
+        """
+        vectors, rows, count = self._snapshot(query_filter)
+        total = count if rows is None else len(rows)
+        if total == 0 or limit <= 0:
+            return [(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)) for _ in queries]
+
+        queries = _normalize(np.asarray(queries, dtype=np.float32))
+        scores = np.empty((len(queries), total), dtype=np.float32)
+        for start in range(0, total, SCORE_BLOCK_ROWS):
+            stop = min(start + SCORE_BLOCK_ROWS, total)
+            block = vectors[start:stop] if rows is None else vectors[rows[start:stop]]
+            scores[:, start:stop] = queries @ np.asarray(block, dtype=np.float32).T
+
+        limit = min(limit, total)
+        results = []
+        for query_scores in scores:
+            top = np.argpartition(-query_scores, limit - 1)[:limit] if limit < total else np.arange(total)
+            top = top[np.argsort(-query_scores[top], kind='stable')]
+            results.append((top if rows is None else rows[top], query_scores[top]))
+        return results
+
+
+class NumpyVectorClient:
+    """
+    In-process vector store with the subset of the QdrantClient API used by
+    the pipeline (collections, aliases, upsert, search, scroll, payloads).
+
+    Search is an exact brute-force scan over a memory-mapped matrix, which
+    for a few hundred thousand chunks is as fast as an HNSW round-trip to a
+    Qdrant server and needs no server at all. Filters are the same Qdrant
+    Filter objects built by build_metadata_filter. Meant for single-host
+    deployments: several processes may read, writes are serialized by a
+    file lock.
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH, dtype: str = 'float32'):
+        """
+        Args:
+            path (str): Directory holding one subdirectory per collection
+            dtype (str): Vector storage type of new collections ('float16' or 'float32')
+        """
+        if dtype not in STORE_DTYPES:
+            raise ValueError(f"Unknown vector dtype: {dtype}. Use one of {', '.join(STORE_DTYPES)}.")
+        self.path = path
+        self.dtype = dtype
+        self._collections: Dict[str, _Collection] = {}
+        self._lock = threading.RLock()
+        os.makedirs(path, exist_ok=True)
+
+    # Collections and aliases
+
+    def _aliases(self) -> Dict[str, str]:
+        try:
+            with open(os.path.join(self.path, _ALIASES_FILE), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _resolve(self, name: str) -> str:
+        return self._aliases().get(name, name)
+
+    def _collection_path(self, name: str) -> str:
+        if not name or os.sep in name or name.startswith('.'):
+            raise ValueError(f"Invalid collection name: {name!r}")
+        return os.path.join(self.path, name)
+
+    def _collection(self, collection_name: str) -> _Collection:
+        name = self._resolve(collection_name)
+        with self._lock:
+            collection = self._collections.get(name)
+            if collection is None or not os.path.exists(os.path.join(collection.path, _META_FILE)):
+                path = self._collection_path(name)
+                if not os.path.exists(os.path.join(path, _META_FILE)):
+                    raise ValueError(f"Collection {collection_name} not found")
+                collection = self._collections[name] = _Collection(path)
+        collection.refresh()
+        return collection
+
+    def collection_exists(self, collection_name: str) -> bool:
+        return os.path.exists(os.path.join(self._collection_path(self._resolve(collection_name)), _META_FILE))
+
+    def get_collections(self) -> CollectionsResponse:
+        names = sorted(
+            name for name in os.listdir(self.path)
+            if os.path.exists(os.path.join(self.path, name, _META_FILE))
+        )
+        return CollectionsResponse(collections=[CollectionDescription(name=name) for name in names])
+
+    def get_collection(self, collection_name: str) -> SimpleNamespace:
+        collection = self._collection(collection_name)
+        return SimpleNamespace(
+            status=CollectionStatus.GREEN,
+            points_count=collection.count,
+            payload_schema={},
+            config=SimpleNamespace(params=SimpleNamespace(
+                vectors=VectorParams(size=collection.dim, distance=Distance.COSINE)
+            ))
+        )
+
+    def create_collection(self, collection_name: str, vectors_config: VectorParams, **kwargs) -> bool:
+        if vectors_config.distance != Distance.COSINE:
+            raise ValueError("The numpy vector store only supports cosine distance")
+        if self.collection_exists(collection_name):
+            raise ValueError(f"Collection {collection_name} already exists")
+        _Collection.create(self._collection_path(collection_name), vectors_config.size, self.dtype)
+        return True
+
+    def delete_collection(self, collection_name: str) -> bool:
+        with self._lock:
+            self._collections.pop(collection_name, None)
+            path = self._collection_path(collection_name)
+            if not os.path.exists(path):
+                return False
+            shutil.rmtree(path)
+            return True
+
+    def create_payload_index(self, collection_name: str, field_name: str, field_schema: Any = None, **kwargs) -> None:
+        """Payload columns are indexed on first use, nothing to do"""
+        self._collection(collection_name)
+
+    def update_collection(self, collection_name: str, **kwargs) -> bool:
+        """There is no index to build, optimizer settings do not apply"""
+        self._collection(collection_name)
+        return True
+
+    def get_aliases(self) -> CollectionsAliasesResponse:
+        return CollectionsAliasesResponse(aliases=[
+            AliasDescription(alias_name=alias, collection_name=collection)
+            for alias, collection in sorted(self._aliases().items())
+        ])
+
+    def update_collection_aliases(self, change_aliases_operations: List[Any], **kwargs) -> bool:
+        """Apply alias operations together; the alias file is replaced atomically"""
+        with self._lock:
+            aliases = self._aliases()
+            for operation in change_aliases_operations:
+                if isinstance(operation, CreateAliasOperation):
+                    aliases[operation.create_alias.alias_name] = operation.create_alias.collection_name
+                elif isinstance(operation, DeleteAliasOperation):
+                    aliases.pop(operation.delete_alias.alias_name, None)
+                elif isinstance(operation, RenameAliasOperation):
+                    rename = operation.rename_alias
+                    aliases[rename.new_alias_name] = aliases.pop(rename.old_alias_name)
+                else:
+                    raise ValueError(f"Unsupported alias operation: {type(operation).__name__}")
+
+            alias_path = os.path.join(self.path, _ALIASES_FILE)
+            with open(f"{alias_path}.tmp", 'w', encoding='utf-8') as f:
+                json.dump(aliases, f, indent=2)
+            os.replace(f"{alias_path}.tmp", alias_path)
+        return True
+
+    # Points
+
+    def upsert(self, collection_name: str, points: List[PointStruct], wait: bool = True, **kwargs) -> None:
+        if not points:
+            return
+        self._collection(collection_name).upsert(
+            ids=[point.id for point in points],
+            vectors=np.array([point.vector for point in points], dtype=np.float32),
+            payloads=[point.payload for point in points]
+        )
+
+    def count(self, collection_name: str, count_filter: Optional[Filter] = None, exact: bool = True) -> CountResult:
+        collection = self._collection(collection_name)
+        if count_filter is None:
+            return CountResult(count=collection.count)
+        return CountResult(count=len(collection.matching_rows(count_filter)))
+
+    def _scored_points(self, collection: _Collection, rows: np.ndarray, scores: np.ndarray,
+                       with_payload: Any = True, with_vectors: Any = False) -> List[ScoredPoint]:
+        return [
+            ScoredPoint(
+                id=collection.ids[row], version=0, score=float(score),
+                payload=collection.payloads[row] if with_payload else None,
+                vector=collection.vector(row) if with_vectors else None
+            )
+            for row, score in zip(rows.tolist(), scores.tolist())
+        ]
+
+    def search(self, collection_name: str, query_vector: List[float], query_filter: Optional[Filter] = None,
+               limit: int = 10, with_payload: Any = True, with_vectors: Any = False, **kwargs) -> List[ScoredPoint]:
+        collection = self._collection(collection_name)
+        rows, scores = collection.search(np.array([query_vector]), limit, query_filter)[0]
+        return self._scored_points(collection, rows, scores, with_payload, with_vectors)
+
+    def search_batch(self, collection_name: str, requests: List[SearchRequest], **kwargs) -> List[List[ScoredPoint]]:
+        """Answer all requests, scanning the matrix once per distinct (filter, limit)"""
+        collection = self._collection(collection_name)
+        groups: Dict[Tuple[str, int], List[int]] = {}
+        for i, request in enumerate(requests):
+            key = (request.filter.model_dump_json() if request.filter is not None else '', request.limit)
+            groups.setdefault(key, []).append(i)
+
+        results: List[List[ScoredPoint]] = [[] for _ in requests]
+        for positions in groups.values():
+            first = requests[positions[0]]
+            matches = collection.search(
+                np.array([requests[i].vector for i in positions]), first.limit, first.filter
+            )
+            for i, (rows, scores) in zip(positions, matches):
+                results[i] = self._scored_points(
+                    collection, rows, scores, requests[i].with_payload, requests[i].with_vector
+                )
+        return results
+
+    def scroll(self, collection_name: str, scroll_filter: Optional[Filter] = None, limit: int = 10,
+               offset: Optional[int] = None, with_payload: Any = True, with_vectors: Any = False,
+               **kwargs) -> Tuple[List[Record], Optional[int]]:
+        """Page through points in insertion order; offset is the row returned by the previous page"""
+        collection = self._collection(collection_name)
+        rows = collection.matching_rows(scroll_filter)
+        rows = rows[rows >= (offset or 0)]
+        page = rows[:limit].tolist()
+        next_offset = int(rows[limit]) if len(rows) > limit else None
+        return [
+            Record(
+                id=collection.ids[row],
+                payload=collection.payloads[row] if with_payload else None,
+                vector=collection.vector(row) if with_vectors else None
+            )
+            for row in page
+        ], next_offset
+
+    def set_payload(self, collection_name: str, payload: Dict[str, Any],
+                    points: Union[Filter, List[Union[str, int]]], key: Optional[str] = None, **kwargs) -> None:
+        collection = self._collection(collection_name)
+        if isinstance(points, Filter):
+            rows = collection.matching_rows(points).tolist()
+        else:
+            rows = [collection.id_to_row[point_id] for point_id in points if point_id in collection.id_to_row]
+        collection.set_payload(rows, payload, key)
+
+
+class NumpyVectorStore:
+    """
+    LangChain-style vectorstore over a NumpyVectorClient collection.
+
+    Stores points with the same payload layout as LangChain's Qdrant
+    vectorstore ({'page_content', 'metadata'}), so Retrieval and the other
+    raw-client code paths work unchanged on either backend.
+    """
+
+    def __init__(self, client: NumpyVectorClient, collection_name: str, embeddings: Any):
+        self.client = client
+        self.collection_name = collection_name
+        self.embeddings = embeddings
+
+    def add_documents(self, documents: List[Document], ids: Optional[List[str]] = None, **kwargs) -> List[str]:
+        """Embed documents and store them (replacing points with the same ids); returns the point ids"""
+        if not documents:
+            return []
+        vectors = self.embeddings.embed_documents([doc.page_content for doc in documents])
+        ids = list(ids) if ids is not None else [uuid.uuid4().hex for _ in documents]
+        self.client.upsert(collection_name=self.collection_name, points=[
+            PointStruct(id=point_id, vector=vector, payload={'page_content': doc.page_content, 'metadata': doc.metadata})
+            for point_id, vector, doc in zip(ids, vectors, documents)
+        ])
+        return ids
+
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 4,
+                                               filter: Optional[Filter] = None, **kwargs) -> List[Tuple[Document, float]]:
+        points = self.client.search(collection_name=self.collection_name, query_vector=embedding,
+                                    query_filter=filter, limit=k)
+        return [
+            (Document(page_content=(point.payload or {}).get('page_content', ''),
+                      metadata=(point.payload or {}).get('metadata') or {}), point.score)
+            for point in points
+        ]
+
+    def similarity_search_with_score(self, query: str, k: int = 4,
+                                     filter: Optional[Filter] = None, **kwargs) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self.embeddings.embed_query(query), k=k, filter=filter)
+
+
+_clients: Dict[str, NumpyVectorClient] = {}
+_clients_lock = threading.Lock()
+_default_path = DEFAULT_STORE_PATH
+
+
+def configure_numpy_store(path: str) -> None:
+    """Set the directory used by get_numpy_client() without a path (e.g. from Django settings)"""
+    global _default_path
+    _default_path = path
+
+
+def get_numpy_client(path: Optional[str] = None) -> NumpyVectorClient:
+    """
+    Return the process-wide client of a store directory.
+
+    All EmbeddingArticle instances of a process must share one client so
+    they see each other's writes without reloading.
+    """
+    path = os.path.abspath(path or _default_path)
+    with _clients_lock:
+        if path not in _clients:
+            _clients[path] = NumpyVectorClient(path)
+        return _clients[path]
@@ -0,0 +1,152 @@
+from typing import Any, Dict, Optional, Tuple
+import gc
+import os
+import threading
+
+DEFAULT_MODEL_NAME = "all-MiniLM-L6-v2"
+
+_lock = threading.Lock()
+_embeddings: Dict[Tuple[str, str], Any] = {}
+_keybert: Dict[Tuple[str, str], Any] = {}
+
+# Set by preload_models(): models live on the CPU so forked workers can share them
+_preloaded = False
+
+
+def _device(device: Optional[str]) -> str:
+    """Resolve the device a model is loaded on, so callers asking for the same device share one instance"""
+    # CUDA contexts do not survive fork, preloaded models are always on the CPU
+    if _preloaded:
+        return 'cpu'
+    if device is None:
+        try:
+            import torch
+        except ImportError:
+            return 'cpu'
+        return 'cuda' if torch.cuda.is_available() else 'cpu'
+    return device
+
+
+def get_embeddings(model_name: str = DEFAULT_MODEL_NAME, device: Optional[str] = None) -> Any:
+    """
+    Return the process-wide HuggingFaceEmbeddings of a model, loading it on first use.
+
+    Args:
+        model_name (str): Sentence-transformers model name
+        device (Optional[str]): 'cuda', 'cpu' or None (CUDA when available); ignored after preload_models()
+
+    Returns:
+        HuggingFaceEmbeddings: Shared embeddings
+    """
+    key = (model_name, _device(device))
+    with _lock:
+        if key not in _embeddings:
+            from langchain_community.embeddings import HuggingFaceEmbeddings
+            _embeddings[key] = HuggingFaceEmbeddings(model_name=model_name, model_kwargs={'device': key[1]})
+        return _embeddings[key]
+
+
+def get_keybert(model_name: str = DEFAULT_MODEL_NAME, device: Optional[str] = None) -> Any:
+    """
+    Return the process-wide KeyBERT model.
+
+    KeyBERT wraps the same sentence-transformers model used for embeddings,
+    so the weights are loaded once for both.
+
+    Args:
+        model_name (str): Sentence-transformers model name
+        device (Optional[str]): 'cuda', 'cpu' or None (CUDA when available); ignored after preload_models()
+
+    Returns:
+        KeyBERT: Shared keyword extraction model
+    """
+    embeddings = get_embeddings(model_name, device)
+    key = (model_name, _device(device))
+    with _lock:
+        if key not in _keybert:
+            from keybert import KeyBERT
+            _keybert[key] = KeyBERT(model=embeddings.client)
+        return _keybert[key]
+
+
+def preload_models(model_name: str = DEFAULT_MODEL_NAME) -> None:
+    """
+    Load the shared models in the parent process before workers are forked.
+
+    Weights are loaded on the CPU, switched to inference mode and the
+    Python heap is frozen, so after fork the workers share the memory
+    copy-on-write instead of each loading its own copy. No inference runs in
+    the parent: thread pools started before fork are not usable in children.
+    """
+    global _preloaded
+    import torch
+
+    if torch.cuda.is_available() and torch.cuda.is_initialized():
+        raise RuntimeError("CUDA was initialized before fork; preloading requires CPU models")
+
+    # Rust tokenizers refuse to parallelize after fork once they did before it
+    os.environ.setdefault('TOKENIZERS_PARALLELISM', 'false')
+    _preloaded = True
+
+    model = get_embeddings(model_name).client
+    get_keybert(model_name)
+    model.eval()
+    for parameter in model.parameters():
+        parameter.requires_grad_(False)
+
+    # Keep the garbage collector from touching (and thereby copying) the
+    # pages holding the objects created so far
+    gc.collect()
+    gc.freeze()
+    print(f"Preloaded {model_name} for forked workers ({memory_usage()['rss'] / 2**20:.0f} MiB RSS)")
+
+
+def after_fork(num_threads: Optional[int] = None) -> int:
+    """
+    Configure PyTorch in a freshly forked worker.
+
+    Args:
+        num_threads (Optional[int]): Intra-op threads for this worker, typically
+            CPUs / workers (None keeps PyTorch's default)
+
+    Returns:
+        int: Number of intra-op threads PyTorch will use
+    """
+    import torch
+
+    if num_threads is not None:
+        torch.set_num_threads(num_threads)
+    actual = torch.get_num_threads()
+    if num_threads is not None and actual != num_threads:
+        print(f"Warning: PyTorch uses {actual} threads instead of {num_threads} in worker {os.getpid()}")
+    cpu_count = os.cpu_count() or 1
+    if actual > cpu_count:
+        print(f"Warning: {actual} PyTorch threads exceed {cpu_count} CPUs in worker {os.getpid()}")
+    return actual
+
+
+def memory_usage(pid: Optional[int] = None) -> Dict[str, int]:
+    """
+    Return the memory of a process in bytes (Linux only).
+
+    'pss' splits shared pages between the processes using them and is the
+    figure to sum over workers; 'private' is what a worker costs on its own.
+
+    Args:
+        pid (Optional[int]): Process id (default: current process)
+
+    Returns:
+        Dict[str, int]: rss, pss, shared and private memory
+    """
+    fields = {}
+    with open(f"/proc/{pid or 'self'}/smaps_rollup", 'r') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1]) * 1024
+    return {
+        'rss': fields.get('Rss', 0),
+        'pss': fields.get('Pss', 0),
+        'shared': fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0),
+        'private': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0),
+    }
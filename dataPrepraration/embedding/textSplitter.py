@@ -0,0 +1,130 @@
+from bisect import bisect_left, bisect_right
+from typing import Any, List, Optional, Tuple
+import re
+
+# A sentence ends at ., ! or ? followed by whitespace and an upper-case letter,
+# digit or bracket, or at a blank line (paragraph break in pdfminer output).
+_SENTENCE_BOUNDARY_RE = re.compile(r'(?<=[.!?])\s+(?=[A-Z0-9(\[])|\n\s*\n')
+
+# Rough WordPiece approximation used when no tokenizer is available:
+# every word or punctuation mark is one token, long words are split further.
+_PSEUDO_TOKEN_RE = re.compile(r'\w+|[^\w\s]')
+_PSEUDO_WORDPIECE_CHARS = 6
+
+
+class SentenceTokenSplitter:
+    """
+    Sentence- and token-aware text splitter.
+
+    Works on a single text buffer: the text is tokenized once, sentence
+    boundaries are mapped to token positions and chunks are packed from whole
+    sentences until the embedding model's window is full. Only the final chunk
+    strings are materialized; everything else is offsets.
+    """
+
+    def __init__(self,
+                 tokenizer: Optional[Any] = None,
+                 max_tokens: int = 254,
+                 overlap_tokens: int = 50):
+        """
+        Initialize the splitter.
+
+        Args:
+            tokenizer (Optional[Any]): Fast Hugging Face tokenizer of the embedding model.
+                If None, WordPiece token counts are approximated with a regex.
+            max_tokens (int): Maximum number of tokens per chunk (model window minus special tokens)
+            overlap_tokens (int): Approximate number of tokens shared by consecutive chunks
+        """
+        if overlap_tokens >= max_tokens:
+            raise ValueError("overlap_tokens must be smaller than max_tokens")
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+
+    def _token_spans(self, text: str) -> Tuple[List[int], List[int]]:
+        """Return start and end character offsets of every token in text"""
+        backend = getattr(self.tokenizer, 'backend_tokenizer', None)
+        if backend is not None:
+            # The Rust tokenizer handles arbitrarily long input without the
+            # sequence-length warnings of the Python wrapper
+            offsets = backend.encode(text, add_special_tokens=False).offsets
+            offsets = [span for span in offsets if span[1] > span[0]]
+            return [span[0] for span in offsets], [span[1] for span in offsets]
+
+        starts: List[int] = []
+        ends: List[int] = []
+        for match in _PSEUDO_TOKEN_RE.finditer(text):
+            start, end = match.span()
+            # Every piece of a long word gets its own span, so a chunk cut
+            # inside the word starts and ends where the cut is
+            piece_starts = range(start, end, _PSEUDO_WORDPIECE_CHARS)
+            starts.extend(piece_starts)
+            ends.extend(min(piece_start + _PSEUDO_WORDPIECE_CHARS, end) for piece_start in piece_starts)
+        return starts, ends
+
+    def _sentence_boundaries(self, text: str, starts: List[int]) -> List[int]:
+        """Return sorted token indices at which a new sentence begins"""
+        boundaries = {0, len(starts)}
+        for match in _SENTENCE_BOUNDARY_RE.finditer(text):
+            boundaries.add(bisect_left(starts, match.end()))
+        return sorted(boundaries)
+
+    def split_offsets(self, text: str) -> List[Tuple[int, int]]:
+        """
+        Split text into chunks and return their character offsets.
+
+        Args:
+            text (str): Text to split
+
+        Returns:
+            List[Tuple[int, int]]: (start, end) character offsets of each chunk
+        """
+        starts, ends = self._token_spans(text)
+        num_tokens = len(starts)
+        if num_tokens == 0:
+            return []
+
+        boundaries = self._sentence_boundaries(text, starts)
+        spans: List[Tuple[int, int]] = []
+        chunk_start = 0
+
+        while chunk_start < num_tokens:
+            limit = chunk_start + self.max_tokens
+            # Last sentence boundary that still fits into the window
+            idx = bisect_right(boundaries, limit) - 1
+            chunk_end = boundaries[idx]
+            split_on_sentence = chunk_end > chunk_start
+            if not split_on_sentence:
+                # Single sentence longer than the window: cut at token level
+                chunk_end = min(limit, num_tokens)
+
+            spans.append((starts[chunk_start], ends[chunk_end - 1]))
+            if chunk_end >= num_tokens:
+                break
+
+            # Start the next chunk on a sentence boundary inside the overlap
+            # region, or mid-sentence if the overlap has no boundary
+            desired = max(chunk_end - self.overlap_tokens, chunk_start + 1)
+            next_idx = bisect_left(boundaries, desired)
+            next_start = boundaries[next_idx]
+            if next_start >= chunk_end or not split_on_sentence:
+                next_start = desired if not split_on_sentence else chunk_end
+            chunk_start = next_start
+
+        return spans
+
+    def split_text_with_offsets(self, text: str) -> List[Tuple[str, int, int]]:
+        """
+        Split text into chunks together with their character offsets.
+
+        Args:
+            text (str): Text to split
+
+        Returns:
+            List[Tuple[str, int, int]]: (chunk, start, end) for each chunk
+        """
+        return [(text[start:end], start, end) for start, end in self.split_offsets(text)]
+
+    def split_text(self, text: str) -> List[str]:
+        """Split text into chunks (drop-in replacement for LangChain splitters)"""
+        return [text[start:end] for start, end in self.split_offsets(text)]
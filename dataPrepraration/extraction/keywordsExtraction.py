@@ -1,27 +1,69 @@
-from keybert import KeyBERT
-from deep_translator import GoogleTranslator
+from typing import Optional
+from dataPrepraration.embedding.sharedModels import get_keybert
+from dataPrepraration.extraction.translation import (
+    DEFAULT_TRANSLATOR_BACKEND, TranslationCache, TranslatorBackend, detect_language, get_translator_backend
+)
 
 class KeywordsExtractor:
-    def __init__(self, text: str):
-        self.model = KeyBERT()
-        self.translator = GoogleTranslator(source='auto', target='en')
+    def __init__(self,
+                 text: str,
+                 translator: Optional[TranslatorBackend] = None,
+                 translation_cache: Optional[TranslationCache] = None):
+        """
+        Initialize the extractor and translate the text to English if needed.
+
+        Args:
+            text (str): Text to extract keywords from.
+            translator (Optional[TranslatorBackend]): Backend used for non-English text
+                (default: DEFAULT_TRANSLATOR_BACKEND).
+            translation_cache (Optional[TranslationCache]): Cache of earlier translations (default: on-disk cache).
+        """
+        self._model = None
+        self.translator = translator or get_translator_backend(DEFAULT_TRANSLATOR_BACKEND)
+        self.translation_cache = translation_cache if translation_cache is not None else TranslationCache()
         self.original_text = text
+        self.detected_language = detect_language(text)
         self.translated_text = self._translate_text(text)
 
+    @property
+    def model(self):
+        """KeyBERT model, loaded on first keyword extraction"""
+        if self._model is None:
+            self._model = get_keybert()
+        return self._model
+
     def _translate_text(self, text: str) -> str:
         """
         Translate the given text to English.
 
-        Takes the original text and translates it using Google Translator.
+        English text is returned as is without calling the translator.
+        Other languages, and text whose language is unknown, are looked up
+        in the translation cache first.
 
         Args:
             text (str): The original text to translate.
 
         Returns:
             text (str): The translated text.
-            If the text is already in English, it will return the original text.
+            If the text is already in English or translation fails, it will return the original text.
         """
-        return self.translator.translate(text)
+        if self.detected_language == 'en':
+            return text
+
+        cached = self.translation_cache.get(text)
+        if cached is not None:
+            return cached
+
+        try:
+            translated = self.translator.translate(text, source='auto', target='en')
+        except Exception as e:
+            print(f"Translation with {self.translator.name} backend failed, using original text: {e}")
+            return text
+
+        if translated:
+            self.translation_cache.set(text, translated)
+            return translated
+        return text
 
     def get_keywords(self, num_keywords: int = 5) -> tuple:
         """
@@ -68,5 +110,6 @@ if __name__ == "__main__":
     keywords = extractor.get_keywords()
     print(keywords)
     print("Original text:", extractor.original_text)
+    print("Detected language:", extractor.detected_language)
     print("Translated text:", extractor.translated_text)
     print("Extracted keywords:", keywords)
\ No newline at end of file
@@ -0,0 +1,251 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from typing import Dict, Optional
+
+DEFAULT_CACHE_PATH = os.path.join('cache', 'translations.json')
+# Nodes without internet access use 'argos' (see TRANSLATOR_BACKENDS)
+DEFAULT_TRANSLATOR_BACKEND = 'google'
+
+# Most frequent function words per language. A handful of these is enough to
+# tell English from the other languages users actually type in.
+_STOPWORDS = {
+    'en': {'the', 'of', 'and', 'to', 'in', 'is', 'are', 'what', 'how', 'which', 'for',
+           'with', 'on', 'that', 'this', 'by', 'from', 'why', 'does', 'do', 'can', 'be'},
+    'pl': {'i', 'w', 'na', 'z', 'się', 'jest', 'do', 'nie', 'jak', 'co', 'czy', 'że',
+           'są', 'dla', 'jakie', 'który', 'które', 'oraz', 'o', 'od', 'po'},
+    'de': {'der', 'die', 'das', 'und', 'ist', 'nicht', 'mit', 'von', 'zu', 'den', 'ein',
+           'eine', 'wie', 'was', 'für', 'auf', 'sind', 'werden', 'in', 'im', 'bei'},
+    'fr': {'le', 'la', 'les', 'de', 'des', 'et', 'est', 'un', 'une', 'du', 'que', 'qui',
+           'pour', 'dans', 'sont', 'comment', 'quels', 'quelles', 'en', 'au', 'aux'},
+    'es': {'el', 'la', 'los', 'las', 'de', 'y', 'es', 'en', 'un', 'una', 'que', 'por',
+           'para', 'con', 'son', 'cómo', 'qué', 'cuáles', 'del'},
+    'it': {'il', 'lo', 'la', 'gli', 'le', 'di', 'e', 'è', 'per', 'con', 'che', 'del',
+           'della', 'delle', 'nel', 'nella', 'sono', 'come', 'quali', 'un', 'una'},
+}
+
+# Letters that only occur in some of the languages
+_LETTERS = {
+    'pl': set('ąćęłńśźż'),
+    'de': set('äöüß'),
+    'fr': set('àâçèéêëîïôœùû'),
+    'es': set('áéíñóú'),
+    'it': set('àèéìòù'),
+}
+
+# Character trigrams typical of each language (words padded with spaces, so
+# ' th' is a word start and 'ng ' a word end). They carry keyword-style
+# queries, which have no stopwords at all.
+_TRIGRAMS = {
+    'en': {' th', 'the', 'he ', 'ing', 'ng ', ' wh', 'ght', 'ck ', 'ly ', 'ed ', 'ork',
+           'rks', 'ks ', 'ty ', 'ity', 'ess', ' ov', 'ver', 'ys ', 'ure', 'al '},
+    'pl': {' prz', 'prz', 'rz', 'cz', 'sz', 'ych', 'ego', 'owa', 'nie', 'ie ', 'ki ',
+           'wy', 'dz', 'ów '},
+    'de': {'sch', 'cht', 'ich', 'ung', 'eit', 'tze', 'ze ', ' ge', 'ier', 'aft', 'ern',
+           'nen', 'rn ', 'lle', 'hen', 'zin', 'ale'},
+    'fr': {'eau', 'aux', 'ux ', 'que', 'ais', 'ait', 'ois', 'ssa', 'iss', 'age', 'ond',
+           'eux', 'ou ', 'tiq', 'ien', 'nt '},
+    'es': {'ado', 'ada', 'ida', 'dad', 'ad ', 'os ', 'ias', 'cia', 'ues', ' lo', 'ent'},
+    'it': {'zio', 'li ', 'ti ', 'ni ', 'ri ', 'chi', 'ghi', 'gli', 'ett', 'zz', 'cc',
+           'ità', 'ato', 'are', 'ere', 'ina', 'ell', 'nto'},
+}
+_TRIGRAM_LENGTHS = sorted({len(gram) for grams in _TRIGRAMS.values() for gram in grams})
+
+_WORD_RE = re.compile(r"[^\W\d_]+", re.UNICODE)
+
+# Plain-ASCII text is English unless another language scores at least this much
+# more (one stopword, or two n-grams): short English topics such as 'dark matter'
+# carry almost no evidence, and a single chance n-gram must not send them abroad
+_ASCII_MARGIN = 2.0
+
+
+def _language_scores(words) -> Dict[str, float]:
+    """Score each language by its stopwords (2 points), letters (2) and character n-grams (1)"""
+    scores = {lang: 2.0 * sum(1 for word in words if word in stopwords) for lang, stopwords in _STOPWORDS.items()}
+    for word in words:
+        padded = f" {word} "
+        grams = {padded[i:i + n] for n in _TRIGRAM_LENGTHS for i in range(len(padded) - n + 1)}
+        for lang in scores:
+            scores[lang] += len(grams & _TRIGRAMS[lang])
+            scores[lang] += 2.0 * sum(1 for ch in word if ch in _LETTERS.get(lang, ()))
+    return scores
+
+
+def detect_language(text: str) -> str:
+    """
+    Detect the language of a text locally, without any network call.
+
+    Combines stopwords, language-specific letters and character n-grams.
+    English is ruled out by non-ASCII letters; plain-ASCII text is English
+    unless another language clearly outscores it. Other texts with no
+    evidence or a tie between the best languages are 'unknown', so the
+    caller translates them rather than assuming English.
+
+    Args:
+        text (str): Text to classify.
+
+    Returns:
+        str: ISO 639-1 code ('en', 'pl', 'de', 'fr', 'es', 'it') or 'unknown'.
+    """
+    words = [word.lower() for word in _WORD_RE.findall(text)]
+    if not words:
+        return 'unknown'
+
+    scores = _language_scores(words)
+    letters = ''.join(words)
+    if sum(1 for ch in letters if ord(ch) > 127) / len(letters) > 0.02:
+        scores['en'] = 0.0
+    elif max(score for lang, score in scores.items() if lang != 'en') < scores['en'] + _ASCII_MARGIN:
+        return 'en'
+
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    (best_lang, best), (_, second) = ranked[0], ranked[1]
+    if best <= 0 or best == second:
+        return 'unknown'
+    return best_lang
+
+
+class TranslatorBackend:
+    """
+    Interface for translation backends used by KeywordsExtractor.
+    """
+
+    name = 'base'
+
+    def translate(self, text: str, source: str = 'auto', target: str = 'en') -> str:
+        raise NotImplementedError
+
+
+class GoogleTranslatorBackend(TranslatorBackend):
+    """
+    Online backend using deep-translator's GoogleTranslator.
+    """
+
+    name = 'google'
+
+    def translate(self, text: str, source: str = 'auto', target: str = 'en') -> str:
+        from deep_translator import GoogleTranslator
+        return GoogleTranslator(source=source, target=target).translate(text)
+
+
+class ArgosTranslatorBackend(TranslatorBackend):
+    """
+    Offline backend using argos-translate models installed on the node.
+    """
+
+    name = 'argos'
+
+    def translate(self, text: str, source: str = 'auto', target: str = 'en') -> str:
+        import argostranslate.translate
+        if source in ('auto', 'unknown'):
+            source = detect_language(text)
+        return argostranslate.translate.translate(text, source, target)
+
+
+class PassthroughTranslator(TranslatorBackend):
+    """
+    Stand-in backend that returns the text unchanged.
+
+    Used in tests and on nodes where no translation model is available.
+    Counts calls so tests can assert whether translation was attempted.
+    """
+
+    name = 'passthrough'
+
+    def __init__(self):
+        self.calls = 0
+
+    def translate(self, text: str, source: str = 'auto', target: str = 'en') -> str:
+        self.calls += 1
+        return text
+
+
+TRANSLATOR_BACKENDS = {
+    'google': GoogleTranslatorBackend,
+    'argos': ArgosTranslatorBackend,
+    'passthrough': PassthroughTranslator,
+}
+
+
+def get_translator_backend(name: str) -> TranslatorBackend:
+    """
+    Create a translator backend by name.
+
+    Args:
+        name (str): One of the keys of TRANSLATOR_BACKENDS.
+
+    Returns:
+        TranslatorBackend: New backend instance.
+    """
+    if name not in TRANSLATOR_BACKENDS:
+        raise ValueError(f"Unknown translator backend: {name}. Available: {', '.join(TRANSLATOR_BACKENDS)}")
+    return TRANSLATOR_BACKENDS[name]()
+
+
+class TranslationCache:
+    """
+    Persistent translation cache stored as a JSON file, keyed by text hash.
+    """
+
+    def __init__(self, cache_path: Optional[str] = DEFAULT_CACHE_PATH):
+        """
+        Initialize the cache and load existing entries from disk.
+
+        Args:
+            cache_path (Optional[str]): JSON file to persist to. None keeps the cache in memory only.
+        """
+        self.cache_path = cache_path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, str] = self._load()
+
+    def _load(self) -> Dict[str, str]:
+        """Load cache entries from disk, ignoring a missing or corrupt file"""
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Could not read translation cache {self.cache_path}: {e}")
+            return {}
+
+    @staticmethod
+    def _key(text: str, target: str) -> str:
+        return hashlib.sha256(f"{target}\x00{text}".encode('utf-8')).hexdigest()
+
+    def get(self, text: str, target: str = 'en') -> Optional[str]:
+        """Return the cached translation or None"""
+        with self._lock:
+            return self._entries.get(self._key(text, target))
+
+    def set(self, text: str, translation: str, target: str = 'en') -> None:
+        """Store a translation and persist the cache"""
+        with self._lock:
+            self._entries[self._key(text, target)] = translation
+            self._save()
+
+    def _save(self) -> None:
+        """Write entries atomically so a crash never leaves a truncated file"""
+        if not self.cache_path:
+            return
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # A temporary file per writer keeps concurrent saves of several processes apart
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(prefix=f"{os.path.basename(self.cache_path)}.",
+                                            suffix='.tmp', dir=directory or '.')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"Could not write translation cache {self.cache_path}: {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def __len__(self) -> int:
+        return len(self._entries)
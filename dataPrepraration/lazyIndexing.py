@@ -0,0 +1,189 @@
+from dataPrepraration.apiIntegration.arxiveAPI import ArxivAPI
+from dataPrepraration.databasePreparation import DatabasePreparation
+from dataPrepraration.embedding.embeddingArticle import EmbeddingArticle
+from dataPrepraration.embedding.deduplication import ChunkDeduplicator
+from dataPrepraration.pdfToText.pdfToText import PDFToText
+from qdrant_client.models import FieldCondition, Filter, MatchValue
+from collections import Counter
+from typing import Any, Dict, List, Optional
+import threading
+
+
+class LazyFullTextIndexer:
+    """
+    Background indexer for papers ingested in 'abstracts' mode.
+
+    Retrieval reports the papers whose abstracts it returned; the indexer
+    downloads, extracts and embeds their full texts on a single worker
+    thread, most frequently retrieved papers first, and then marks them as
+    indexed so they are not scheduled again.
+
+    Each web worker has its own indexer. A paper another process already
+    indexed is recognized by its paper entry and skipped; chunk point ids
+    are deterministic, so two processes indexing the same paper at once
+    overwrite each other's points instead of duplicating them.
+    """
+
+    def __init__(self, embedding_article: EmbeddingArticle, download_directory: str = 'archive',
+                 min_hits: int = 1):
+        """
+        Initialize the indexer.
+
+        Args:
+            embedding_article (EmbeddingArticle): Vectorstore the full texts are added to
+            download_directory (str): Directory for downloaded PDFs
+            min_hits (int): Times a paper must be retrieved before its full text is indexed
+        """
+        if min_hits < 1:
+            raise ValueError("min_hits must be at least 1")
+        self.embedding_article = embedding_article
+        self.download_directory = download_directory
+        self.min_hits = min_hits
+        self.hits: Counter = Counter()
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        self.in_progress: set = set()
+        self.done: set = set()
+        self.failed: set = set()
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+
+    def record_hits(self, metadatas: List[Dict[str, Any]]) -> None:
+        """
+        Register retrieved papers whose full text is not indexed yet.
+
+        Args:
+            metadatas (List[Dict]): Chunk metadata with 'article_name' and 'pdf_url'
+        """
+        with self._lock:
+            seen = set()
+            for metadata in metadatas:
+                article_name = metadata.get('article_name')
+                if not article_name or article_name in seen:
+                    continue
+                seen.add(article_name)
+                if (article_name in self.done or article_name in self.failed or article_name in self.in_progress
+                        or not metadata.get('pdf_url')):
+                    continue
+                self.hits[article_name] += 1
+                if self.hits[article_name] >= self.min_hits:
+                    self.pending.setdefault(article_name, metadata)
+
+            if self.pending and (self._worker is None or not self._worker.is_alive()):
+                self._worker = threading.Thread(target=self._run, name='lazy-full-text-indexer', daemon=True)
+                self._worker.start()
+
+    def _next_paper(self) -> Optional[Dict[str, Any]]:
+        """Pop the pending paper with the most retrieval hits"""
+        with self._lock:
+            if not self.pending:
+                self._worker = None
+                return None
+            article_name = max(self.pending, key=lambda name: self.hits[name])
+            # In progress until done or failed, so record_hits does not queue it again meanwhile
+            self.in_progress.add(article_name)
+            return self.pending.pop(article_name)
+
+    def _run(self) -> None:
+        while True:
+            metadata = self._next_paper()
+            if metadata is None:
+                return
+            article_name = metadata['article_name']
+            try:
+                indexed = self.index_paper(metadata)
+            except Exception as e:
+                print(f"Error indexing full text of {article_name}: {e}")
+                indexed = False
+            with self._lock:
+                self.in_progress.discard(article_name)
+                (self.done if indexed else self.failed).add(article_name)
+
+    def index_paper(self, metadata: Dict[str, Any]) -> bool:
+        """
+        Download, extract and embed the full text of one paper.
+
+        Args:
+            metadata (Dict): Chunk metadata of the paper's abstract
+
+        Returns:
+            bool: True if the full text was indexed
+        """
+        article_name = metadata['article_name']
+        if self._indexed_elsewhere(article_name):
+            print(f"Full text of {article_name} was already indexed")
+            return True
+
+        arxiv_api = ArxivAPI(keyword_list=(), download_directory=self.download_directory)
+        paper = {'pdf_url': metadata['pdf_url'], 'filename': article_name, 'arxiv_id': metadata.get('arxiv_id')}
+        if not arxiv_api.download_paper(paper):
+            return False
+
+        pdf_path = arxiv_api.pdf_path(paper)
+        document = PDFToText(pdf_path=pdf_path)._extract_document(pdf_path)
+        if not document['text'].strip():
+            print(f"No text extracted from {pdf_path}")
+            return False
+
+        paper_metadata = {key: value for key, value in metadata.items()
+                          if key not in ('article_name', 'char_start', 'char_end', 'section')}
+        num_chunks = DatabasePreparation.embed_article(self.embedding_article, {
+            'text': document['text'],
+            'filename': article_name,
+            'sections': document['sections'],
+            'metadata': {**paper_metadata, 'full_text_indexed': True}
+        }, deduplicator=ChunkDeduplicator())
+        self._mark_indexed(article_name)
+        print(f"Indexed full text of {article_name} ({num_chunks} chunks)")
+        return True
+
+    def _indexed_elsewhere(self, article_name: str) -> bool:
+        """Check the paper entry, which another process flags once it indexed the full text"""
+        try:
+            points, _ = self.embedding_article.client.scroll(
+                collection_name=self.embedding_article.paper_collection_name,
+                scroll_filter=Filter(must=[
+                    FieldCondition(key='metadata.article_name', match=MatchValue(value=article_name)),
+                    FieldCondition(key='metadata.full_text_indexed', match=MatchValue(value=True)),
+                ]),
+                limit=1
+            )
+        except Exception as e:
+            print(f"Could not check the paper entry of {article_name}: {e}")
+            return False
+        return bool(points)
+
+    def _mark_indexed(self, article_name: str) -> None:
+        """Flag the paper's abstract chunk and paper entry as fully indexed"""
+        points = Filter(must=[FieldCondition(key='metadata.article_name', match=MatchValue(value=article_name))])
+        for collection_name in (self.embedding_article.collection_name, self.embedding_article.paper_collection_name):
+            try:
+                self.embedding_article.client.set_payload(
+                    collection_name=collection_name,
+                    payload={'full_text_indexed': True},
+                    key='metadata',
+                    points=points
+                )
+            except Exception as e:
+                print(f"Could not update {collection_name} for {article_name}: {e}")
+
+
+_indexers: Dict[str, LazyFullTextIndexer] = {}
+_indexers_lock = threading.Lock()
+
+
+def get_lazy_indexer(embedding_article: EmbeddingArticle, download_directory: str = 'archive') -> LazyFullTextIndexer:
+    """
+    Return the process-wide lazy indexer of a collection.
+
+    Args:
+        embedding_article (EmbeddingArticle): Vectorstore of the collection
+        download_directory (str): Directory for downloaded PDFs (the configured one
+            replaces that of an existing indexer)
+    """
+    with _indexers_lock:
+        indexer = _indexers.get(embedding_article.collection_name)
+        if indexer is None:
+            indexer = LazyFullTextIndexer(embedding_article, download_directory)
+            _indexers[embedding_article.collection_name] = indexer
+        indexer.download_directory = download_directory
+        return indexer
@@ -1,17 +1,33 @@
-from pdfminer.high_level import extract_text
-from typing import List
-import re
+from pdfminer.high_level import extract_pages
+from pdfminer.layout import LTTextContainer
+from dataPrepraration.pdfToText.sectionParser import SectionParser, parse_sections, rebase_sections
+from typing import Any, Dict, Iterator, List
 import os
 
+try:
+    import fitz  # PyMuPDF, optional faster engine
+except ImportError:
+    fitz = None
+
+
 class PDFToText:
-    def __init__(self, pdf_path: str):
+    def __init__(self, pdf_path: str, max_pages: int = 60, engine: str = 'auto'):
         """
         Initialize the PDFToText class with the path to the PDF file or directory.
 
         Args:
             pdf_path (str): The path to the PDF file or directory.
+            max_pages (int): Maximum number of pages parsed per document.
+            engine (str): 'pymupdf', 'pdfminer' or 'auto' (PyMuPDF if installed, pdfminer otherwise).
         """
+        if engine not in ('auto', 'pymupdf', 'pdfminer'):
+            raise ValueError(f"Unknown PDF engine: {engine}. Use 'auto', 'pymupdf' or 'pdfminer'.")
+        if engine == 'pymupdf' and fitz is None:
+            raise ImportError("PyMuPDF is not installed. Install it with 'pip install pymupdf' or use engine='pdfminer'.")
+        
         self.pdf_path = pdf_path
+        self.max_pages = max_pages
+        self.engine = 'pymupdf' if engine == 'auto' and fitz is not None else ('pdfminer' if engine == 'auto' else engine)
 
     def _path_to_pdfs(self) -> List[str]:
         """
@@ -39,32 +55,102 @@ class PDFToText:
         """
         Find the starting position of bibliography/references section.
         
+        Only a stand-alone heading counts, so mentions of "References" in the
+        body text do not truncate the document.
+        
         Args:
             text (str): The full text from PDF
             
         Returns:
             int: Starting position of bibliography, or len(text) if not found
         """
-        # Common patterns for bibliography/references section
-        patterns = [
-            r'\bReferences\b',
-            r'\bREFERENCES\b',
-            r'\bBibliography\b',
-            r'\bBIBLIOGRAPHY\b',
-            r'\bLiterature\s+Cited\b',
-            r'\bWorks\s+Cited\b',
-            r'\bCitations\b',
-            r'^\s*References\s*$',  # References on its own line
-            r'^\s*REFERENCES\s*$',  # REFERENCES on its own line
-            r'^\s*Bibliography\s*$'  # Bibliography on its own line
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.MULTILINE | re.IGNORECASE)
-            if match:
-                return match.start()
-        
-        return len(text)  # Return full text length if no bibliography found
+        references_start = parse_sections(text)['references_start']
+        return references_start if references_start is not None else len(text)
+    
+    def _iter_pages(self, pdf_path: str) -> Iterator[str]:
+        """
+        Lay out and yield the text of one page at a time.
+
+        Pages are only parsed when the consumer asks for them, so stopping
+        iteration skips layout analysis of the remaining pages.
+
+        Args:
+            pdf_path (str): The path to the PDF file.
+
+        Yields:
+            str: Text of the next page.
+        """
+        if self.engine == 'pymupdf':
+            with fitz.open(pdf_path) as document:
+                for page_number, page in enumerate(document):
+                    if page_number >= self.max_pages:
+                        break
+                    yield page.get_text()
+            return
+        
+        for page_layout in extract_pages(pdf_path, maxpages=self.max_pages):
+            yield ''.join(element.get_text() for element in page_layout if isinstance(element, LTTextContainer))
+    
+    def _extract_document(self, pdf_path: str) -> Dict[str, Any]:
+        """
+        Extract text and section structure from a PDF file, from Abstract to before Bibliography.
+
+        Pages are processed one at a time and scanned once by the section
+        parser; parsing stops as soon as the bibliography heading is found or
+        max_pages is reached.
+
+        Args:
+            pdf_path (str): The path to the PDF file.
+
+        Returns:
+            Dict: 'text', 'title' and 'sections' (name, kind, start, end offsets into text).
+        """
+        parser = SectionParser()
+        pages: List[str] = []
+        bibliography_found = False
+        
+        for page_text in self._iter_pages(pdf_path):
+            bibliography_pos = parser.feed(page_text)
+            if bibliography_pos is not None:
+                pages.append(page_text[:bibliography_pos])
+                bibliography_found = True
+                break
+            pages.append(page_text)
+        
+        full_text = ''.join(pages)
+        model = parser.model(end=len(full_text))
+        
+        start_pos = model['abstract_start']
+        if start_pos is not None:
+            print(f"Found Abstract section")
+        else:
+            start_pos = 0
+            # If no Abstract found, look for common alternatives
+            for section in model['sections']:
+                name = section['name'].lower()
+                if 'overview' in name or 'introduction' in name:
+                    print(f"Abstract not found, starting from: {section['name']}")
+                    start_pos = section['start']
+                    break
+            
+            if start_pos == 0:
+                print(f"Warning: No Abstract or alternative section found in {pdf_path}")
+        
+        if bibliography_found:
+            print(f"Found bibliography section, stopped after {len(pages)} pages")
+        else:
+            print(f"No bibliography found in first {len(pages)} pages, using text from start position")
+        
+        # Strip surrounding whitespace while keeping section offsets valid
+        end_pos = len(full_text.rstrip())
+        while start_pos < end_pos and full_text[start_pos].isspace():
+            start_pos += 1
+        
+        return {
+            'text': full_text[start_pos:end_pos],
+            'title': model['title'],
+            'sections': rebase_sections(model['sections'], start_pos, end_pos)
+        }
     
     def _extract_text_from_pdf(self, pdf_path: str) -> str:
         """
@@ -77,68 +163,48 @@ class PDFToText:
             str: The extracted text from Abstract to before Bibliography.
         """
         try:
-            full_text = extract_text(pdf_path)
-            
-            # Find the start of Abstract section (case insensitive)
-            abstract_match = re.search(r'\babstract\b', full_text, re.IGNORECASE)
-            
-            start_pos = 0
-            if abstract_match:
-                start_pos = abstract_match.start()
-                print(f"Found Abstract section")
-            else:
-                # If no Abstract found, look for common alternatives
-                alternatives = [r'\boverview\b', r'\bintroduction\b']
-                
-                for pattern in alternatives:
-                    match = re.search(pattern, full_text, re.IGNORECASE)
-                    if match:
-                        print(f"Abstract not found, starting from: {match.group()}")
-                        start_pos = match.start()
-                        break
-                
-                if start_pos == 0:
-                    print(f"Warning: No Abstract or alternative section found in {pdf_path}")
-            
-            # Find the end position (before bibliography)
-            end_pos = self._find_bibliography_start(full_text)
-            
-            if end_pos < len(full_text):
-                print(f"Found bibliography section, text truncated")
-            else:
-                print(f"No bibliography found, using full text from start position")
-            
-            # Extract text between start and end positions
-            extracted_text = full_text[start_pos:end_pos].strip()
-            
-            return extracted_text
-            
+            return self._extract_document(pdf_path)['text']
         except Exception as e:
             print(f"Error extracting text from {pdf_path}: {e}")
             return ""
 
-    def convert_to_text(self) -> List[str]:
+    def convert_to_documents(self) -> List[Dict[str, Any]]:
         """
-        Convert the PDF file(s) to text.
+        Convert the PDF file(s) to text together with their section structure.
 
         Returns:
-            List[str]: List of extracted texts from the PDF files.
+            List[Dict]: For each PDF with extracted text: 'path', 'text', 'title' and 'sections'.
         """
         paths = self._path_to_pdfs()
         if not paths:
             raise ValueError("No PDF files found in the provided path.")
         
-        texts = []
+        documents = []
         for path in paths:
             print(f"Processing: {path}")
-            text = self._extract_text_from_pdf(path)
-            if text:  # Only add non-empty texts
-                texts.append(text)
-                print(f"Extracted {len(text)} characters")
+            try:
+                document = self._extract_document(path)
+            except Exception as e:
+                print(f"Error extracting text from {path}: {e}")
+                continue
+            
+            if document['text']:  # Only add non-empty texts
+                document['path'] = path
+                documents.append(document)
+                print(f"Extracted {len(document['text'])} characters, {len(document['sections'])} sections")
             else:
                 print(f"No text extracted from {path}")
+        
+        return documents
 
-        return texts
+    def convert_to_text(self) -> List[str]:
+        """
+        Convert the PDF file(s) to text.
+
+        Returns:
+            List[str]: List of extracted texts from the PDF files.
+        """
+        return [document['text'] for document in self.convert_to_documents()]
 
 if __name__ == "__main__":
     import os
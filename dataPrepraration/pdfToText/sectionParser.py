@@ -0,0 +1,184 @@
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+import re
+
+# One compiled pattern for every kind of heading we care about. Each line is
+# matched at most once and the named group tells which kind of heading it is,
+# so a document is parsed in a single pass.
+_SECTION_RE = re.compile(
+    r'^[ \t]*(?:'
+    # "References", "7 References", "VII. REFERENCES", "Bibliography", ...
+    r'(?P<references>(?:(?:\d{1,2}|[IVX]{1,5})\.?[ \t]+)?'
+    r'(?i:references|bibliography|literature[ \t]+cited|works[ \t]+cited))[ \t]*$'
+    # "Abstract", "Abstract—We propose ...", "ABSTRACT:"
+    r'|(?P<abstract>(?i:abstract))\b'
+    # "1 Introduction", "3.2 Training data", "II. RELATED WORK"
+    r'|(?P<numbered>(?:\d{1,2}(?:\.\d{1,2}){0,2}|[IVX]{1,5})\.?[ \t]+[A-Z][^\n]{1,80}?)[ \t]*$'
+    # Unnumbered standard headings on their own line
+    r'|(?P<named>(?i:introduction|overview|related[ \t]+work|background|methods?|methodology|experiments?'
+    r'|results|discussion|conclusions?|acknowledge?ments?|appendix))[ \t]*:?[ \t]*$'
+    r')',
+    re.MULTILINE
+)
+
+_MAX_HEADING_WORDS = 10
+
+
+def _classify(match: re.Match) -> Tuple[Optional[str], str]:
+    """Return (kind, name) of a heading match, or (None, '') for a false positive"""
+    kind = match.lastgroup
+    text = ' '.join(match.group(kind).split())
+
+    if kind == 'numbered':
+        # Body text lines that happen to start with a number are long or end a sentence
+        if text.endswith('.') or len(text.split()) > _MAX_HEADING_WORDS:
+            return None, ''
+        return 'section', text
+    if kind == 'named':
+        return 'section', text.rstrip(':').strip().title()
+    if kind == 'abstract':
+        return 'abstract', 'Abstract'
+    return 'references', 'References'
+
+
+class SectionParser:
+    """
+    Incremental structural parser for extracted paper text.
+
+    Text can be fed page by page; every piece is scanned once with a single
+    compiled pattern. Parsing stops at the bibliography heading, which lets
+    callers stop extracting further pages.
+    """
+
+    def __init__(self):
+        self.length = 0
+        self.title: Optional[str] = None
+        self.abstract_start: Optional[int] = None
+        self.references_start: Optional[int] = None
+        self.headings: List[Tuple[int, str, str]] = []
+
+    def feed(self, text: str) -> Optional[int]:
+        """
+        Parse the next piece of text.
+
+        Args:
+            text (str): Next page (or the whole document)
+
+        Returns:
+            Optional[int]: Offset within text where the bibliography starts, or None
+        """
+        first_heading_pos = None
+
+        for match in _SECTION_RE.finditer(text):
+            kind, name = _classify(match)
+            if kind is None:
+                continue
+            if first_heading_pos is None:
+                first_heading_pos = match.start()
+
+            start = self.length + match.start()
+            if kind == 'abstract':
+                if self.abstract_start is not None:
+                    continue
+                self.abstract_start = start
+            elif kind == 'references':
+                self._set_title(text[:first_heading_pos])
+                self.references_start = start
+                self.headings.append((start, name, kind))
+                self.length += match.start()
+                return match.start()
+
+            self.headings.append((start, name, kind))
+
+        self._set_title(text[:first_heading_pos] if first_heading_pos is not None else text)
+        self.length += len(text)
+        return None
+
+    def _set_title(self, front_matter: str) -> None:
+        """Use the first non-empty line before any heading as the title"""
+        if self.title is not None or self.length > 0:
+            return
+        for line in front_matter.splitlines():
+            line = line.strip()
+            if len(line) > 3:
+                self.title = line[:300]
+                return
+        self.title = ''
+
+    def model(self, end: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Build the section model from the headings seen so far.
+
+        Args:
+            end (Optional[int]): Offset where the last section ends (default: all text fed)
+
+        Returns:
+            Dict: title, abstract_start, references_start and sections with
+            name, kind, start and end offsets
+        """
+        end = self.length if end is None else end
+        sections = []
+        for i, (start, name, kind) in enumerate(self.headings):
+            section_end = self.headings[i + 1][0] if i + 1 < len(self.headings) else end
+            sections.append({'name': name, 'kind': kind, 'start': start, 'end': max(section_end, start)})
+
+        return {
+            'title': self.title or '',
+            'abstract_start': self.abstract_start,
+            'references_start': self.references_start,
+            'sections': sections
+        }
+
+
+def parse_sections(text: str) -> Dict[str, Any]:
+    """
+    Parse a whole document into a section model in one pass.
+
+    Args:
+        text (str): Extracted document text
+
+    Returns:
+        Dict: Section model (see SectionParser.model)
+    """
+    parser = SectionParser()
+    parser.feed(text)
+    return parser.model(end=len(text))
+
+
+def rebase_sections(sections: List[Dict[str, Any]], start: int, end: int) -> List[Dict[str, Any]]:
+    """
+    Re-express section offsets relative to text[start:end].
+
+    Args:
+        sections (List[Dict]): Sections with offsets into the original text
+        start (int): Start of the slice
+        end (int): End of the slice
+
+    Returns:
+        List[Dict]: Sections overlapping the slice, clamped to it
+    """
+    rebased = []
+    for section in sections:
+        if section['end'] <= start or section['start'] >= end:
+            continue
+        rebased.append({
+            **section,
+            'start': max(section['start'], start) - start,
+            'end': min(section['end'], end) - start
+        })
+    return rebased
+
+
+def section_at(sections: List[Dict[str, Any]], offset: int) -> Optional[str]:
+    """
+    Return the name of the section containing a character offset.
+
+    Args:
+        sections (List[Dict]): Sections sorted by start offset
+        offset (int): Character offset
+
+    Returns:
+        Optional[str]: Section name, or None if offset precedes all sections
+    """
+    idx = bisect_right([section['start'] for section in sections], offset) - 1
+    return sections[idx]['name'] if idx >= 0 else None
@@ -1,20 +1,46 @@
-from RAG.Generation.generation import Generation
-from dataPrepraration.databasePreparation import DatabasePreparation
+from typing import Any, Dict, Iterator, List, Tuple, Union
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
 
-def rag_answer(query: str, collection_name: str = "scientific_papers") -> str:
+# Warm Generation pipelines by (collections, vector backend), reused by every question
+_rag_systems: Dict[Tuple[Tuple[str, ...], str], Any] = {}
+
+def _get_rag_system(collection_name: Union[str, List[str]] = "scientific_papers", vector_backend: str = 'qdrant'):
+    """
+    Return the Generation pipeline for the collections, creating it on first use
+    
+    The embedding model, vector store clients and caches stay loaded
+    between questions instead of being set up for every answer.
+    """
+    names = (collection_name,) if isinstance(collection_name, str) else tuple(collection_name)
+    key = (names, vector_backend)
+    if key not in _rag_systems:
+        # Heavy ML dependencies are imported on first use
+        from RAG.Generation.generation import Generation
+        _rag_systems[key] = Generation(collection_name=list(names) if len(names) > 1 else names[0], k=10,
+                                       vector_backend=vector_backend)
+    return _rag_systems[key]
+
+def rag_answer(query: str, collection_name: Union[str, List[str]] = "scientific_papers",
+               vector_backend: str = 'qdrant') -> str:
     """
     Simple RAG function for main.py
     
     Args:
         query (str): User question
-        collection_name (str): Qdrant collection name
+        collection_name (Union[str, List[str]]): Qdrant collection name or names
+        vector_backend (str): 'qdrant' or the in-process 'numpy' store
         
     Returns:
         str: Generated answer
     """
     try:
-        # Initialize RAG system
-        rag_system = Generation(collection_name=collection_name, k=10)
+        rag_system = _get_rag_system(collection_name, vector_backend)
         
         # Generate answer
         result = rag_system.generate_answer(query)
@@ -30,17 +56,190 @@ def rag_answer(query: str, collection_name: str = "scientific_papers") -> str:
     except Exception as e:
         return f"An error occurred during response generation: {str(e)}"
 
-def prepare_database_if_needed(query: str):
+def rag_answer_batch(queries: List[str], collection_name: Union[str, List[str]] = "scientific_papers",
+                     max_workers: int = 4, vector_backend: str = 'qdrant', retrieval_batch_size: int = 32,
+                     retrieval_workers: int = 1) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Answer many questions with batched retrieval overlapping generation, yielding results as they finish
+    
+    Args:
+        queries (List[str]): User questions
+        collection_name (Union[str, List[str]]): Qdrant collection name or names
+        max_workers (int): Maximum number of concurrent LLM requests
+        vector_backend (str): 'qdrant' or the in-process 'numpy' store
+        retrieval_batch_size (int): Questions embedded and searched together
+        retrieval_workers (int): Retrieval batches run concurrently
+        
+    Yields:
+        Tuple[int, Dict]: Index of the question and its generation result (with per-stage timings)
+    """
+    rag_system = _get_rag_system(collection_name, vector_backend)
+    yield from rag_system.generate_answers_pipelined(queries, max_workers=max_workers,
+                                                     retrieval_batch_size=retrieval_batch_size,
+                                                     retrieval_workers=retrieval_workers)
+
+def _read_batch_questions(input_path: str, input_format: str = 'auto') -> List[Dict[str, Any]]:
+    """
+    Read questions from a file ('-' for stdin).
+    
+    In 'jsonl' format each line is an object with a "question" (or "query")
+    field and an optional "id"; in 'text' format each line is a question.
+    'auto' decides per line: lines starting with "{" are JSON. Questions
+    without an id get their line number.
+    """
+    stream = sys.stdin if input_path == '-' else open(input_path, 'r', encoding='utf-8')
+    questions = []
+    try:
+        for line_number, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line:
+                continue
+            if input_format == 'jsonl' or (input_format == 'auto' and line.startswith('{')):
+                record = json.loads(line)
+                questions.append({
+                    'id': record.get('id', line_number),
+                    'question': record.get('question') or record.get('query') or ''
+                })
+            else:
+                questions.append({'id': line_number, 'question': line})
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    return questions
+
+def _completed_ids(output_path: str) -> set:
+    """
+    Ids of questions already answered without error in a partial output file.
+    
+    The file is rewritten without the failed results, which are answered
+    again, and without a last line cut off by an interrupted run, so every
+    id ends up with one result after the resumed run.
+    """
+    if not os.path.exists(output_path):
+        return set()
+    completed = set()
+    kept = []
+    rewrite = False
+    with open(output_path, 'rb') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                rewrite = True
+                break
+            if not line.endswith(b"\n"):
+                rewrite = True
+                break
+            if record.get('error'):
+                rewrite = True
+                continue
+            completed.add(json.dumps(record.get('id')))
+            kept.append(line)
+    if rewrite:
+        # Replaced atomically so stopping now never loses earlier answers
+        directory = os.path.dirname(output_path) or '.'
+        fd, tmp_path = tempfile.mkstemp(prefix=f"{os.path.basename(output_path)}.", suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.writelines(kept)
+            os.replace(tmp_path, output_path)
+        except OSError:
+            os.remove(tmp_path)
+            raise
+    return completed
+
+def run_batch(input_path: str, output_path: str = '-', collection_name: Union[str, List[str]] = "scientific_papers",
+              max_workers: int = 4, vector_backend: str = 'qdrant', retrieval_batch_size: int = 32,
+              retrieval_workers: int = 1, input_format: str = 'auto', resume: bool = False) -> Dict[str, Any]:
+    """
+    Answer all questions from a file and write JSONL results in completion order
+    
+    Every result line carries per-stage timings in milliseconds. With resume,
+    questions whose id already has an error-free result in output_path are
+    skipped, earlier failed results are removed and new results are appended,
+    so an interrupted run continues where it stopped and retries its failures.
+    
+    Returns:
+        Dict: Number of answered, skipped and failed questions, throughput and mean stage timings
+    """
+    questions = _read_batch_questions(input_path, input_format)
+    if resume and output_path != '-':
+        completed = _completed_ids(output_path)
+        skipped = len(questions)
+        questions = [item for item in questions if json.dumps(item['id']) not in completed]
+        skipped -= len(questions)
+    else:
+        skipped = 0
+    
+    if output_path == '-':
+        out = sys.stdout
+    else:
+        directory = os.path.dirname(output_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        out = open(output_path, 'a' if resume else 'w', encoding='utf-8')
+    
+    start = time.perf_counter()
+    stage_totals = {'retrieval': 0.0, 'queue': 0.0, 'generation': 0.0, 'total': 0.0}
+    answered = failed = 0
+    try:
+        queries = [item['question'] for item in questions]
+        for index, result in rag_answer_batch(queries, collection_name=collection_name, max_workers=max_workers,
+                                              vector_backend=vector_backend, retrieval_batch_size=retrieval_batch_size,
+                                              retrieval_workers=retrieval_workers):
+            timings = result.get('timings', {})
+            out.write(json.dumps({
+                'id': questions[index]['id'],
+                'question': questions[index]['question'],
+                'answer': result.get('answer', ''),
+                'sources': result.get('sources', []),
+                'error': result.get('error'),
+                'timings_ms': {stage: round(seconds * 1000, 1) for stage, seconds in timings.items()}
+            }, ensure_ascii=False) + "\n")
+            out.flush()
+            for stage in stage_totals:
+                stage_totals[stage] += timings.get(stage, 0.0)
+            answered += 1
+            failed += bool(result.get('error'))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    
+    elapsed = time.perf_counter() - start
+    summary = {
+        'answered': answered,
+        'failed': failed,
+        'skipped': skipped,
+        'seconds': round(elapsed, 3),
+        'questions_per_second': round(answered / elapsed, 3) if elapsed > 0 and answered else 0.0,
+        'mean_ms': {stage: round(total * 1000 / answered, 1) if answered else 0.0 for stage, total in stage_totals.items()},
+    }
+    # Summary on stderr so stdout stays pure JSONL
+    print(f"Batch finished: {json.dumps(summary)}", file=sys.stderr)
+    return summary
+
+def prepare_database_if_needed(query: str, collection_name: str = "scientific_papers", vector_backend: str = 'qdrant',
+                               translator_backend: str = 'google'):
     """
     Prepare database with relevant articles based on user query
+    
+    Args:
+        query (str): Topic used to search arXiv
+        collection_name (str): Collection to fill
+        vector_backend (str): 'qdrant' or the in-process 'numpy' store
+        translator_backend (str): 'google' or the offline 'argos' translator for non-English topics
     """
     print("Preparing database based on your question...")
     
     try:
+        from dataPrepraration.databasePreparation import DatabasePreparation
         db_preparation = DatabasePreparation(
             user_query=query, 
             max_results=100,  # Smaller number for faster tests
-            download_directory='archive'
+            download_directory='archive',
+            collection_name=collection_name,
+            vector_backend=vector_backend,
+            translator_backend=translator_backend
         )
         
         db_preparation.prepare_database()
@@ -51,7 +250,18 @@ def prepare_database_if_needed(query: str):
         print(f"Error during database preparation: {e}")
         return False
 
-if __name__ == "__main__":
+def interactive_mode(collection_name: Union[str, List[str]] = "scientific_papers", vector_backend: str = 'qdrant',
+                     translator_backend: str = 'google'):
+    """
+    Interactive question-answer loop
+    
+    Args:
+        collection_name (Union[str, List[str]]): Collection or collections searched; 'prepare'
+            fills the first one
+        vector_backend (str): 'qdrant' or the in-process 'numpy' store
+        translator_backend (str): Translator used when preparing the database
+    """
+    names = [collection_name] if isinstance(collection_name, str) else list(collection_name)
     print("RAG Research Agent - Scientific Assistant")
     print("Ask a question, and I'll retrieve relevant articles and answer based on the latest research.")
     print("Type 'exit' to quit, 'prepare' to prepare a new database.\n")
@@ -68,7 +278,7 @@ if __name__ == "__main__":
         if user_query.lower() == "prepare":
             query_for_prep = input("Provide topic for database preparation for database name: ").strip()
             if query_for_prep:
-                database_prepared = prepare_database_if_needed(query_for_prep)
+                database_prepared = prepare_database_if_needed(query_for_prep, names[0], vector_backend, translator_backend)
             continue
             
         if not user_query:
@@ -78,7 +288,7 @@ if __name__ == "__main__":
         # Prepare database if not already prepared
         if not database_prepared:
             print("First use - preparing database...")
-            database_prepared = prepare_database_if_needed(user_query)
+            database_prepared = prepare_database_if_needed(user_query, names[0], vector_backend, translator_backend)
             if not database_prepared:
                 print("Cannot continue without prepared database.")
                 continue
@@ -87,10 +297,48 @@ if __name__ == "__main__":
         
         try:
             print("Question:\n", user_query)
-            answer = rag_answer(user_query)
+            answer = rag_answer(user_query, collection_name, vector_backend)
             print(f"\nAnswer:\n{answer}\n")
             print("-" * 80)
             
         except Exception as e:
             print(f"Error during response generation: {e}")
             print("Try again or type 'prepare' to prepare the database anew.\n")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RAG Research Agent - Scientific Assistant")
+    parser.add_argument('--batch', metavar='FILE', help="Answer questions from a text or JSONL file ('-' for stdin) instead of the interactive prompt")
+    parser.add_argument('--format', choices=['auto', 'text', 'jsonl'], default='auto',
+                        help="Batch input format: one question per line, JSONL objects, or decided per line (default)")
+    parser.add_argument('--output', default='-', help="Where to write JSONL results in batch mode (default: stdout)")
+    parser.add_argument('--resume', action='store_true',
+                        help="Skip questions already answered in --output, retry failed ones and append the remaining results")
+    parser.add_argument('--workers', type=int, default=4, help="Maximum number of concurrent LLM requests in batch mode")
+    parser.add_argument('--retrieval-batch', type=int, default=32, help="Questions embedded and searched together in batch mode")
+    parser.add_argument('--retrieval-workers', type=int, default=1, help="Retrieval batches run concurrently in batch mode")
+    parser.add_argument('--prepare', metavar='TOPIC', help="Prepare the database for TOPIC before answering the batch")
+    parser.add_argument('--collection', default='scientific_papers',
+                        help="Qdrant collection name, or several comma-separated collections searched together")
+    parser.add_argument('--backend', choices=['qdrant', 'numpy'], default='qdrant',
+                        help="Vector store: Qdrant server or the in-process NumPy store")
+    parser.add_argument('--translator', choices=['google', 'argos'], default='google',
+                        help="Translator of non-English topics when preparing the database ('argos' works offline)")
+    args = parser.parse_args()
+    collections = args.collection.split(',')
+    
+    if args.batch:
+        if args.resume and args.output == '-':
+            parser.error("--resume needs an --output file")
+        if args.prepare:
+            if len(collections) > 1:
+                parser.error("--prepare fills a single --collection")
+            # Progress messages go to stderr so JSONL results on stdout stay clean
+            with contextlib.redirect_stdout(sys.stderr):
+                prepared = prepare_database_if_needed(args.prepare, collections[0], args.backend, args.translator)
+            if not prepared:
+                sys.exit(1)
+        run_batch(args.batch, output_path=args.output, collection_name=collections, max_workers=args.workers,
+                  vector_backend=args.backend, retrieval_batch_size=args.retrieval_batch,
+                  retrieval_workers=args.retrieval_workers, input_format=args.format, resume=args.resume)
+    else:
+        interactive_mode(collections, args.backend, args.translator)
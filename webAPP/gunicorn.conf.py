@@ -0,0 +1,29 @@
+"""
+Gunicorn configuration with preloaded, shared models.
+
+    cd webAPP && gunicorn -c gunicorn.conf.py
+
+The application (and with RAG_PRELOAD_MODELS=1 the embedding and KeyBERT
+models) is loaded once in the master process; workers are forked from it and
+share the model weights copy-on-write.
+"""
+import os
+
+os.environ.setdefault('RAG_PRELOAD_MODELS', '1')
+
+wsgi_app = 'webAPP.wsgi:application'
+bind = os.environ.get('GUNICORN_BIND', '127.0.0.1:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', '4'))
+preload_app = True
+# Answers can take minutes on a local LLM
+timeout = 600
+
+
+def post_fork(server, worker):
+    if os.environ.get('RAG_PRELOAD_MODELS') != '1':
+        return
+    from dataPrepraration.embedding.sharedModels import after_fork
+
+    # Split the CPUs between workers instead of every worker using all of them
+    threads = after_fork(num_threads=max(1, (os.cpu_count() or 1) // workers))
+    server.log.info(f"Worker {worker.pid}: {threads} PyTorch threads")
@@ -4,3 +4,16 @@ from django.apps import AppConfig
 class ResearchRagConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'research_rag'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+        from .configcache import configuration_changed
+        from .models import RAGConfiguration
+        from .services import drop_pipeline
+
+        # Every change of a configuration invalidates the configuration caches of all workers
+        post_save.connect(configuration_changed, sender=RAGConfiguration, dispatch_uid='rag_configuration_saved')
+        post_delete.connect(configuration_changed, sender=RAGConfiguration, dispatch_uid='rag_configuration_deleted')
+        # Pipelines of other workers are rebuilt when they see the changed fields
+        post_save.connect(drop_pipeline, sender=RAGConfiguration, dispatch_uid='rag_pipeline_saved')
+        post_delete.connect(drop_pipeline, sender=RAGConfiguration, dispatch_uid='rag_pipeline_deleted')
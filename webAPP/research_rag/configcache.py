@@ -0,0 +1,151 @@
+import copy
+import os
+import threading
+from typing import List, Optional, Tuple
+
+from .models import RAGConfiguration
+
+DEFAULT_VERSION_PATH = os.path.join('cache', 'config_version')
+
+
+class ConfigurationCache:
+    """
+    In-process cache of the active configuration and of the configuration list.
+
+    Every save or delete of a RAGConfiguration bumps a version counter kept
+    in a small file next to the other caches. Each process compares the
+    file's stat signature with the one its cache was filled under, so a
+    change made by any worker is seen by all of them at the cost of one
+    stat() call per lookup instead of database queries.
+    """
+
+    def __init__(self, version_path: str = DEFAULT_VERSION_PATH):
+        """
+        Args:
+            version_path (str): File holding the configuration version counter
+        """
+        self.version_path = version_path
+        self._lock = threading.Lock()
+        self._token: Optional[Tuple[int, int, int]] = None
+        self._active: Optional[RAGConfiguration] = None
+        self._configurations: Optional[List[RAGConfiguration]] = None
+        self.hits = 0
+        self.misses = 0
+
+    def _current_token(self) -> Tuple[int, int, int]:
+        try:
+            stat = os.stat(self.version_path)
+        except FileNotFoundError:
+            return (0, 0, 0)
+        # os.replace gives every version a new inode, so the token changes even within one mtime tick
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _validate(self) -> None:
+        """Drop the cached entries if another process (or this one) changed a configuration"""
+        token = self._current_token()
+        if token != self._token:
+            self._token = token
+            self._active = None
+            self._configurations = None
+
+    @property
+    def version(self) -> int:
+        """Current value of the version counter"""
+        try:
+            with open(self.version_path, 'r', encoding='utf-8') as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def get_active(self) -> RAGConfiguration:
+        """
+        Return the active configuration (see RAGConfiguration.get_active_config).
+
+        Returns:
+            RAGConfiguration: A copy of the cached instance, safe to modify
+        """
+        with self._lock:
+            self._validate()
+            if self._active is not None:
+                self.hits += 1
+                return copy.copy(self._active)
+            token = self._token
+        self.misses += 1
+        # get_active_config may activate a configuration, which bumps the version through the signals
+        active = RAGConfiguration.get_active_config()
+        with self._lock:
+            self._validate()
+            if self._token == token:
+                self._active = active
+        return copy.copy(active)
+
+    def get_all(self) -> List[RAGConfiguration]:
+        """
+        Return all configurations, most recently updated first.
+
+        Returns:
+            List[RAGConfiguration]: Copies of the cached instances
+        """
+        with self._lock:
+            self._validate()
+            if self._configurations is not None:
+                self.hits += 1
+                return [copy.copy(config) for config in self._configurations]
+            token = self._token
+        self.misses += 1
+        configurations = list(RAGConfiguration.objects.all().order_by('-updated_at'))
+        with self._lock:
+            self._validate()
+            if self._token == token:
+                self._configurations = configurations
+        return [copy.copy(config) for config in configurations]
+
+    def bump(self) -> int:
+        """
+        Increment the version counter so every process reloads its configurations.
+
+        Returns:
+            int: The new version
+        """
+        with self._lock:
+            version = self.version + 1
+            directory = os.path.dirname(self.version_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.version_path}.{os.getpid()}.tmp"
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(str(version))
+                os.replace(tmp_path, self.version_path)
+            except OSError as e:
+                print(f"Could not write configuration version to {self.version_path}: {e}")
+            # Invalidate this process even if the file could not be written
+            self._token = None
+            self._active = None
+            self._configurations = None
+            return version
+
+
+_configuration_cache: Optional[ConfigurationCache] = None
+
+
+def configure_configuration_cache(version_path: str = DEFAULT_VERSION_PATH) -> ConfigurationCache:
+    """Replace the shared configuration cache with one using the given version file"""
+    global _configuration_cache
+    _configuration_cache = ConfigurationCache(version_path)
+    return _configuration_cache
+
+
+def get_configuration_cache() -> ConfigurationCache:
+    """Return the configuration cache shared by the requests of this process"""
+    global _configuration_cache
+    if _configuration_cache is None:
+        from django.conf import settings
+        _configuration_cache = ConfigurationCache(getattr(settings, 'RAG_CONFIG_VERSION_PATH', DEFAULT_VERSION_PATH))
+    return _configuration_cache
+
+
+def configuration_changed(sender, **kwargs) -> None:
+    """post_save/post_delete receiver: bump the version once the change is committed"""
+    from django.db import transaction
+    transaction.on_commit(get_configuration_cache().bump)
@@ -13,7 +13,7 @@ class RAGConfigurationForm(forms.ModelForm):
         model = RAGConfiguration
         fields = [
             'name', 'model_name', 'ollama_url', 'temperature', 'max_tokens',
-            'collection_name', 'k_chunks', 'max_papers', 'download_directory', 'is_active'
+            'collection_name', 'extra_collections', 'vector_backend', 'k_chunks', 'paper_top_n', 'max_papers', 'download_directory', 'is_active'
         ]
         
         widgets = {
@@ -44,11 +44,23 @@ class RAGConfigurationForm(forms.ModelForm):
                 'class': 'form-control',
                 'placeholder': 'scientific_papers'
             }),
+            'extra_collections': forms.TextInput(attrs={
+                'class': 'form-control',
+                'placeholder': 'quantum_papers, medicine_papers'
+            }),
+            'vector_backend': forms.Select(attrs={
+                'class': 'form-select'
+            }),
             'k_chunks': forms.NumberInput(attrs={
                 'class': 'form-control',
                 'min': '1',
                 'max': '50'
             }),
+            'paper_top_n': forms.NumberInput(attrs={
+                'class': 'form-control',
+                'min': '0',
+                'max': '500'
+            }),
             'max_papers': forms.NumberInput(attrs={
                 'class': 'form-control',
                 'min': '5',
@@ -70,7 +82,10 @@ class RAGConfigurationForm(forms.ModelForm):
             'temperature': 'Temperature',
             'max_tokens': 'Max Tokens',
             'collection_name': 'Collection Name',
+            'extra_collections': 'Extra Collections',
+            'vector_backend': 'Vector Store',
             'k_chunks': 'K Chunks',
+            'paper_top_n': 'Preselected Papers',
             'max_papers': 'Max Papers',
             'download_directory': 'Download Directory',
             'is_active': 'Is Active'
@@ -126,6 +141,31 @@ class DatabasePreparationForm(forms.Form):
         help_text="Leave empty to use value from active configuration",
         required=False
     )
+    
+    ingestion_mode = forms.ChoiceField(
+        choices=[
+            ('full', 'Full text (download and embed all PDFs now)'),
+            ('abstracts', 'Abstracts first (full texts indexed on first retrieval)'),
+        ],
+        initial='full',
+        widget=forms.Select(attrs={'class': 'form-select'}),
+        label="Ingestion mode",
+        help_text="Abstracts-first mode makes the topic searchable within seconds and downloads only papers that are actually retrieved"
+    )
+    
+    incremental = forms.BooleanField(
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+        label="Only new papers",
+        help_text="Fetch only papers submitted since the last preparation of this topic",
+        required=False
+    )
+    
+    rebuild = forms.BooleanField(
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+        label="Build in background",
+        help_text="Ingest into a new collection version and switch to it when indexing is finished, without slowing down live queries",
+        required=False
+    )
 
 
 class ModelTestForm(forms.Form):
@@ -0,0 +1,76 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.forms.models import model_to_dict
+
+from research_rag.models import RAGConfiguration
+
+# Configuration fields that describe a node rather than the prepared data
+NODE_FIELDS = ('id', 'is_active', 'created_at', 'updated_at')
+
+
+class Command(BaseCommand):
+    """
+    Export a prepared collection to a snapshot file or provision a node from one.
+
+        python manage.py collection_snapshot export snapshots/physics.tar.gz
+        python manage.py collection_snapshot import snapshots/physics.tar.gz --create-config
+    """
+    help = "Export a collection to a compressed snapshot or import one with checksum verification"
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['export', 'import'])
+        parser.add_argument('path', help="Snapshot file (.tar.gz)")
+        parser.add_argument('--config', help="Configuration name (default: active configuration)")
+        parser.add_argument('--collection', help="Collection to export or import into (default: from the configuration or snapshot)")
+        parser.add_argument('--create-config', action='store_true',
+                            help="On import, create the snapshot's configuration if no configuration has its name")
+        parser.add_argument('--host', default='localhost')
+        parser.add_argument('--port', type=int, default=6333)
+
+    def _get_config(self, name):
+        if not name:
+            return RAGConfiguration.get_active_config()
+        try:
+            return RAGConfiguration.objects.get(name=name)
+        except RAGConfiguration.DoesNotExist:
+            raise CommandError(f"Configuration '{name}' does not exist")
+
+    def handle(self, *args, **options):
+        from dataPrepraration.embedding.collectionSnapshot import export_snapshot, import_snapshot, read_manifest
+        from dataPrepraration.embedding.embeddingArticle import create_vector_client
+        from research_rag.services import _configure_storage
+        _configure_storage()
+
+        try:
+            if options['action'] == 'export':
+                config = self._get_config(options['config'])
+                client = create_vector_client(config.vector_backend, options['host'], options['port'])
+                manifest = export_snapshot(
+                    client, options['collection'] or config.collection_name, options['path'],
+                    config=model_to_dict(config, exclude=NODE_FIELDS)
+                )
+                self.stdout.write(self.style.SUCCESS(
+                    f"Exported {manifest['parts']['chunks']['points']} chunks of "
+                    f"{len(manifest['papers'])} papers to {options['path']}"
+                ))
+                return
+
+            manifest = read_manifest(options['path'])
+            snapshot_config = manifest.get('config') or {}
+            if options['config'] or not options['create_config']:
+                config = self._get_config(options['config'])
+            else:
+                config, created = RAGConfiguration.objects.get_or_create(
+                    name=snapshot_config.get('name') or manifest['collection'],
+                    defaults={key: value for key, value in snapshot_config.items() if key != 'name'}
+                )
+                if created:
+                    self.stdout.write(f"Created configuration '{config.name}'")
+
+            client = create_vector_client(config.vector_backend, options['host'], options['port'])
+            import_snapshot(client, options['path'], options['collection'] or config.collection_name)
+            self.stdout.write(self.style.SUCCESS(
+                f"Imported {manifest['parts']['chunks']['points']} chunks of {len(manifest['papers'])} papers "
+                f"into {options['collection'] or config.collection_name}"
+            ))
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
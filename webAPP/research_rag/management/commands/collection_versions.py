@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from qdrant_client import QdrantClient
+
+from dataPrepraration.embedding.collectionVersions import CollectionVersions
+from research_rag.models import RAGConfiguration
+
+
+class Command(BaseCommand):
+    """
+    Inspect and manage blue/green versions of a collection.
+
+        python manage.py collection_versions list
+        python manage.py collection_versions rollback
+        python manage.py collection_versions gc --keep 2
+    """
+    help = "List, roll back or garbage collect versions of a Qdrant collection"
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['list', 'rollback', 'gc'])
+        parser.add_argument('--collection', help="Collection alias (default: active configuration's collection)")
+        parser.add_argument('--keep', type=int, default=2, help="Versions kept by gc")
+        parser.add_argument('--host', default='localhost')
+        parser.add_argument('--port', type=int, default=6333)
+
+    def handle(self, *args, **options):
+        alias = options['collection'] or RAGConfiguration.get_active_config().collection_name
+        versions = CollectionVersions(QdrantClient(host=options['host'], port=options['port']), alias)
+
+        try:
+            if options['action'] == 'list':
+                active = versions.active_version()
+                for version in versions.versions():
+                    self.stdout.write(f"{'*' if version == active else ' '} {version}")
+                if active is None:
+                    self.stdout.write(f"{alias} is not versioned yet")
+            elif options['action'] == 'rollback':
+                self.stdout.write(self.style.SUCCESS(f"{alias} -> {versions.rollback()}"))
+            else:
+                deleted = versions.garbage_collect(keep=options['keep'])
+                self.stdout.write(self.style.SUCCESS(f"Deleted {len(deleted)} old versions"))
+        except ValueError as e:
+            raise CommandError(str(e))
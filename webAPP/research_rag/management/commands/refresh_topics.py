@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from research_rag.models import DatabasePreparationLog
+from research_rag.services import DatabaseService
+
+
+class Command(BaseCommand):
+    """
+    Refresh every previously prepared topic with papers submitted since its last run.
+
+    Intended to be scheduled (e.g. daily from cron):
+        python manage.py refresh_topics --mode abstracts
+    """
+    help = "Ingest only new arXiv papers for all topics prepared so far"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=['full', 'abstracts'], default='full',
+                            help="Ingestion mode for the new papers")
+        parser.add_argument('--topic', action='append', dest='topics',
+                            help="Refresh only this topic (can be repeated)")
+
+    def handle(self, *args, **options):
+        topics = options['topics'] or list(
+            DatabasePreparationLog.objects.filter(status='completed')
+            .values_list('search_query', flat=True).distinct()
+        )
+        if not topics:
+            self.stdout.write("No prepared topics to refresh.")
+            return
+
+        db_service = DatabaseService()
+        for topic in topics:
+            self.stdout.write(f"Refreshing: {topic}")
+            try:
+                log_entry = db_service.prepare_database(topic, mode=options['mode'], incremental=True)
+                self.stdout.write(self.style.SUCCESS(f"  {log_entry.papers_processed} new papers ingested"))
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"  Error: {e}"))
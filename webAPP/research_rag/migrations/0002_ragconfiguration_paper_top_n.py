@@ -0,0 +1,17 @@
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('research_rag', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ragconfiguration',
+            name='paper_top_n',
+            field=models.IntegerField(default=20, help_text='Number of papers preselected by abstract before searching chunks (0 = search all chunks)', validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(500)]),
+        ),
+    ]
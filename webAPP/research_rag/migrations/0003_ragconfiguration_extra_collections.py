@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('research_rag', '0002_ragconfiguration_paper_top_n'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ragconfiguration',
+            name='extra_collections',
+            field=models.CharField(blank=True, default='', help_text='Comma-separated collections searched together with the main collection (empty = main collection only)', max_length=500),
+        ),
+    ]
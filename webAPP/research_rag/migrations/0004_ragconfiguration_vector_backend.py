@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('research_rag', '0003_ragconfiguration_extra_collections'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ragconfiguration',
+            name='vector_backend',
+            field=models.CharField(choices=[('qdrant', 'Qdrant server'), ('numpy', 'In-process (NumPy)')], default='qdrant', help_text='Vector store: Qdrant server or in-process exact search without a server (small collections)', max_length=20),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('research_rag', '0004_ragconfiguration_vector_backend'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='databasepreparationlog',
+            name='chunks_deduplicated',
+            field=models.IntegerField(default=0, help_text='Number of near-duplicate chunks skipped before embedding'),
+        ),
+    ]
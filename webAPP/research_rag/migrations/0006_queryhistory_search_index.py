@@ -0,0 +1,81 @@
+from django.db import migrations, models
+from django.db.utils import OperationalError
+
+FTS_TABLE = 'research_rag_queryhistory_fts'
+HISTORY_TABLE = 'research_rag_queryhistory'
+
+SQLITE_CREATE = [
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        query_text, response_text,
+        content='{HISTORY_TABLE}', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON {HISTORY_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, query_text, response_text) VALUES (new.id, new.query_text, new.response_text);
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON {HISTORY_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, query_text, response_text) VALUES ('delete', old.id, old.query_text, old.response_text);
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE OF query_text, response_text ON {HISTORY_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, query_text, response_text) VALUES ('delete', old.id, old.query_text, old.response_text);
+        INSERT INTO {FTS_TABLE}(rowid, query_text, response_text) VALUES (new.id, new.query_text, new.response_text);
+    END""",
+    # Index the rows stored before this migration
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_DROP = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_insert",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_delete",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_update",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+POSTGRESQL_CREATE = [
+    f"""CREATE INDEX {FTS_TABLE} ON {HISTORY_TABLE} USING GIN (
+        to_tsvector('simple', coalesce(query_text, '') || ' ' || coalesce(response_text, ''))
+    )""",
+]
+
+POSTGRESQL_DROP = [f"DROP INDEX IF EXISTS {FTS_TABLE}"]
+
+
+def _execute(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        try:
+            _execute(schema_editor, SQLITE_CREATE)
+        except OperationalError as e:
+            # SQLite built without FTS5: history search falls back to substring matching
+            _execute(schema_editor, SQLITE_DROP)
+            print(f"\n  Full-text index of the query history not created: {e}")
+    elif vendor == 'postgresql':
+        _execute(schema_editor, POSTGRESQL_CREATE)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _execute(schema_editor, SQLITE_DROP)
+    elif vendor == 'postgresql':
+        _execute(schema_editor, POSTGRESQL_DROP)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('research_rag', '0005_databasepreparationlog_chunks_deduplicated'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='queryhistory',
+            index=models.Index(fields=['-created_at', '-id'], name='rag_history_created_idx'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
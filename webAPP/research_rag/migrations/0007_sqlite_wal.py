@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+def set_journal_mode(mode):
+    def apply(apps, schema_editor):
+        # The journal mode is stored in the database file, so it is set once
+        # here instead of on every connection
+        if schema_editor.connection.vendor == 'sqlite':
+            with schema_editor.connection.cursor() as cursor:
+                cursor.execute(f"PRAGMA journal_mode={mode}")
+    return apply
+
+
+class Migration(migrations.Migration):
+    # SQLite cannot change into WAL mode inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('research_rag', '0006_queryhistory_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(set_journal_mode('WAL'), set_journal_mode('DELETE')),
+    ]
@@ -0,0 +1,156 @@
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# Shown while a server's catalog has never been fetched
+DEFAULT_MODELS = ['llama3:8b', 'mistral', 'codellama']
+
+DEFAULT_REFRESH_INTERVAL = 60.0
+DEFAULT_TIMEOUT = 10.0
+
+
+class OllamaCatalog:
+    """
+    Models of one Ollama server, refreshed in the background.
+
+    Readers get the last fetched state immediately; when it is older than
+    refresh_interval a single background thread fetches /api/tags (installed
+    models and their sizes) and /api/ps (models loaded in memory), so a slow
+    or unreachable server never delays a page.
+    """
+
+    def __init__(self, ollama_url: str, refresh_interval: float = DEFAULT_REFRESH_INTERVAL,
+                 timeout: float = DEFAULT_TIMEOUT):
+        """
+        Args:
+            ollama_url (str): URL of the Ollama server
+            refresh_interval (float): Age in seconds after which the catalog is refreshed
+            timeout (float): Timeout of each request to the server
+        """
+        self.ollama_url = ollama_url.rstrip('/')
+        self.refresh_interval = refresh_interval
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._models: List[Dict[str, Any]] = []
+        self._fetched_at: Optional[float] = None
+        self._checked_at: Optional[float] = None
+        self._error: Optional[str] = None
+        self._refreshing = False
+
+    def _fetch(self) -> List[Dict[str, Any]]:
+        import requests
+
+        response = requests.get(f"{self.ollama_url}/api/tags", timeout=self.timeout)
+        response.raise_for_status()
+        loaded = {}
+        try:
+            ps = requests.get(f"{self.ollama_url}/api/ps", timeout=self.timeout)
+            if ps.status_code == 200:
+                loaded = {model['name']: model for model in ps.json().get('models', [])}
+        except requests.exceptions.RequestException:
+            # Older servers have no /api/ps; the loaded state is then unknown
+            pass
+
+        models = []
+        for model in response.json().get('models', []):
+            details = model.get('details') or {}
+            running = loaded.get(model['name'])
+            models.append({
+                'name': model['name'],
+                'size': model.get('size'),
+                'parameter_size': details.get('parameter_size'),
+                'quantization': details.get('quantization_level'),
+                'modified_at': model.get('modified_at'),
+                'loaded': running is not None,
+                'size_vram': running.get('size_vram') if running else None,
+                'expires_at': running.get('expires_at') if running else None,
+            })
+        return models
+
+    def refresh(self) -> bool:
+        """
+        Fetch the catalog in the calling thread.
+
+        Returns:
+            bool: Whether the server answered
+        """
+        try:
+            models = self._fetch()
+        except Exception as e:
+            with self._lock:
+                self._checked_at = time.time()
+                self._error = str(e)
+                self._refreshing = False
+            return False
+        with self._lock:
+            self._models = models
+            self._fetched_at = self._checked_at = time.time()
+            self._error = None
+            self._refreshing = False
+        return True
+
+    def refresh_in_background(self, force: bool = False) -> bool:
+        """
+        Start a background refresh if the catalog is stale and none is running.
+
+        Args:
+            force (bool): Refresh even if the catalog is fresh
+
+        Returns:
+            bool: Whether a refresh was started
+        """
+        with self._lock:
+            fresh = self._checked_at is not None and time.time() - self._checked_at < self.refresh_interval
+            if self._refreshing or (fresh and not force):
+                return False
+            self._refreshing = True
+        threading.Thread(target=self.refresh, name='ollama-catalog-refresh', daemon=True).start()
+        return True
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Return the current catalog without waiting for the server.
+
+        A stale catalog is returned as is and refreshed in the background.
+
+        Returns:
+            Dict: ollama_url, models, fetched_at and age (seconds, None if never
+                fetched), stale, reachable (None if not checked yet), error and refreshing
+        """
+        self.refresh_in_background()
+        now = time.time()
+        with self._lock:
+            age = now - self._fetched_at if self._fetched_at is not None else None
+            return {
+                'ollama_url': self.ollama_url,
+                'models': [dict(model) for model in self._models],
+                'fetched_at': self._fetched_at,
+                'age': age,
+                'stale': age is None or age >= self.refresh_interval or self._error is not None,
+                'reachable': None if self._checked_at is None else self._error is None,
+                'error': self._error,
+                'refreshing': self._refreshing,
+            }
+
+
+_catalogs: Dict[str, OllamaCatalog] = {}
+_catalog_options: Dict[str, Any] = {}
+_catalogs_lock = threading.Lock()
+
+
+def configure_model_catalog(**options) -> None:
+    """Set the options (refresh_interval, timeout) of catalogs created from now on"""
+    global _catalog_options
+    with _catalogs_lock:
+        _catalog_options = dict(options)
+        _catalogs.clear()
+
+
+def get_model_catalog(ollama_url: str) -> OllamaCatalog:
+    """Return the catalog of an Ollama server shared by the requests of this process"""
+    key = ollama_url.rstrip('/')
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            catalog = _catalogs[key] = OllamaCatalog(key, **_catalog_options)
+        return catalog
@@ -1,5 +1,21 @@
-from django.db import models
+from django.db import connections, models
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
 from django.core.validators import MinValueValidator, MaxValueValidator
+from typing import Optional
+import re
+
+from .pagination import KeysetPage, decode_cursor
+
+# Full-text index of QueryHistory created by migration 0006: an FTS5 table
+# kept in sync by triggers on SQLite, a GIN expression index on PostgreSQL.
+# Note: on SQLite, a migration that rebuilds the query history table drops
+# the triggers; recreate them with the statements in migration 0006.
+HISTORY_FTS_TABLE = 'research_rag_queryhistory_fts'
+HISTORY_TSVECTOR = "to_tsvector('simple', coalesce(query_text, '') || ' ' || coalesce(response_text, ''))"
+
+_fts_tables = {}
+
 
 class RAGConfiguration(models.Model):
     """
@@ -39,11 +55,31 @@ class RAGConfiguration(models.Model):
         default="scientific_papers",
         help_text="Collection name in Qdrant vector database"
     )
+    extra_collections = models.CharField(
+        max_length=500,
+        blank=True,
+        default="",
+        help_text="Comma-separated collections searched together with the main collection (empty = main collection only)"
+    )
+    vector_backend = models.CharField(
+        max_length=20,
+        choices=[
+            ('qdrant', 'Qdrant server'),
+            ('numpy', 'In-process (NumPy)'),
+        ],
+        default='qdrant',
+        help_text="Vector store: Qdrant server or in-process exact search without a server (small collections)"
+    )
     k_chunks = models.IntegerField(
         default=10,
         validators=[MinValueValidator(1), MaxValueValidator(50)],
         help_text="Number of text chunks to retrieve as context"
     )
+    paper_top_n = models.IntegerField(
+        default=20,
+        validators=[MinValueValidator(0), MaxValueValidator(500)],
+        help_text="Number of papers preselected by abstract before searching chunks (0 = search all chunks)"
+    )
     
     # Database preparation parameters
     max_papers = models.IntegerField(
@@ -79,6 +115,11 @@ class RAGConfiguration(models.Model):
             RAGConfiguration.objects.filter(is_active=True).update(is_active=False)
         super().save(*args, **kwargs)
     
+    def get_collection_names(self) -> list:
+        """Returns the main collection followed by the extra collections, without duplicates"""
+        names = [self.collection_name] + [name.strip() for name in self.extra_collections.split(',')]
+        return list(dict.fromkeys(name for name in names if name))
+    
     @classmethod
     def get_active_config(cls):
         """Returns active configuration or default"""
@@ -98,6 +139,69 @@ class RAGConfiguration(models.Model):
             return config
 
 
+def _has_fts_table(alias: str) -> bool:
+    """Whether the SQLite FTS5 table exists (e.g. FTS5 may be missing from the SQLite build)"""
+    if alias not in _fts_tables:
+        _fts_tables[alias] = HISTORY_FTS_TABLE in connections[alias].introspection.table_names()
+    return _fts_tables[alias]
+
+
+class QueryHistoryQuerySet(models.QuerySet):
+    """Full-text search and keyset pagination of the query history"""
+
+    def search(self, text: str) -> 'QueryHistoryQuerySet':
+        """
+        Filter to entries whose query or response contains all words of text.
+
+        Uses the full-text index (words are matched as prefixes on SQLite);
+        backends without one fall back to a substring scan.
+        """
+        text = text.strip()
+        if not text:
+            return self
+        vendor = connections[self.db].vendor
+
+        if vendor == 'sqlite' and _has_fts_table(self.db):
+            words = re.findall(r'\w+', text)
+            if words:
+                match = ' '.join(f'"{word}"*' for word in words)
+                return self.filter(id__in=RawSQL(
+                    f"SELECT rowid FROM {HISTORY_FTS_TABLE} WHERE {HISTORY_FTS_TABLE} MATCH %s", [match]
+                ))
+        elif vendor == 'postgresql':
+            return self.extra(where=[f"{HISTORY_TSVECTOR} @@ plainto_tsquery('simple', %s)"], params=[text])
+
+        return self.filter(Q(query_text__icontains=text) | Q(response_text__icontains=text))
+
+    def keyset_page(self, after: Optional[str] = None, before: Optional[str] = None, size: int = 20) -> KeysetPage:
+        """
+        Return a page of entries, newest first.
+
+        Args:
+            after (Optional[str]): Cursor of the page's predecessor, returns the older entries after it
+            before (Optional[str]): Cursor of the page's successor, returns the newer entries before it
+            size (int): Entries per page
+
+        Returns:
+            KeysetPage: Entries with cursors of the neighbouring pages
+        """
+        if after:
+            created_at, pk = decode_cursor(after)
+            rows = list(self.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+                        .order_by('-created_at', '-id')[:size + 1])
+            return KeysetPage(rows[:size], has_next=len(rows) > size, has_previous=True)
+        if before:
+            created_at, pk = decode_cursor(before)
+            rows = list(self.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+                        .order_by('created_at', 'id')[:size + 1])
+            if len(rows) <= size:
+                # Reached the newest entries: show a full first page
+                return self.keyset_page(size=size)
+            return KeysetPage(rows[:size][::-1], has_next=True, has_previous=True)
+        rows = list(self.order_by('-created_at', '-id')[:size + 1])
+        return KeysetPage(rows[:size], has_next=len(rows) > size, has_previous=False)
+
+
 class QueryHistory(models.Model):
     """
     Model storing user query history.
@@ -122,10 +226,16 @@ class QueryHistory(models.Model):
     user_ip = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(null=True, blank=True)
     
+    objects = QueryHistoryQuerySet.as_manager()
+    
     class Meta:
         verbose_name = "Query History"
         verbose_name_plural = "Query History"
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination order
+            models.Index(fields=['-created_at', '-id'], name='rag_history_created_idx'),
+        ]
     
     def __str__(self):
         return f"Query from {self.created_at.strftime('%Y-%m-%d %H:%M')}: {self.query_text[:50]}..."
@@ -154,6 +264,7 @@ class DatabasePreparationLog(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='started')
     papers_downloaded = models.IntegerField(default=0, help_text="Number of downloaded articles")
     papers_processed = models.IntegerField(default=0, help_text="Number of processed articles")
+    chunks_deduplicated = models.IntegerField(default=0, help_text="Number of near-duplicate chunks skipped before embedding")
     error_message = models.TextField(null=True, blank=True, help_text="Error message (if occurred)")
     
     started_at = models.DateTimeField(auto_now_add=True)
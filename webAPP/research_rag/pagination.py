@@ -0,0 +1,55 @@
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+
+def encode_cursor(created_at: datetime, pk: int) -> str:
+    """Cursor of a row in (created_at, id) order"""
+    return f"{created_at.isoformat()}_{pk}"
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Return (created_at, id) of a cursor; raises ValueError for malformed cursors"""
+    created_at, _, pk = cursor.rpartition('_')
+    return datetime.fromisoformat(created_at), int(pk)
+
+
+class KeysetPage:
+    """
+    One page of a keyset (cursor) paginated query.
+
+    Pages are addressed by the (created_at, id) of their first or last row
+    instead of a page number, so fetching any page is an index range scan
+    and no COUNT(*) or OFFSET is needed.
+    """
+
+    def __init__(self, items: List, has_next: bool, has_previous: bool):
+        self.items = items
+        self.has_next = has_next
+        self.has_previous = has_previous
+
+    @property
+    def has_other_pages(self) -> bool:
+        return self.has_next or self.has_previous
+
+    @property
+    def next_cursor(self) -> Optional[str]:
+        """Cursor of the following (older) page"""
+        if not self.has_next or not self.items:
+            return None
+        return encode_cursor(self.items[-1].created_at, self.items[-1].pk)
+
+    @property
+    def previous_cursor(self) -> Optional[str]:
+        """Cursor of the preceding (newer) page"""
+        if not self.has_previous or not self.items:
+            return None
+        return encode_cursor(self.items[0].created_at, self.items[0].pk)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __bool__(self) -> bool:
+        return bool(self.items)
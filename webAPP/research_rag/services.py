@@ -1,15 +1,137 @@
 import time
 import sys
 import os
-from typing import Dict, Any, Optional
+import threading
+from typing import Dict, Any, Iterator, List, Optional
 from django.utils import timezone
 
 # Dodanie ścieżki do głównego projektu RAG
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 
-from RAG.Generation.generation import Generation
-from dataPrepraration.databasePreparation import DatabasePreparation
+from django.conf import settings
 from .models import RAGConfiguration, QueryHistory, DatabasePreparationLog
+from .configcache import get_configuration_cache
+from .modelcatalog import DEFAULT_MODELS, configure_model_catalog, get_model_catalog
+from .writebehind import configure_history_writer, get_history_writer
+
+# The RAG pipeline (LangChain, transformers, sentence-transformers, Qdrant,
+# KeyBERT) is imported on first use, so pages and manage.py commands that do
+# not generate answers or prepare the database start without loading it.
+_query_cache_configured = False
+
+
+_storage_configured = False
+
+
+def _configure_storage():
+    """Point the in-process vector store and the chunk embedding cache at the directories from the settings"""
+    global _storage_configured
+    if _storage_configured:
+        return
+    if hasattr(settings, 'RAG_NUMPY_STORE_PATH'):
+        from dataPrepraration.embedding.numpyVectorStore import configure_numpy_store
+        configure_numpy_store(settings.RAG_NUMPY_STORE_PATH)
+    if hasattr(settings, 'RAG_CHUNK_EMBEDDING_CACHE'):
+        from dataPrepraration.embedding.chunkEmbeddingCache import configure_chunk_embedding_cache
+        configure_chunk_embedding_cache(**settings.RAG_CHUNK_EMBEDDING_CACHE)
+    _storage_configured = True
+
+
+_history_writer_configured = False
+
+
+def _history_writer():
+    """Return the shared write-behind writer, or None if history is written synchronously"""
+    global _history_writer_configured
+    if not _history_writer_configured:
+        configure_history_writer(**getattr(settings, 'RAG_HISTORY_WRITE_BEHIND', {}))
+        _history_writer_configured = True
+    return get_history_writer()
+
+
+def _record_query(**fields) -> None:
+    """Save a QueryHistory entry without waiting for the database (see WriteBehindWriter)"""
+    writer = _history_writer()
+    if writer is not None:
+        writer.record_query(**fields)
+    else:
+        QueryHistory.objects.create(**fields)
+
+
+def _update_log(log_entry: DatabasePreparationLog, *fields: str, final: bool = False) -> None:
+    """Save changed fields of a preparation log; final states are written before returning"""
+    writer = _history_writer()
+    if writer is not None:
+        writer.update_log(log_entry, *fields, flush=final)
+    else:
+        log_entry.save(update_fields=list(fields))
+
+
+_model_catalog_configured = False
+
+
+def _configure_model_catalog():
+    """Apply the model catalog options from the settings once"""
+    global _model_catalog_configured
+    if not _model_catalog_configured:
+        configure_model_catalog(**getattr(settings, 'RAG_MODEL_CATALOG', {}))
+        _model_catalog_configured = True
+
+
+def _load_generation():
+    """Import the generation pipeline and configure the shared query embedding cache once"""
+    global _query_cache_configured
+    from RAG.Generation.generation import Generation
+    if not _query_cache_configured:
+        from RAG.Retrieval.queryEmbeddingCache import configure_query_embedding_cache
+        # Share query embeddings between requests and, if configured, across restarts
+        configure_query_embedding_cache(**getattr(settings, 'RAG_QUERY_EMBEDDING_CACHE', {}))
+        _configure_storage()
+        _query_cache_configured = True
+    return Generation
+
+
+# Configuration fields that determine a Generation pipeline
+PIPELINE_FIELDS = ('model_name', 'ollama_url', 'collection_name', 'extra_collections', 'k_chunks',
+                   'temperature', 'max_tokens', 'paper_top_n', 'vector_backend', 'download_directory')
+
+# Configuration id -> (pipeline fields, Generation); a pipeline keeps its
+# clients and models warm and is rebuilt only when these fields change
+_pipelines: Dict[int, Any] = {}
+_pipelines_lock = threading.Lock()
+
+
+def _get_generation(config: RAGConfiguration):
+    """Return the warm Generation pipeline of a configuration, building it on first use or after a change"""
+    fingerprint = tuple(getattr(config, field) for field in PIPELINE_FIELDS)
+    if config.pk is not None:
+        with _pipelines_lock:
+            cached = _pipelines.get(config.pk)
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
+
+    Generation = _load_generation()
+    rag_system = Generation(
+        model_name=config.model_name,
+        ollama_url=config.ollama_url,
+        collection_name=config.get_collection_names(),
+        k=config.k_chunks,
+        temperature=config.temperature,
+        max_tokens=config.max_tokens,
+        paper_top_n=config.paper_top_n,
+        vector_backend=config.vector_backend,
+        download_directory=config.download_directory
+    )
+    if config.pk is not None:
+        with _pipelines_lock:
+            _pipelines[config.pk] = (fingerprint, rag_system)
+    return rag_system
+
+
+def drop_pipeline(sender, instance: RAGConfiguration, **kwargs) -> None:
+    """post_save/post_delete receiver: release the pipeline of a changed or deleted configuration"""
+    with _pipelines_lock:
+        _pipelines.pop(instance.pk, None)
 
 
 class RAGService:
@@ -25,9 +147,10 @@ class RAGService:
         Args:
             config: RAG configuration. If None, uses active configuration.
         """
-        self.config = config or RAGConfiguration.get_active_config()
+        self.config = config or get_configuration_cache().get_active()
     
-    def generate_answer(self, query: str, user_ip: str = None, user_agent: str = None) -> Dict[str, Any]:
+    def generate_answer(self, query: str, user_ip: str = None, user_agent: str = None,
+                        filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Generate answer to user query using RAG system.
         
@@ -35,6 +158,7 @@ class RAGService:
             query: User query
             user_ip: Adres IP użytkownika (do logowania)
             user_agent: User Agent przeglądarki (do logowania)
+            filters: Paper metadata filters for retrieval, e.g. {'year_from': 2022}
             
         Returns:
             Dict zawierający odpowiedź, status błędu i czas przetwarzania
@@ -42,23 +166,16 @@ class RAGService:
         start_time = time.time()
         
         try:
-            # Inicjalizacja systemu RAG z konfiguracją
-            rag_system = Generation(
-                model_name=self.config.model_name,
-                ollama_url=self.config.ollama_url,
-                collection_name=self.config.collection_name,
-                k=self.config.k_chunks,
-                temperature=self.config.temperature,
-                max_tokens=self.config.max_tokens
-            )
+            # System RAG dla konfiguracji (budowany ponownie tylko po jej zmianie)
+            rag_system = _get_generation(self.config)
             
             # Generowanie odpowiedzi
-            result = rag_system.generate_answer(query)
+            result = rag_system.generate_answer(query, filters=filters)
             
             processing_time = time.time() - start_time
             
-            # Save to query history
-            history_entry = QueryHistory.objects.create(
+            # Zapis do historii w tle, bez opóźniania odpowiedzi
+            _record_query(
                 query_text=query,
                 response_text=result.get('answer', '') if not result.get('error') else f"Error: {result.get('error')}",
                 config_used=self.config,
@@ -71,8 +188,7 @@ class RAGService:
                 'success': not result.get('error'),
                 'answer': result.get('answer', ''),
                 'error': result.get('error'),
-                'processing_time': processing_time,
-                'history_id': history_entry.id
+                'processing_time': processing_time
             }
             
         except Exception as e:
@@ -80,7 +196,7 @@ class RAGService:
             error_message = f"Error during response generation: {str(e)}"
             
             # Save error to history
-            QueryHistory.objects.create(
+            _record_query(
                 query_text=query,
                 response_text=error_message,
                 config_used=self.config,
@@ -96,6 +212,50 @@ class RAGService:
                 'processing_time': processing_time
             }
     
+    def generate_answers_batch(self, queries: List[str], user_ip: str = None, user_agent: str = None,
+                               max_workers: int = 4, filters: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Generate answers to many queries, yielding each result as soon as it is ready.
+        
+        Retrieval for the whole batch uses one embedding call and one Qdrant
+        search_batch; LLM generations run with at most max_workers in parallel.
+        
+        Args:
+            queries: User queries
+            user_ip: User IP address (for logging)
+            user_agent: Browser User Agent (for logging)
+            max_workers: Maximum number of concurrent LLM requests
+            filters: Paper metadata filters applied to every query
+            
+        Yields:
+            Dict with the query index, answer, error status and processing time
+        """
+        start_time = time.time()
+        
+        rag_system = _get_generation(self.config)
+        
+        for index, result in rag_system.generate_answers_batch(queries, max_workers=max_workers, filters=filters):
+            processing_time = time.time() - start_time
+            
+            _record_query(
+                query_text=queries[index],
+                response_text=result.get('answer', '') if not result.get('error') else f"Error: {result.get('error')}",
+                config_used=self.config,
+                processing_time=processing_time,
+                user_ip=user_ip,
+                user_agent=user_agent
+            )
+            
+            yield {
+                'index': index,
+                'query': queries[index],
+                'success': not result.get('error'),
+                'answer': result.get('answer', ''),
+                'sources': result.get('sources', []),
+                'error': result.get('error'),
+                'processing_time': processing_time
+            }
+    
     def test_model_availability(self) -> Dict[str, Any]:
         """
         Testuje dostępność skonfigurowanego modelu Ollama.
@@ -141,15 +301,20 @@ class DatabaseService:
     """
     
     def __init__(self, config: Optional[RAGConfiguration] = None):
-        self.config = config or RAGConfiguration.get_active_config()
+        self.config = config or get_configuration_cache().get_active()
     
-    def prepare_database(self, search_topic: str, max_papers: Optional[int] = None) -> DatabasePreparationLog:
+    def prepare_database(self, search_topic: str, max_papers: Optional[int] = None,
+                         mode: str = 'full', incremental: bool = False,
+                         rebuild: bool = False) -> DatabasePreparationLog:
         """
         Przygotowuje bazę danych z artykułami naukowymi dla określonego tematu.
         
         Args:
             search_topic: Temat wyszukiwania dla ArXiv API
             max_papers: Maksymalna liczba artykułów (opcjonalnie)
+            mode: 'full' lub 'abstracts' (pełne teksty indeksowane przy pierwszym wyszukaniu)
+            incremental: Tylko artykuły opublikowane od ostatniego uruchomienia dla tego tematu
+            rebuild: Budowa nowej wersji kolekcji w tle i atomowe przełączenie aliasu
             
         Returns:
             DatabasePreparationLog: Log procesu przygotowania
@@ -164,13 +329,26 @@ class DatabaseService:
         try:
             # Aktualizacja statusu
             log_entry.status = 'downloading'
-            log_entry.save()
+            _update_log(log_entry, 'status')
             
             # Inicjalizacja systemu przygotowania bazy danych
+            from dataPrepraration.databasePreparation import DatabasePreparation
+            from dataPrepraration.apiIntegration.arxivCatalog import ArxivCatalog, DEFAULT_CATALOG_PATH
+            from dataPrepraration.extraction.translation import DEFAULT_TRANSLATOR_BACKEND
+            _configure_storage()
+            
             db_preparation = DatabasePreparation(
                 user_query=search_topic,
                 max_results=max_papers or self.config.max_papers,
-                download_directory=self.config.download_directory
+                download_directory=self.config.download_directory,
+                collection_name=self.config.collection_name,
+                mode=mode,
+                incremental=incremental,
+                rebuild=rebuild,
+                vector_backend=self.config.vector_backend,
+                dedup_report_path=getattr(settings, 'RAG_DEDUP_REPORT_PATH', None),
+                translator_backend=getattr(settings, 'RAG_TRANSLATOR_BACKEND', DEFAULT_TRANSLATOR_BACKEND),
+                catalog=ArxivCatalog(getattr(settings, 'RAG_ARXIV_CATALOG_PATH', DEFAULT_CATALOG_PATH))
             )
             
             # Wykonanie przygotowania bazy danych
@@ -179,9 +357,14 @@ class DatabaseService:
             # Zakończenie procesu
             log_entry.status = 'completed'
             log_entry.completed_at = timezone.now()
-            log_entry.papers_downloaded = max_papers or self.config.max_papers  # Przybliżona wartość
-            log_entry.papers_processed = max_papers or self.config.max_papers   # Przybliżona wartość
-            log_entry.save()
+            # Artykuły odrzucone przez filtr trafności nie są pobierane
+            relevant = len(db_preparation.relevant_papers)
+            log_entry.papers_downloaded = relevant if mode == 'full' else 0
+            log_entry.papers_processed = relevant
+            if db_preparation.deduplicator is not None:
+                log_entry.chunks_deduplicated = len(db_preparation.deduplicator.skipped_chunks)
+            _update_log(log_entry, 'status', 'completed_at', 'papers_downloaded', 'papers_processed',
+                        'chunks_deduplicated', final=True)
             
             return log_entry
             
@@ -190,7 +373,7 @@ class DatabaseService:
             log_entry.status = 'error'
             log_entry.error_message = str(e)
             log_entry.completed_at = timezone.now()
-            log_entry.save()
+            _update_log(log_entry, 'status', 'error_message', 'completed_at', final=True)
             
             raise e
 
@@ -201,27 +384,38 @@ class ConfigurationService:
     """
     
     @staticmethod
-    def get_available_models() -> list:
+    def get_model_catalog(ollama_url: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get the cached model catalog of an Ollama server without waiting for it.
+        
+        A stale catalog is refreshed in the background; until the server has
+        answered once, the default models are listed.
+        
+        Args:
+            ollama_url: Ollama server URL (default: from the active configuration)
+            
+        Returns:
+            Dict with the models (name, size, loaded, ...) and staleness information
+        """
+        _configure_model_catalog()
+        catalog = get_model_catalog(ollama_url or get_configuration_cache().get_active().ollama_url).snapshot()
+        if not catalog['models']:
+            catalog['models'] = [{'name': name, 'size': None, 'loaded': False} for name in DEFAULT_MODELS]
+            catalog['defaults'] = True
+        return catalog
+    
+    @staticmethod
+    def get_available_models(ollama_url: Optional[str] = None) -> list:
         """
         Get list of available models from Ollama server.
         
+        Args:
+            ollama_url: Ollama server URL (default: from the active configuration)
+            
         Returns:
             List of available models
         """
-        try:
-            import requests
-            config = RAGConfiguration.get_active_config()
-            
-            response = requests.get(f"{config.ollama_url}/api/tags", timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                return [model['name'] for model in data.get('models', [])]
-            else:
-                return ['llama3:8b', 'mistral', 'codellama']  # Modele domyślne
-                
-        except Exception:
-            return ['llama3:8b', 'mistral', 'codellama']  # Modele domyślne
+        return [model['name'] for model in ConfigurationService.get_model_catalog(ollama_url)['models']]
     
     @staticmethod
     def validate_configuration(config_data: dict) -> Dict[str, Any]:
@@ -237,14 +431,14 @@ class ConfigurationService:
         errors = []
         warnings = []
         
-        # Ollama URL validation
-        try:
-            import requests
-            response = requests.get(f"{config_data.get('ollama_url', '')}/api/tags", timeout=5)
-            if response.status_code != 200:
+        # Ollama URL validation z katalogu w pamięci (odświeżanego w tle)
+        if config_data.get('ollama_url'):
+            _configure_model_catalog()
+            catalog = get_model_catalog(config_data['ollama_url']).snapshot()
+            if catalog['reachable'] is False:
                 warnings.append("Nie można połączyć się z serwerem Ollama")
-        except Exception:
-            warnings.append("Nie można połączyć się z serwerem Ollama")
+            elif catalog['reachable'] and config_data.get('model_name') not in {model['name'] for model in catalog['models']}:
+                warnings.append(f"Model {config_data.get('model_name')} nie jest zainstalowany na serwerze Ollama")
         
         # Walidacja parametrów
         if config_data.get('temperature', 0) < 0 or config_data.get('temperature', 0) > 2:
@@ -1,3 +1,1414 @@
-from django.test import TestCase
+import io
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from datetime import datetime, timezone
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+
+from django.conf import settings
+from django.db import OperationalError
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from .models import DatabasePreparationLog, QueryHistory, RAGConfiguration
+from .configcache import ConfigurationCache
+from .modelcatalog import OllamaCatalog
+from .writebehind import WriteBehindWriter
+
+from dataPrepraration.apiIntegration.arxivCatalog import ArxivCatalog
+from dataPrepraration.apiIntegration.relevanceFilter import RelevanceFilter
+from dataPrepraration.embedding import sharedModels
+from dataPrepraration.embedding.chunkEmbeddingCache import ChunkEmbeddingCache
+from dataPrepraration.embedding.collectionSnapshot import export_snapshot, import_snapshot, read_manifest
+from dataPrepraration.embedding.collectionVersions import CollectionVersions
+from dataPrepraration.embedding.deduplication import ChunkDeduplicator, NearDuplicateIndex
+from dataPrepraration.embedding.embeddingArticle import EmbeddingArticle
+from dataPrepraration.embedding.numpyVectorStore import NumpyVectorClient
+from dataPrepraration.embedding.textSplitter import SentenceTokenSplitter
+from dataPrepraration.extraction.keywordsExtraction import KeywordsExtractor
+from dataPrepraration import lazyIndexing
+from dataPrepraration.lazyIndexing import LazyFullTextIndexer, get_lazy_indexer
+from dataPrepraration.pdfToText.sectionParser import SectionParser, parse_sections, rebase_sections, section_at
+from dataPrepraration.extraction.translation import (
+    PassthroughTranslator, TranslationCache, detect_language, get_translator_backend
+)
+from RAG.Generation.generation import Generation
+from RAG.Retrieval.metadataFilter import build_metadata_filter
+from RAG.Retrieval.multiRetrieval import merge_results
+from RAG.Retrieval.queryEmbeddingCache import QueryEmbeddingCache, query_batch_embedder
+import rag_engine
+
+# Modules that must only be imported when an answer is generated or the
+# database is prepared, never at startup
+HEAVY_MODULES = [
+    'torch', 'transformers', 'sentence_transformers', 'keybert', 'deep_translator',
+    'langchain', 'langchain_community', 'qdrant_client', 'arxiv', 'pdfminer',
+]
+
+# Cold start budget in seconds (interpreter start included)
+COLD_START_BUDGET = float(os.environ.get('RAG_COLD_START_BUDGET', '5'))
+
+REPO_ROOT = str(settings.BASE_DIR.parent)
+
+
+class ColdStartTests(SimpleTestCase):
+    """
+    Startup-time budget of the web app and the CLI.
+
+    Each check runs in a fresh interpreter so already imported modules of
+    the test runner do not hide slow imports.
+    """
+
+    def _run(self, args, cwd):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, *args], cwd=cwd, capture_output=True, text=True, timeout=120)
+        elapsed = time.perf_counter() - start
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return result.stdout, elapsed
+
+    def test_web_app_cold_start(self):
+        code = (
+            "import json, os, sys; "
+            "os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'webAPP.settings'); "
+            "import django; django.setup(); import webAPP.urls; "
+            f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+        )
+        stdout, elapsed = self._run(['-c', code], cwd=str(settings.BASE_DIR))
+
+        self.assertEqual(json.loads(stdout.strip().splitlines()[-1]), [],
+                         "Heavy dependencies imported at web app startup")
+        self.assertLess(elapsed, COLD_START_BUDGET, f"Web app cold start took {elapsed:.2f} s")
+
+    def test_cli_cold_start(self):
+        code = (
+            "import json, sys, runpy; sys.argv = ['rag_engine.py']; "
+            "runpy.run_path('rag_engine.py', run_name='rag_engine'); "
+            f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+        )
+        stdout, elapsed = self._run(['-c', code], cwd=REPO_ROOT)
+
+        self.assertEqual(json.loads(stdout.strip().splitlines()[-1]), [],
+                         "Heavy dependencies imported at rag_engine.py startup")
+        self.assertLess(elapsed, COLD_START_BUDGET, f"rag_engine.py cold start took {elapsed:.2f} s")
+
+
+class QueryHistorySearchTests(TestCase):
+    """Full-text search and keyset pagination of the query history"""
+
+    def setUp(self):
+        for i in range(45):
+            QueryHistory.objects.create(
+                query_text=f"Question {i} about {'black holes' if i % 3 == 0 else 'neutron stars'}",
+                response_text=f"Answer {i}"
+            )
+
+    def test_search_matches_words_and_prefixes(self):
+        self.assertEqual(QueryHistory.objects.search('black holes').count(), 15)
+        self.assertEqual(QueryHistory.objects.search('neutr').count(), 30)
+        self.assertEqual(QueryHistory.objects.search('quasars').count(), 0)
+
+    def test_search_index_follows_updates_and_deletes(self):
+        entry = QueryHistory.objects.search('neutron').first()
+        entry.response_text = "Pulsars are rotating neutron stars"
+        entry.save()
+        self.assertEqual(list(QueryHistory.objects.search('pulsars')), [entry])
+
+        entry.delete()
+        self.assertEqual(QueryHistory.objects.search('pulsars').count(), 0)
+        self.assertEqual(QueryHistory.objects.search('neutron').count(), 29)
+
+    def test_keyset_pages_cover_all_entries_once(self):
+        expected = list(QueryHistory.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        seen, cursor = [], None
+        while True:
+            page = QueryHistory.objects.keyset_page(after=cursor, size=20)
+            seen.extend(entry.id for entry in page)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(seen, expected)
+
+        newer = QueryHistory.objects.keyset_page(before=page.previous_cursor, size=20)
+        self.assertEqual([entry.id for entry in newer], expected[20:40])
+
+
+class WriteBehindWriterTests(TransactionTestCase):
+    """Batched writes of query history and preparation logs (the background thread writes outside test transactions)"""
+
+    def setUp(self):
+        # Committed configuration changes bump a temporary version file, not the one of the running site
+        from . import configcache
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(setattr, configcache, '_configuration_cache', configcache._configuration_cache)
+        configcache.configure_configuration_cache(os.path.join(directory.name, 'config_version'))
+        # A long delay keeps the background thread idle; batches are written by flush()
+        self.writer = WriteBehindWriter(max_delay=60, max_batch=50, max_pending=60, retry_delay=0.01)
+        self.addCleanup(self.writer.close)
+
+    def test_history_is_written_in_one_batch(self):
+        for i in range(10):
+            self.assertTrue(self.writer.record_query(query_text=f"Question {i}", response_text="Answer"))
+        self.assertEqual(QueryHistory.objects.count(), 0)
+
+        self.assertEqual(self.writer.flush(), 10)
+        self.assertEqual(QueryHistory.objects.count(), 10)
+        self.assertEqual(self.writer.stats(),
+                         {'pending': 0, 'written': 10, 'dropped': 0, 'batches': 1, 'retried': 0})
+
+    def test_log_updates_are_coalesced(self):
+        log_entry = DatabasePreparationLog.objects.create(
+            config_used=RAGConfiguration.get_active_config(), search_query="pulsars"
+        )
+        log_entry.status = 'downloading'
+        self.writer.update_log(log_entry, 'status')
+        log_entry.status = 'completed'
+        log_entry.papers_processed = 7
+        self.writer.update_log(log_entry, 'status', 'papers_processed', flush=True)
+
+        log_entry.refresh_from_db()
+        self.assertEqual((log_entry.status, log_entry.papers_processed), ('completed', 7))
+        self.assertEqual(self.writer.stats()['written'], 1)
+
+    def test_full_buffer_drops_instead_of_blocking(self):
+        # Holding the write lock simulates a batch stuck behind a locked database
+        with self.writer._write_lock:
+            for i in range(70):
+                self.writer.record_query(query_text=f"Question {i}", response_text="Answer")
+            self.assertEqual(self.writer.stats()['dropped'], 10)
+        self.writer.close()
+        self.assertEqual(QueryHistory.objects.count(), 60)
+
+    def test_locked_database_is_retried_before_dropping(self):
+        bulk_create = QueryHistory.objects.bulk_create
+        failures = iter([OperationalError("database is locked")])
+
+        def locked_once(*args, **kwargs):
+            for error in failures:
+                raise error
+            return bulk_create(*args, **kwargs)
+
+        self.writer.record_query(query_text="Question", response_text="Answer")
+        with mock.patch.object(QueryHistory.objects, 'bulk_create', side_effect=locked_once):
+            self.assertEqual(self.writer.flush(), 1)
+        self.assertEqual(QueryHistory.objects.count(), 1)
+        self.assertEqual((self.writer.stats()['retried'], self.writer.stats()['dropped']), (1, 0))
+
+
+class ConfigurationCacheTests(TestCase):
+    """Cached active configuration invalidated through the version file"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.version_path = os.path.join(directory.name, 'config_version')
+        # Two caches sharing a version file stand for two worker processes
+        self.cache = ConfigurationCache(self.version_path)
+        self.other_worker = ConfigurationCache(self.version_path)
+        RAGConfiguration.objects.create(name="Physics", is_active=True)
+
+    def test_lookups_are_served_from_memory(self):
+        self.cache.get_active()
+        self.cache.get_all()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.cache.get_active().name, "Physics")
+            self.assertEqual([config.name for config in self.cache.get_all()], ["Physics"])
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 2))
+
+    def test_change_is_seen_by_every_worker(self):
+        self.assertEqual(self.other_worker.get_active().name, "Physics")
+
+        config = self.cache.get_active()
+        config.name = "Astrophysics"
+        config.save()
+        self.cache.bump()
+
+        self.assertEqual(self.other_worker.get_active().name, "Astrophysics")
+        self.assertEqual(self.other_worker.version, 1)
+
+    def test_save_signal_bumps_the_version_on_commit(self):
+        from . import configcache
+        self.addCleanup(setattr, configcache, '_configuration_cache', configcache._configuration_cache)
+        cache = configcache.configure_configuration_cache(self.version_path)
+        with self.captureOnCommitCallbacks(execute=True):
+            RAGConfiguration.objects.create(name="Medicine")
+        self.assertEqual(cache.version, 1)
+
+    def test_pipeline_of_deleted_configuration_is_released(self):
+        from . import services
+        config = RAGConfiguration.objects.get(name="Physics")
+        services._pipelines[config.pk] = ((), object())
+        self.addCleanup(services._pipelines.pop, config.pk, None)
+
+        config.delete()
+
+        self.assertNotIn(config.pk, services._pipelines)
+
+
+class _FakeOllamaHandler(BaseHTTPRequestHandler):
+    responses = {
+        '/api/tags': {'models': [
+            {'name': 'llama3:8b', 'size': 4661224676, 'details': {'parameter_size': '8.0B', 'quantization_level': 'Q4_0'}},
+            {'name': 'mistral', 'size': 4109865159, 'details': {}},
+        ]},
+        '/api/ps': {'models': [{'name': 'mistral', 'size_vram': 4109865159}]},
+    }
+
+    def do_GET(self):
+        body = json.dumps(self.responses[self.path]).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class OllamaCatalogTests(SimpleTestCase):
+    """Model catalog read from memory and refreshed in the background"""
+
+    def test_catalog_lists_sizes_and_loaded_models(self):
+        server = HTTPServer(('127.0.0.1', 0), _FakeOllamaHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        catalog = OllamaCatalog(f"http://127.0.0.1:{server.server_port}", refresh_interval=60)
+        self.assertTrue(catalog.refresh())
+        snapshot = catalog.snapshot()
+
+        self.assertFalse(snapshot['stale'])
+        self.assertTrue(snapshot['reachable'])
+        self.assertEqual({model['name']: (model['size'], model['loaded']) for model in snapshot['models']},
+                         {'llama3:8b': (4661224676, False), 'mistral': (4109865159, True)})
+        self.assertFalse(catalog.refresh_in_background())
+
+    def test_unreachable_server_does_not_block_readers(self):
+        catalog = OllamaCatalog("http://127.0.0.1:9", refresh_interval=60, timeout=1)
+        start = time.perf_counter()
+        snapshot = catalog.snapshot()
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(snapshot['models'], [])
+
+        deadline = time.time() + 5
+        while catalog.snapshot()['reachable'] is None and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertIs(catalog.snapshot()['reachable'], False)
+        self.assertTrue(catalog.snapshot()['stale'])
+
+
+class MultiCollectionMergeTests(SimpleTestCase):
+    """Merging the results of several collections into one ranking"""
+
+    @staticmethod
+    def _chunks(source, scores):
+        return [{'content': f"{source} {i}", 'source': source, 'similarity_score': score}
+                for i, score in enumerate(scores)]
+
+    def test_unrelated_collection_ranks_below_relevant_hits(self):
+        relevant = self._chunks('relevant', [0.82, 0.77, 0.71])
+        unrelated = self._chunks('unrelated', [0.24])
+
+        merged = merge_results([unrelated, relevant], ['medicine', 'physics'], k=3)
+
+        self.assertEqual([chunk['source'] for chunk in merged], ['relevant'] * 3)
+        self.assertEqual([chunk['collection'] for chunk in merged], ['physics'] * 3)
+
+    def test_default_merge_keeps_raw_scores(self):
+        weak = self._chunks('weak', [0.31, 0.28])
+        strong = self._chunks('strong', [0.65, 0.3])
+
+        merged = merge_results([weak, strong], ['a', 'b'], k=4)
+
+        self.assertEqual([chunk['similarity_score'] for chunk in merged], [0.65, 0.31, 0.3, 0.28])
+        self.assertEqual([chunk['normalized_score'] for chunk in merged], [0.65, 0.31, 0.3, 0.28])
+
+
+# Research topics typed without any stopword
+ENGLISH_TOPICS = ["large language models", "dark matter", "climate change", "diffusion models",
+                  "computer vision", "speech recognition", "transformers", "LLM"]
+
+
+class LanguageDetectionTests(SimpleTestCase):
+    """Local language detection deciding whether a topic is translated"""
+
+    def test_english_questions_and_keywords(self):
+        for text in ["What are the latest advances in quantum computing?", "black hole imaging",
+                     "neural networks", "transformer models for protein folding"]:
+            self.assertEqual(detect_language(text), 'en', text)
+
+    def test_short_english_topics(self):
+        for text in ENGLISH_TOPICS:
+            self.assertEqual(detect_language(text), 'en', text)
+
+    def test_keyword_queries_without_stopwords_are_not_english(self):
+        for text, language in [("Maschinelles Lernen in der Medizin", 'de'), ("neuronale Netze", 'de'),
+                               ("apprentissage profond", 'fr'), ("reti neurali per la medicina", 'it'),
+                               ("uczenie maszynowe", 'pl')]:
+            self.assertEqual(detect_language(text), language, text)
+
+    def test_no_evidence_is_unknown(self):
+        self.assertEqual(detect_language(""), 'unknown')
+        self.assertEqual(detect_language("1234 ?!"), 'unknown')
+        self.assertEqual(detect_language("機械学習"), 'unknown')
+
+
+class KeywordsTranslationTests(SimpleTestCase):
+    """Translation of the topic before keyword extraction"""
+
+    def test_english_text_is_not_translated(self):
+        translator = PassthroughTranslator()
+        extractor = KeywordsExtractor("black hole imaging", translator=translator,
+                                      translation_cache=TranslationCache(None))
+        self.assertEqual(extractor.translated_text, "black hole imaging")
+        self.assertEqual(translator.calls, 0)
+
+    def test_short_english_topics_are_not_translated(self):
+        translator = PassthroughTranslator()
+        for text in ENGLISH_TOPICS:
+            KeywordsExtractor(text, translator=translator, translation_cache=TranslationCache(None))
+        self.assertEqual(translator.calls, 0)
+
+    def test_unknown_language_is_translated(self):
+        translator = PassthroughTranslator()
+        extractor = KeywordsExtractor("機械学習", translator=translator, translation_cache=TranslationCache(None))
+        self.assertEqual((extractor.detected_language, translator.calls), ('unknown', 1))
+
+    def test_translations_are_cached_on_disk(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        cache_path = os.path.join(directory.name, 'translations.json')
+
+        first = PassthroughTranslator()
+        KeywordsExtractor("neuronale Netze", translator=first, translation_cache=TranslationCache(cache_path))
+        second = PassthroughTranslator()
+        extractor = KeywordsExtractor("neuronale Netze", translator=second, translation_cache=TranslationCache(cache_path))
+
+        self.assertEqual((first.calls, second.calls), (1, 0))
+        self.assertEqual(extractor.detected_language, 'de')
+        self.assertEqual(len(TranslationCache(cache_path)), 1)
+
+    def test_backends_are_chosen_by_name(self):
+        self.assertIsInstance(get_translator_backend('passthrough'), PassthroughTranslator)
+        with self.assertRaises(ValueError):
+            get_translator_backend('babelfish')
+
+
+class SharedModelsTests(SimpleTestCase):
+    """One loaded model per name and device, whichever getter asks first"""
+
+    def test_default_device_is_resolved_before_caching(self):
+        model = object()
+        key = (sharedModels.DEFAULT_MODEL_NAME, sharedModels._device(None))
+        sharedModels._embeddings[key] = model
+        self.addCleanup(sharedModels._embeddings.pop, key)
+
+        self.assertIs(sharedModels.get_embeddings(), model)
+        self.assertIs(sharedModels.get_embeddings(device=key[1]), model)
+
+
+class QueryEmbeddingCacheTests(SimpleTestCase):
+    """LRU cache of query embeddings persisted across restarts"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.persist_path = os.path.join(directory.name, 'query_embeddings.npz')
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = QueryEmbeddingCache(max_entries=2)
+        cache.put('model', "dark  matter", [1.0, 0.0])
+        cache.put('model', "pulsars", [0.0, 1.0])
+        cache.get('model', "dark matter")
+        cache.put('model', "quasars", [1.0, 1.0])
+
+        self.assertIsNone(cache.get('model', "pulsars"))
+        self.assertEqual(cache.get('model', "dark matter").tolist(), [1.0, 0.0])
+
+    def test_saved_entries_are_loaded_on_restart(self):
+        cache = QueryEmbeddingCache(persist_path=self.persist_path)
+        cache.put('model', "dark matter", [0.5, 0.25])
+        self.assertTrue(cache.save())
+
+        restarted = QueryEmbeddingCache(persist_path=self.persist_path)
+        self.assertEqual(restarted.get('model', "dark matter").tolist(), [0.5, 0.25])
+
+    def test_concurrent_saves_leave_one_complete_file(self):
+        caches = []
+        for worker in range(8):
+            cache = QueryEmbeddingCache(persist_path=self.persist_path)
+            for i in range(1000):
+                cache.put('model', f"question {i}", np.full(384, worker, dtype=np.float32))
+            caches.append(cache)
+        saved = []
+        threads = [threading.Thread(target=lambda cache=cache: saved.append(cache.save())) for cache in caches]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(saved, [True] * len(caches))
+        self.assertEqual(os.listdir(self.directory), ['query_embeddings.npz'])
+        restarted = QueryEmbeddingCache(persist_path=self.persist_path)
+        self.assertEqual(restarted.stats()['entries'], 1000)
+        # All vectors come from the same worker's save
+        self.assertEqual(len({restarted.get('model', f"question {i}")[0] for i in range(1000)}), 1)
+
+
+class _QueryInstructionEmbeddings:
+    """Embeddings encoding queries differently from documents"""
+
+    def embed_documents(self, texts):
+        return [[float(len(text)), 0.0] for text in texts]
+
+    def embed_query(self, text):
+        return [float(len(text)), 1.0]
+
+
+class BatchQueryEmbeddingTests(SimpleTestCase):
+    """Batch questions are embedded and cached exactly like single questions"""
+
+    def test_batch_uses_query_semantics(self):
+        embeddings = _QueryInstructionEmbeddings()
+        cache = QueryEmbeddingCache()
+        batch = cache.embed_queries('model', ["dark matter", "pulsars"], query_batch_embedder(embeddings))
+
+        self.assertEqual(batch, [embeddings.embed_query("dark matter"), embeddings.embed_query("pulsars")])
+        self.assertEqual(cache.embed_query('model', "pulsars", embeddings.embed_documents), [7.0, 1.0])
+
+    def test_huggingface_queries_are_encoded_in_one_batch(self):
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+        embeddings = HuggingFaceEmbeddings.model_construct()
+        self.assertEqual(query_batch_embedder(embeddings), embeddings.embed_documents)
+
+    @override_settings(RAG_MAX_BATCH_QUERIES=3)
+    def test_batch_request_size_is_capped(self):
+        response = self.client.post(reverse('ask_batch'), json.dumps({'queries': ["q"] * 4}),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("At most 3 queries", response.json()['error'])
+
+    def test_unknown_filter_is_rejected(self):
+        response = self.client.post(reverse('ask_batch'), json.dumps({'queries': ["q"], 'filters': {'journal': "ApJ"}}),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("journal", response.json()['error'])
+
+
+class _PromptOnlyAugmented:
+    def create_rag_prompts_batch(self, queries, filters=None):
+        return [(f"prompt: {query}", {'has_context': True, 'sources': []}) for query in queries]
+
+
+class PipelinedGenerationTests(SimpleTestCase):
+    """Pipelined batch generation with a stand-in LLM"""
+
+    def setUp(self):
+        self.calls = 0
+        self.generation = Generation.__new__(Generation)
+        self.generation.augmented = _PromptOnlyAugmented()
+        self.generation._answer_from_prompt = self._slow_answer
+
+    def _slow_answer(self, rag_prompt, context_info):
+        self.calls += 1
+        time.sleep(0.1)
+        return {'answer': rag_prompt, 'sources': [], 'context_used': True, 'error': None}
+
+    def test_every_question_is_answered(self):
+        queries = [f"question {i}" for i in range(6)] + [" "]
+        results = dict(self.generation.generate_answers_pipelined(queries, max_workers=3, retrieval_batch_size=2))
+        self.assertEqual(sorted(results), list(range(7)))
+        self.assertEqual(results[2]['answer'], "prompt: question 2")
+        self.assertIsNone(results[6]['error'])
+        self.assertEqual(self.calls, 6)
+
+    def test_closing_the_stream_drops_queued_llm_calls(self):
+        answers = self.generation.generate_answers_pipelined([f"question {i}" for i in range(20)],
+                                                             max_workers=1, retrieval_batch_size=20)
+        next(answers)
+        started = time.perf_counter()
+        answers.close()
+        self.assertLess(time.perf_counter() - started, 0.5)
+        time.sleep(0.3)
+        self.assertLessEqual(self.calls, 3)
+
+
+class BatchCliTests(SimpleTestCase):
+    """rag_engine.py --batch input parsing, JSONL output and --resume"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = directory.name
+        self.asked = []
+        self.failing = set()
+        patcher = mock.patch.object(rag_engine, 'rag_answer_batch', self._answer_batch)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _answer_batch(self, queries, **kwargs):
+        self.asked.extend(queries)
+        for index in reversed(range(len(queries))):
+            error = "LLM unavailable" if queries[index] in self.failing else None
+            yield index, {'answer': '' if error else f"answer to {queries[index]}", 'sources': ["paper.pdf"],
+                          'error': error, 'timings': {'retrieval': 0.0125, 'generation': 0.5}}
+
+    def _write(self, name, text):
+        path = os.path.join(self.path, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return path
+
+    def _records(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def test_mixed_input_is_parsed_per_line(self):
+        path = self._write('questions.txt', '{"id": "q1", "question": "What is RAG?"}\n\n'
+                                            'Plain question\n{"query": "Old field name"}\n')
+        self.assertEqual(rag_engine._read_batch_questions(path), [
+            {'id': 'q1', 'question': "What is RAG?"},
+            {'id': 3, 'question': "Plain question"},
+            {'id': 4, 'question': "Old field name"},
+        ])
+
+    def test_format_overrides_detection(self):
+        path = self._write('questions.txt', '{"id": 7, "question": "As JSON"}\n')
+        self.assertEqual(rag_engine._read_batch_questions(path, 'text'),
+                         [{'id': 1, 'question': '{"id": 7, "question": "As JSON"}'}])
+        self.assertEqual(rag_engine._read_batch_questions(path, 'jsonl'), [{'id': 7, 'question': "As JSON"}])
+        with self.assertRaises(ValueError):
+            rag_engine._read_batch_questions(self._write('plain.txt', "Plain question\n"), 'jsonl')
+
+    def test_results_are_jsonl_with_timings(self):
+        path = self._write('questions.jsonl', '{"id": "a", "question": "First"}\n{"id": "b", "question": "Second"}\n')
+        output = io.StringIO()
+        with mock.patch('sys.stdout', output), mock.patch('sys.stderr', io.StringIO()):
+            summary = rag_engine.run_batch(path)
+
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual([record['id'] for record in records], ['b', 'a'])
+        self.assertEqual(records[1], {
+            'id': 'a', 'question': "First", 'answer': "answer to First", 'sources': ["paper.pdf"],
+            'error': None, 'timings_ms': {'retrieval': 12.5, 'generation': 500.0}
+        })
+        self.assertEqual((summary['answered'], summary['failed'], summary['skipped']), (2, 0, 0))
+
+    def test_resume_retries_failed_questions_once(self):
+        path = self._write('questions.txt', "First\nSecond\nThird\n")
+        output_path = os.path.join(self.path, 'out', 'answers.jsonl')
+        self.failing = {"Second"}
+        with mock.patch('sys.stderr', io.StringIO()):
+            rag_engine.run_batch(path, output_path)
+            # An interrupted run leaves a cut-off last line
+            with open(output_path, 'a', encoding='utf-8') as f:
+                f.write('{"id": 3, "question": "Thi')
+            self.failing = set()
+            self.asked.clear()
+            summary = rag_engine.run_batch(path, output_path, resume=True)
+
+        self.assertEqual(self.asked, ["Second"])
+        self.assertEqual((summary['answered'], summary['failed'], summary['skipped']), (1, 0, 2))
+        records = self._records(output_path)
+        self.assertEqual(sorted(record['id'] for record in records), [1, 2, 3])
+        self.assertTrue(all(record['error'] is None for record in records))
+
+        # Nothing left to retry: the file is kept as it is
+        with mock.patch('sys.stderr', io.StringIO()):
+            summary = rag_engine.run_batch(path, output_path, resume=True)
+        self.assertEqual((summary['answered'], summary['skipped']), (0, 3))
+        self.assertEqual(self._records(output_path), records)
+
+
+class SentenceTokenSplitterTests(SimpleTestCase):
+    """Sentence- and token-aware splitting (regex token approximation, no tokenizer)"""
+
+    TEXT = ("Black holes bend light. The Event Horizon Telescope imaged one in 2019. "
+            "Its shadow matched general relativity. Further observations are planned.\n\n"
+            "A second paragraph follows here.")
+
+    def test_chunks_end_on_sentence_boundaries_within_the_window(self):
+        splitter = SentenceTokenSplitter(max_tokens=16, overlap_tokens=4)
+        chunks = splitter.split_text_with_offsets(self.TEXT)
+
+        self.assertGreater(len(chunks), 1)
+        for chunk, start, end in chunks:
+            self.assertEqual(chunk, self.TEXT[start:end])
+            self.assertLessEqual(len(splitter._token_spans(chunk)[0]), 16)
+            self.assertTrue(chunk.endswith('.'), chunk)
+        self.assertEqual(chunks[0][1], 0)
+        self.assertEqual(chunks[-1][2], len(self.TEXT))
+
+    def test_consecutive_chunks_advance_and_cover_the_text(self):
+        spans = SentenceTokenSplitter(max_tokens=16, overlap_tokens=8).split_offsets(self.TEXT)
+        for (start, end), (next_start, next_end) in zip(spans, spans[1:]):
+            self.assertLess(start, next_start)
+            self.assertLess(end, next_end)
+            # Either the chunks overlap or only whitespace lies between them
+            self.assertEqual(self.TEXT[end:next_start].strip(), '')
+
+    def test_long_words_are_cut_without_duplicate_spans(self):
+        text = "Pneumonoultramicroscopicsilicovolcanoconiosis is long. Short one here."
+        spans = SentenceTokenSplitter(max_tokens=4, overlap_tokens=1).split_offsets(text)
+
+        self.assertEqual(len(spans), len(set(spans)))
+        self.assertEqual([start for start, _ in spans], sorted({start for start, _ in spans}))
+        self.assertTrue(all(end - start <= 4 * 6 for start, end in spans))
+
+
+class SectionParserTests(SimpleTestCase):
+    """Section model of extracted paper text"""
+
+    DOCUMENT = (
+        "Imaging Black Hole Shadows with Deep Learning\nA. Author, B. Author\n\n"
+        "Abstract\nWe train a network on simulated images.\n\n"
+        "1 Introduction\nBlack holes are compact objects.\n"
+        "2019 was the year of the first image.\n\n"
+        "2.1 Training data\nWe simulate 10000 images.\n\n"
+        "Conclusions\nThe method works.\n\n"
+        "References\n[1] Event Horizon Telescope Collaboration.\n"
+    )
+
+    def test_document_is_parsed_into_sections(self):
+        model = parse_sections(self.DOCUMENT)
+
+        self.assertEqual(model['title'], "Imaging Black Hole Shadows with Deep Learning")
+        self.assertEqual([(section['name'], section['kind']) for section in model['sections']], [
+            ('Abstract', 'abstract'), ('1 Introduction', 'section'), ('2.1 Training data', 'section'),
+            ('Conclusions', 'section'), ('References', 'references'),
+        ])
+        self.assertEqual(model['references_start'], self.DOCUMENT.index("References"))
+        self.assertEqual(model['abstract_start'], self.DOCUMENT.index("Abstract"))
+
+    def test_pages_fed_one_by_one_stop_at_the_bibliography(self):
+        pages = [page + "\n\n" for page in self.DOCUMENT.split("\n\n")]
+        parser = SectionParser()
+        fed = ''
+        for page in pages:
+            cut = parser.feed(page)
+            if cut is not None:
+                fed += page[:cut]
+                break
+            fed += page
+
+        self.assertEqual(fed, self.DOCUMENT[:self.DOCUMENT.index("References")])
+        whole = parse_sections(self.DOCUMENT)
+        self.assertEqual(parser.model()['sections'][:-1], whole['sections'][:-1])
+
+    def test_offsets_map_to_sections(self):
+        sections = parse_sections(self.DOCUMENT)['sections']
+        self.assertIsNone(section_at(sections, 0))
+        self.assertEqual(section_at(sections, self.DOCUMENT.index("We simulate")), "2.1 Training data")
+
+        start = self.DOCUMENT.index("Black holes")
+        end = self.DOCUMENT.index("The method")
+        rebased = rebase_sections(sections, start, end)
+        self.assertEqual([section['name'] for section in rebased], ['1 Introduction', '2.1 Training data', 'Conclusions'])
+        self.assertEqual((rebased[0]['start'], rebased[-1]['end']), (0, end - start))
+
+
+class NumpyVectorStoreTests(SimpleTestCase):
+    """In-process vector store checked against brute-force cosine search"""
+
+    DIM = 16
+
+    def setUp(self):
+        from qdrant_client.models import Distance, PointStruct, VectorParams
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = directory.name
+        rng = np.random.default_rng(7)
+        self.vectors = rng.normal(size=(300, self.DIM)).astype(np.float32)
+        self.years = rng.integers(2015, 2025, size=300)
+        self.client = NumpyVectorClient(self.path)
+        self.client.create_collection('papers', VectorParams(size=self.DIM, distance=Distance.COSINE))
+        self.client.upsert('papers', [
+            PointStruct(id=i, vector=vector.tolist(),
+                        payload={'page_content': f"chunk {i}", 'metadata': {'year': int(year), 'article_name': f"p{i % 10}"}})
+            for i, (vector, year) in enumerate(zip(self.vectors, self.years))
+        ])
+        self.queries = rng.normal(size=(5, self.DIM)).astype(np.float32)
+
+    def _brute_force(self, query, rows, limit):
+        unit = self.vectors / np.linalg.norm(self.vectors, axis=1, keepdims=True)
+        scores = unit[rows] @ (query / np.linalg.norm(query))
+        order = np.argsort(-scores, kind='stable')[:limit]
+        return [int(rows[i]) for i in order], scores[order]
+
+    def test_search_matches_brute_force(self):
+        for query in self.queries:
+            points = self.client.search('papers', query.tolist(), limit=10)
+            ids, scores = self._brute_force(query, np.arange(300), 10)
+            self.assertEqual([point.id for point in points], ids)
+            np.testing.assert_allclose([point.score for point in points], scores, rtol=1e-5)
+
+    def test_filtered_batch_search_matches_brute_force(self):
+        from qdrant_client.models import SearchRequest
+
+        query_filter = build_metadata_filter({'year_from': 2020, 'article_names': ['p1', 'p2', 'p3']})
+        rows = np.array([i for i in range(300) if self.years[i] >= 2020 and i % 10 in (1, 2, 3)])
+        results = self.client.search_batch('papers', [
+            SearchRequest(vector=query.tolist(), filter=query_filter, limit=5, with_payload=True)
+            for query in self.queries
+        ])
+        for query, points in zip(self.queries, results):
+            self.assertEqual([point.id for point in points], self._brute_force(query, rows, 5)[0])
+        self.assertEqual(self.client.count('papers', count_filter=query_filter).count, len(rows))
+
+    def test_upsert_replaces_and_other_clients_see_writes(self):
+        from qdrant_client.models import PointStruct
+
+        other_process = NumpyVectorClient(self.path)
+        self.assertEqual(other_process.count('papers').count, 300)
+
+        self.client.upsert('papers', [PointStruct(id=3, vector=self.queries[0].tolist(), payload={'page_content': "new"})])
+        self.assertEqual(other_process.count('papers').count, 300)
+        best = other_process.search('papers', self.queries[0].tolist(), limit=1)[0]
+        self.assertEqual((best.id, best.payload['page_content']), (3, "new"))
+        self.assertAlmostEqual(best.score, 1.0, places=5)
+
+    def test_alias_resolves_to_its_collection(self):
+        from qdrant_client.models import CreateAlias, CreateAliasOperation
+
+        self.client.update_collection_aliases([
+            CreateAliasOperation(create_alias=CreateAlias(alias_name='live', collection_name='papers'))
+        ])
+        self.assertTrue(self.client.collection_exists('live'))
+        self.assertEqual(self.client.count('live').count, 300)
+
+    def test_searches_during_growing_upserts(self):
+        from qdrant_client.models import PointStruct
+
+        query_filter = build_metadata_filter({'year_from': 2020})
+        rng = np.random.default_rng(11)
+        stop = threading.Event()
+        errors = []
+
+        def search():
+            while not stop.is_set():
+                try:
+                    for query in self.queries:
+                        points = self.client.search('papers', query.tolist(), query_filter=query_filter, limit=5)
+                        self.assertTrue(all(point.payload['metadata']['year'] >= 2020 for point in points))
+                        self.client.scroll('papers', scroll_filter=query_filter, limit=5)
+                except Exception as error:
+                    errors.append(error)
+                    return
+
+        readers = [threading.Thread(target=search) for _ in range(3)]
+        for reader in readers:
+            reader.start()
+        try:
+            # Each batch forces the vector file to grow and be mapped again
+            for start in range(300, 6000, 250):
+                self.client.upsert('papers', [
+                    PointStruct(id=i, vector=rng.normal(size=self.DIM).tolist(),
+                                payload={'page_content': f"chunk {i}", 'metadata': {'year': 2015 + i % 10}})
+                    for i in range(start, start + 250)
+                ])
+        finally:
+            stop.set()
+            for reader in readers:
+                reader.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(self.client.count('papers').count, 6050)
+
+
+class ChunkEmbeddingCacheTests(SimpleTestCase):
+    """Content-addressed chunk embeddings shared across runs and processes"""
+
+    DIM = 8
+    ROW_BYTES = 16 + DIM * 4
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = directory.name
+        self.encoded = []
+
+    def _embed(self, texts):
+        self.encoded.extend(texts)
+        return [[float(len(text))] * self.DIM for text in texts]
+
+    def test_known_chunks_are_not_encoded_again(self):
+        cache = ChunkEmbeddingCache(self.path)
+        first = cache.embed_documents('model', ["alpha", "beta"], self._embed)
+        # Another process (or a later run) reads the chunks from disk
+        vectors = ChunkEmbeddingCache(self.path).embed_documents('model', ["beta", "gamma", "alpha"], self._embed)
+
+        self.assertEqual(self.encoded, ["alpha", "beta", "gamma"])
+        self.assertEqual(vectors, [first[1], [5.0] * self.DIM, first[0]])
+
+    def test_models_are_cached_separately(self):
+        cache = ChunkEmbeddingCache(self.path)
+        cache.embed_documents('model-a', ["alpha"], self._embed)
+        cache.embed_documents('model-b', ["alpha"], self._embed)
+        self.assertEqual(self.encoded, ["alpha", "alpha"])
+
+    def test_least_recently_used_chunks_are_evicted(self):
+        cache = ChunkEmbeddingCache(self.path, max_bytes=10 * self.ROW_BYTES)
+        cache.embed_documents('model', [f"old {i}" for i in range(8)], self._embed)
+        cache.embed_documents('model', ["old 0", "old 1"], self._embed)
+        cache.embed_documents('model', [f"new {i}" for i in range(5)], self._embed)
+
+        stats = cache.stats()
+        self.assertGreater(stats['evictions'], 0)
+        self.assertLessEqual(stats['models']['model']['bytes'], 10 * self.ROW_BYTES)
+        self.encoded.clear()
+        cache.embed_documents('model', ["old 0", "old 1"] + [f"new {i}" for i in range(5)], self._embed)
+        self.assertEqual(self.encoded, [])
+
+
+class DeduplicationTests(SimpleTestCase):
+    """MinHash near-duplicate detection of chunks and papers"""
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        # Letters only: digit runs are collapsed before shingling
+        vocabulary = [''.join(rng.choice(list('abcdefghijklmnopqrstuvwxyz'), size=7)) for _ in range(2000)]
+        self.texts = [' '.join(rng.choice(vocabulary, size=120)) for _ in range(6)]
+
+    def test_similarity_estimate_follows_jaccard(self):
+        index = NearDuplicateIndex(threshold=0.5)
+        words = self.texts[0].split()
+        edited = ' '.join(words[:100] + self.texts[1].split()[:20])
+
+        def shingles(text):
+            tokens = text.split()
+            return {' '.join(tokens[i:i + 5]) for i in range(len(tokens) - 4)}
+
+        jaccard = len(shingles(self.texts[0]) & shingles(edited)) / len(shingles(self.texts[0]) | shingles(edited))
+        estimate = float(np.mean(index.signature(words) == index.signature(edited.split())))
+        self.assertAlmostEqual(estimate, jaccard, delta=0.1)
+
+    def test_repeated_boilerplate_and_edited_chunks_are_skipped(self):
+        deduplicator = ChunkDeduplicator(threshold=0.8)
+        header = "Licensed under CC BY 4.0. Preprint submitted to the Astrophysical Journal, page {}."
+        words = self.texts[0].split()
+        near_copy = ' '.join(words[:60] + ['changed'] + words[61:])
+
+        first = deduplicator.filter_chunks([header.format(1), self.texts[0], self.texts[1]], 'paper-a')
+        second = deduplicator.filter_chunks([header.format(2), near_copy, self.texts[2]], 'paper-b')
+
+        self.assertEqual((first, second), ([0, 1, 2], [2]))
+        self.assertEqual([skipped['duplicate_of'] for skipped in deduplicator.skipped_chunks],
+                         [{'article_name': 'paper-a', 'chunk': 0}, {'article_name': 'paper-a', 'chunk': 1}])
+        self.assertEqual(deduplicator.report()['chunks_skipped'], 2)
+
+    def test_duplicate_papers_are_flagged_and_reported(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        report_path = os.path.join(directory.name, 'dedup_report.jsonl')
+        deduplicator = ChunkDeduplicator()
+
+        self.assertIsNone(deduplicator.check_paper('2301.00001v1', "Shadows", self.texts[3]))
+        self.assertIsNone(deduplicator.check_paper('2301.00001v1', "Shadows", self.texts[3]))
+        self.assertEqual(deduplicator.check_paper('2302.00002v1', "Shadows", self.texts[3]), '2301.00001v1')
+        self.assertIsNone(deduplicator.check_paper('2303.00003v1', "Jets", self.texts[4]))
+
+        deduplicator.save_report(report_path, {'topic': "black holes"})
+        with open(report_path, 'r', encoding='utf-8') as f:
+            record = json.loads(f.read())
+        self.assertEqual((record['topic'], record['duplicate_papers']), ("black holes", 1))
+
+
+class CollectionSnapshotTests(SimpleTestCase):
+    """Snapshot export and import between two in-process vector stores"""
+
+    def setUp(self):
+        from qdrant_client.models import Distance, PointStruct, VectorParams
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = directory.name
+        self.snapshot_path = os.path.join(self.path, 'snapshots', 'arxiv.tar.gz')
+        rng = np.random.default_rng(11)
+        self.source = NumpyVectorClient(os.path.join(self.path, 'source'))
+        self.vectors = {}
+        for name, size in (('arxiv', 50), ('arxiv_papers', 4)):
+            self.vectors[name] = rng.normal(size=(size, 384)).astype(np.float32)
+            self.source.create_collection(name, VectorParams(size=384, distance=Distance.COSINE))
+            self.source.upsert(name, [
+                PointStruct(id=i, vector=vector.tolist(), payload={
+                    'page_content': f"{name} {i}",
+                    'metadata': {'article_name': f"paper{i % 4}", 'arxiv_id': f"2401.{i:05d}"}})
+                for i, vector in enumerate(self.vectors[name])
+            ])
+
+    def _points(self, client, collection_name):
+        records, _ = client.scroll(collection_name, limit=1000, with_payload=True, with_vectors=True)
+        return {record.id: (record.payload, record.vector) for record in records}
+
+    def test_round_trip_restores_points_payloads_and_vectors(self):
+        manifest = export_snapshot(self.source, 'arxiv', self.snapshot_path, config={'chunk_size': 500})
+        self.assertEqual(read_manifest(self.snapshot_path), manifest)
+        self.assertEqual({part: info['points'] for part, info in manifest['parts'].items()}, {'chunks': 50, 'papers': 4})
+        self.assertEqual([paper['article_name'] for paper in manifest['papers']], ['paper0', 'paper1', 'paper2', 'paper3'])
+        self.assertEqual(manifest['config'], {'chunk_size': 500})
+
+        target = NumpyVectorClient(os.path.join(self.path, 'target'))
+        import_snapshot(target, self.snapshot_path, 'restored')
+        for source_name, target_name in (('arxiv', 'restored'), ('arxiv_papers', 'restored_papers')):
+            restored = self._points(target, target_name)
+            self.assertEqual(set(restored), set(range(len(self.vectors[source_name]))))
+            for point_id, (payload, vector) in restored.items():
+                self.assertEqual(payload['page_content'], f"{source_name} {point_id}")
+                expected = self.vectors[source_name][point_id]
+                # Cosine collections store unit vectors
+                np.testing.assert_allclose(vector, expected / np.linalg.norm(expected), rtol=1e-5, atol=1e-7)
+
+        query = self.vectors['arxiv'][7].tolist()
+        self.assertEqual([point.id for point in target.search('restored', query, limit=5)],
+                         [point.id for point in self.source.search('arxiv', query, limit=5)])
+
+    def test_corrupted_snapshot_is_rejected_before_loading(self):
+        import tarfile
+
+        export_snapshot(self.source, 'arxiv', self.snapshot_path)
+        corrupted_path = os.path.join(self.path, 'corrupted.tar.gz')
+        with tarfile.open(self.snapshot_path, 'r:gz') as source, tarfile.open(corrupted_path, 'w:gz') as target:
+            for member in source:
+                data = source.extractfile(member).read()
+                if member.name == 'chunks/vectors.f32':
+                    data = bytes([data[0] ^ 1]) + data[1:]
+                member.size = len(data)
+                target.addfile(member, io.BytesIO(data))
+
+        target_client = NumpyVectorClient(os.path.join(self.path, 'target'))
+        with self.assertRaisesRegex(ValueError, "Checksum mismatch"):
+            import_snapshot(target_client, corrupted_path, 'restored')
+        self.assertEqual(target_client.get_collections().collections, [])
+
+    def test_missing_collection_is_not_exported(self):
+        with self.assertRaises(ValueError):
+            export_snapshot(self.source, 'missing', self.snapshot_path)
+        self.assertFalse(os.path.exists(self.snapshot_path))
+
+
+class MetadataFilterTests(SimpleTestCase):
+    """Qdrant filters built from the paper metadata filters of a request"""
+
+    def test_no_filters_gives_no_filter(self):
+        self.assertIsNone(build_metadata_filter(None))
+        self.assertIsNone(build_metadata_filter({}))
+        self.assertIsNone(build_metadata_filter({'categories': []}))
+
+    def test_year_range_and_lists(self):
+        query_filter = build_metadata_filter({'year_from': '2021', 'categories': 'astro-ph.HE',
+                                              'arxiv_ids': ['2401.00001', '2401.00002']})
+        conditions = {condition.key: condition for condition in query_filter.must}
+        self.assertEqual(set(conditions), {'metadata.year', 'metadata.categories', 'metadata.arxiv_id'})
+        self.assertEqual((conditions['metadata.year'].range.gte, conditions['metadata.year'].range.lte), (2021, None))
+        self.assertEqual(conditions['metadata.categories'].match.any, ['astro-ph.HE'])
+        self.assertEqual(conditions['metadata.arxiv_id'].match.any, ['2401.00001', '2401.00002'])
+
+    def test_unknown_filter_is_rejected(self):
+        with self.assertRaisesRegex(ValueError, "journal"):
+            build_metadata_filter({'year_to': 2020, 'journal': 'ApJ'})
+
+    def test_retrieval_raises_on_unknown_filter(self):
+        from RAG.Retrieval.retrival import Retrieval
+
+        retrieval = Retrieval.__new__(Retrieval)
+        with self.assertRaisesRegex(ValueError, "journal"):
+            retrieval.retrieve_by_vector([0.0] * 384, {'journal': 'ApJ'})
+        with self.assertRaisesRegex(ValueError, "journal"):
+            retrieval.retrieve_batch_by_vectors([[0.0] * 384], {'journal': 'ApJ'})
+
+
+class _AxisEmbeddings:
+    """Embeds a text as the unit vector of the first axis word it contains"""
+
+    AXES = ['neutron', 'galaxy', 'protein']
+
+    def _vector(self, text):
+        vector = np.full(len(self.AXES), 0.05, dtype=np.float32)
+        for i, word in enumerate(self.AXES):
+            if word in text.lower():
+                vector[i] = 1.0
+                break
+        return vector.tolist()
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+    def embed_documents(self, texts):
+        return [self._vector(text) for text in texts]
+
+
+class RelevanceFilterTests(SimpleTestCase):
+    """Pre-download filtering of arXiv results by similarity to the query"""
+
+    def setUp(self):
+        self.papers = [
+            {'title': "Galaxy clusters", 'summary': "Weak lensing of galaxy clusters"},
+            {'title': "Neutron star mergers", 'summary': "Kilonova light curves"},
+            {'title': "Protein folding", 'summary': "Molecular dynamics"},
+            {'title': "Cooling of neutron stars", 'summary': "Neutrino emission"},
+        ]
+
+    def test_threshold_keeps_relevant_papers_most_relevant_first(self):
+        kept, skipped = RelevanceFilter(_AxisEmbeddings(), min_similarity=0.5).filter("neutron star equation of state", self.papers)
+        self.assertEqual([paper['title'] for paper in kept], ["Neutron star mergers", "Cooling of neutron stars"])
+        self.assertEqual(len(skipped), 2)
+        self.assertTrue(all(paper['relevance'] < 0.5 for paper in skipped))
+
+    def test_top_fraction_keeps_at_least_one_paper(self):
+        relevance_filter = RelevanceFilter(_AxisEmbeddings(), min_similarity=None, top_fraction=0.1)
+        kept, skipped = relevance_filter.filter("galaxy formation", self.papers)
+        self.assertEqual([paper['title'] for paper in kept], ["Galaxy clusters"])
+        self.assertEqual(len(skipped), 3)
+
+    def test_no_papers_and_invalid_fraction(self):
+        self.assertEqual(RelevanceFilter(_AxisEmbeddings()).filter("anything", []), ([], []))
+        with self.assertRaises(ValueError):
+            RelevanceFilter(_AxisEmbeddings(), top_fraction=0)
+
+
+class ArxivCatalogTests(SimpleTestCase):
+    """Local catalog of arXiv searches with TTL and incremental refresh"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.catalog_path = os.path.join(directory.name, 'cache', 'arxiv_catalog.json')
+
+    @staticmethod
+    def _paper(number, day):
+        return {'short_id': f"2401.{number:05d}", 'title': f"Paper {number}",
+                'published': datetime(2024, 1, day, tzinfo=timezone.utc)}
+
+    def test_results_survive_a_restart(self):
+        ArxivCatalog(self.catalog_path).put("all:pulsar", 10, [self._paper(1, 3), self._paper(2, 5)])
+
+        catalog = ArxivCatalog(self.catalog_path)
+        papers = catalog.get("all:pulsar", 10, ttl=3600)
+        self.assertEqual([paper['short_id'] for paper in papers], ["2401.00001", "2401.00002"])
+        self.assertEqual(papers[1]['published'], datetime(2024, 1, 5, tzinfo=timezone.utc))
+
+    def test_stale_or_smaller_searches_miss(self):
+        catalog = ArxivCatalog(None)
+        catalog.put("all:pulsar", 10, [self._paper(1, 3)])
+        self.assertIsNone(catalog.get("all:pulsar", 20, ttl=None))
+        self.assertIsNone(catalog.get("all:magnetar", 10, ttl=None))
+        with mock.patch('dataPrepraration.apiIntegration.arxivCatalog.time.time', return_value=time.time() + 7200):
+            self.assertIsNone(catalog.get("all:pulsar", 10, ttl=3600))
+            self.assertEqual(len(catalog.get("all:pulsar", 10, ttl=None)), 1)
+
+    def test_incremental_refresh_adds_only_new_papers(self):
+        catalog = ArxivCatalog(self.catalog_path)
+        catalog.put("all:pulsar", 2, [self._paper(1, 3), self._paper(2, 5)])
+        catalog.commit("all:pulsar", [self._paper(1, 3), self._paper(2, 5)])
+
+        new_papers = catalog.new_papers("all:pulsar", [self._paper(2, 5), self._paper(3, 9)])
+        self.assertEqual([paper['short_id'] for paper in new_papers], ["2401.00003"])
+        catalog.commit("all:pulsar", new_papers)
+        self.assertEqual([paper['short_id'] for paper in catalog.get("all:pulsar", 3, ttl=None)],
+                         ["2401.00003", "2401.00001", "2401.00002"])
+        self.assertEqual(catalog.latest_published("all:pulsar"), datetime(2024, 1, 9, tzinfo=timezone.utc))
+        self.assertEqual(len(ArxivCatalog(self.catalog_path)), 3)
+
+    def test_watermark_only_advances_on_commit(self):
+        catalog = ArxivCatalog(self.catalog_path)
+        catalog.put("all:pulsar", 2, [self._paper(1, 3), self._paper(2, 5)])
+        self.assertIsNone(catalog.latest_published("all:pulsar"))
+        catalog.commit("all:pulsar", [self._paper(1, 3), self._paper(2, 5)])
+
+        # A refresh finds paper 3, but its ingestion fails before commit
+        self.assertEqual(len(catalog.new_papers("all:pulsar", [self._paper(3, 9)])), 1)
+        restarted = ArxivCatalog(self.catalog_path)
+        self.assertEqual(restarted.latest_published("all:pulsar"), datetime(2024, 1, 5, tzinfo=timezone.utc))
+        self.assertEqual(len(restarted.new_papers("all:pulsar", [self._paper(3, 9)])), 1)
+        # A later full search does not move the watermark either
+        restarted.put("all:pulsar", 3, [self._paper(1, 3), self._paper(2, 5), self._paper(3, 9)])
+        self.assertEqual(restarted.latest_published("all:pulsar"), datetime(2024, 1, 5, tzinfo=timezone.utc))
+
+    def test_failed_preparation_does_not_commit_papers(self):
+        from dataPrepraration.databasePreparation import DatabasePreparation
+
+        catalog = ArxivCatalog(self.catalog_path)
+        preparation = DatabasePreparation("pulsar timing", catalog=catalog, incremental=True, dedup_threshold=None)
+        arxiv_api = mock.Mock()
+
+        def find_papers():
+            preparation.found_papers = preparation.relevant_papers = [self._paper(3, 9)]
+            return arxiv_api
+
+        preparation.find_papers = find_papers
+        with mock.patch('dataPrepraration.databasePreparation.EmbeddingArticle'), \
+                mock.patch.object(preparation, '_ingest', side_effect=RuntimeError("embedding failed")):
+            with self.assertRaises(RuntimeError):
+                preparation.prepare_database()
+        arxiv_api.commit.assert_not_called()
+
+        with mock.patch('dataPrepraration.databasePreparation.EmbeddingArticle'), \
+                mock.patch.object(preparation, '_ingest'):
+            preparation.prepare_database()
+        arxiv_api.commit.assert_called_once_with([self._paper(3, 9)])
+
+    def test_concurrent_saves_do_not_share_a_temporary_file(self):
+        def save(number):
+            catalog = ArxivCatalog(self.catalog_path)
+            translations = TranslationCache(os.path.join(os.path.dirname(self.catalog_path), 'translations.json'))
+            for i in range(50):
+                catalog.put(f"all:topic{number}", 1, [self._paper(number * 100 + i, 1)])
+                translations.set(f"text {number} {i}", "translation")
+
+        threads = [threading.Thread(target=save, args=(number,)) for number in range(8)]
+        with mock.patch('builtins.print') as printed:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        printed.assert_not_called()
+        self.assertEqual(sorted(os.listdir(os.path.dirname(self.catalog_path))),
+                         ['arxiv_catalog.json', 'translations.json'])
+        with open(self.catalog_path, 'r', encoding='utf-8') as f:
+            self.assertGreater(len(json.load(f)['papers']), 0)
+
+
+class CollectionVersionsTests(SimpleTestCase):
+    """Blue/green versions behind an alias, on the in-process vector store"""
+
+    def setUp(self):
+        from qdrant_client.models import Distance, PointStruct, VectorParams
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.client = NumpyVectorClient(directory.name)
+        # Version names have a resolution of one second; give every shadow its own
+        timestamps = iter(f"2024010100000{i}" for i in range(10))
+        patcher = mock.patch('dataPrepraration.embedding.collectionVersions.time.strftime',
+                             side_effect=lambda *args: next(timestamps))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        rng = np.random.default_rng(5)
+        self.point = lambda i: PointStruct(id=i, vector=rng.normal(size=384).tolist(), payload={'page_content': f"chunk {i}"})
+        # A plain collection from before versioning
+        for name in ('arxiv', 'arxiv_papers'):
+            self.client.create_collection(name, VectorParams(size=384, distance=Distance.COSINE))
+        self.client.upsert('arxiv', [self.point(i) for i in range(5)])
+        self.versions = CollectionVersions(self.client, 'arxiv')
+
+    def _build(self, ids, copy_active=True):
+        shadow = self.versions.create_shadow(copy_active=copy_active)
+        self.client.upsert(shadow, [self.point(i) for i in ids])
+        self.versions.wait_until_indexed(shadow, poll_interval=0)
+        return shadow
+
+    def test_plain_collection_is_only_replaced_on_request(self):
+        shadow = self._build([5, 6])
+        self.assertEqual(self.client.count(shadow).count, 7)
+        with self.assertRaisesRegex(ValueError, "not an alias"):
+            self.versions.activate(shadow)
+        self.assertEqual(self.client.count('arxiv').count, 5)
+
+        self.versions.activate(shadow, replace_collection=True)
+        self.assertEqual(self.versions.active_version(), shadow)
+        self.assertEqual(self.client.count('arxiv').count, 7)
+        self.assertEqual(self.client.count('arxiv_papers').count, 0)
+
+    def test_rollback_and_garbage_collection_keep_the_active_version(self):
+        first = self._build([], copy_active=True)
+        self.versions.activate(first, replace_collection=True)
+        second = self._build([5])
+        third = self._build([7], copy_active=False)
+        self.versions.activate(third)
+        self.assertEqual(self.client.count('arxiv').count, 1)
+
+        self.assertEqual(self.versions.rollback(), second)
+        self.assertEqual(self.client.count('arxiv').count, 6)
+        with self.assertRaisesRegex(ValueError, "active"):
+            self.versions.drop(second)
+
+        self.assertEqual(self.versions.garbage_collect(keep=1), [first])
+        self.assertEqual(self.versions.versions(), [second, third])
+        self.assertFalse(self.client.collection_exists(f"{first}_papers"))
+
+
+class _HashEmbeddings:
+    """Deterministic 384-dimensional stand-in for the sentence-transformers model"""
+
+    def embed_query(self, text):
+        return np.random.default_rng(zlib.crc32(text.encode('utf-8'))).normal(size=384).tolist()
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+
+def _numpy_embedding_article(path, client, collection_name):
+    """EmbeddingArticle on an in-process store and chunk cache under path"""
+    with mock.patch('dataPrepraration.embedding.embeddingArticle.create_vector_client', return_value=client):
+        return EmbeddingArticle(collection_name=collection_name, embeddings=_HashEmbeddings(), vector_backend='numpy',
+                                chunk_cache=ChunkEmbeddingCache(os.path.join(path, 'chunk_cache')))
+
+
+class LazyFullTextIndexerTests(SimpleTestCase):
+    """Scheduling of background full-text indexing for abstract-only papers"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = directory.name
+        self.client = NumpyVectorClient(os.path.join(self.path, 'store'))
+        self.embedding_article = _numpy_embedding_article(self.path, self.client, 'lazy')
+        self.indexed = []
+
+    @staticmethod
+    def _hit(article_name, pdf_url="https://arxiv.org/pdf/x"):
+        return {'article_name': article_name, 'pdf_url': pdf_url, 'full_text_indexed': False}
+
+    def _index(self, result):
+        def index_paper(metadata):
+            self.indexed.append(metadata['article_name'])
+            if isinstance(result, Exception):
+                raise result
+            return result(metadata) if callable(result) else result
+        return index_paper
+
+    def _wait(self, indexer):
+        worker = indexer._worker
+        if worker is not None:
+            worker.join(5)
+
+    def test_paper_being_indexed_is_not_queued_again(self):
+        indexer = LazyFullTextIndexer(self.embedding_article)
+        started, release = threading.Event(), threading.Event()
+
+        def slow(metadata):
+            started.set()
+            release.wait(5)
+            return True
+
+        indexer.index_paper = self._index(slow)
+        indexer.record_hits([self._hit("paperA")])
+        self.assertTrue(started.wait(5))
+        indexer.record_hits([self._hit("paperA"), self._hit("paperA")])
+        self.assertEqual((indexer.pending, indexer.in_progress), ({}, {"paperA"}))
+
+        release.set()
+        self._wait(indexer)
+        indexer.record_hits([self._hit("paperA")])
+        self._wait(indexer)
+        self.assertEqual(self.indexed, ["paperA"])
+        self.assertEqual((indexer.done, indexer.in_progress), ({"paperA"}, set()))
+
+    def test_failed_and_pdf_less_papers_are_not_retried(self):
+        indexer = LazyFullTextIndexer(self.embedding_article)
+        indexer.index_paper = self._index(False)
+        indexer.record_hits([self._hit("paperA"), self._hit("paperB", pdf_url=None)])
+        self._wait(indexer)
+        indexer.index_paper = self._index(RuntimeError("download failed"))
+        indexer.record_hits([self._hit("paperC")])
+        self._wait(indexer)
+
+        indexer.record_hits([self._hit("paperA"), self._hit("paperB", pdf_url=None), self._hit("paperC")])
+        self._wait(indexer)
+        self.assertEqual(self.indexed, ["paperA", "paperC"])
+        self.assertEqual(indexer.failed, {"paperA", "paperC"})
+        self.assertNotIn("paperB", indexer.hits)
+
+    def test_papers_are_indexed_after_min_hits_most_retrieved_first(self):
+        indexer = LazyFullTextIndexer(self.embedding_article, min_hits=2)
+        indexer.index_paper = self._index(True)
+        # One retrieval reporting the same paper twice is a single hit
+        indexer.record_hits([self._hit("paperA"), self._hit("paperA"), self._hit("paperB")])
+        self.assertEqual((indexer.pending, indexer._worker), ({}, None))
+
+        indexer.hits["paperB"] += 5
+        indexer.record_hits([self._hit("paperA"), self._hit("paperB")])
+        self._wait(indexer)
+        self.assertEqual(self.indexed, ["paperB", "paperA"])
+
+    def test_paper_indexed_by_another_process_is_skipped(self):
+        self.embedding_article.add_papers([{
+            'article_name': "paperA", 'title': "Pulsars", 'summary': "Timing",
+            'metadata': {'full_text_indexed': True}
+        }])
+        indexer = get_lazy_indexer(self.embedding_article, os.path.join(self.path, 'pdfs'))
+        self.addCleanup(lazyIndexing._indexers.pop, 'lazy', None)
+        self.assertEqual(indexer.download_directory, os.path.join(self.path, 'pdfs'))
+        with mock.patch('dataPrepraration.lazyIndexing.ArxivAPI') as arxiv_api:
+            self.assertTrue(indexer.index_paper(self._hit("paperA")))
+        arxiv_api.assert_not_called()
+
+    def test_reindexing_a_paper_replaces_its_chunks(self):
+        from dataPrepraration.databasePreparation import DatabasePreparation
+
+        article = {'text': "Pulsars are rotating neutron stars. " * 40, 'filename': "paperA", 'sections': [],
+                   'metadata': {'full_text_indexed': True}}
+        first = DatabasePreparation.embed_article(self.embedding_article, article, deduplicator=ChunkDeduplicator())
+        DatabasePreparation.embed_article(self.embedding_article, article, deduplicator=ChunkDeduplicator())
+        self.assertGreater(first, 0)
+        self.assertEqual(self.client.count('lazy').count, first)
+
+
+class CollectionRebuildTests(SimpleTestCase):
+    """Blue/green rebuilds of a topic through DatabasePreparation"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.client = NumpyVectorClient(os.path.join(directory.name, 'store'))
+        timestamps = iter(f"2024010100000{i}" for i in range(10))
+        for target, kwargs in (
+            ('dataPrepraration.embedding.embeddingArticle.create_vector_client', {'return_value': self.client}),
+            ('dataPrepraration.embedding.embeddingArticle.get_embeddings', {'return_value': _HashEmbeddings()}),
+            ('dataPrepraration.embedding.embeddingArticle.get_chunk_embedding_cache',
+             {'return_value': ChunkEmbeddingCache(os.path.join(directory.name, 'chunk_cache'))}),
+            ('dataPrepraration.embedding.collectionVersions.time.strftime',
+             {'side_effect': lambda *args: next(timestamps)}),
+        ):
+            patcher = mock.patch(target, **kwargs)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _rebuild(self, articles):
+        from dataPrepraration.databasePreparation import DatabasePreparation
+
+        preparation = DatabasePreparation("pulsar timing", collection_name='pulsars', rebuild=True,
+                                          vector_backend='numpy', catalog=ArxivCatalog(None), dedup_report_path=None)
+
+        def find_papers():
+            preparation.found_papers = preparation.relevant_papers = [{'filename': article['filename']}
+                                                                      for article in articles]
+            return mock.Mock()
+
+        preparation.find_papers = find_papers
+        preparation.extract_articles = lambda arxiv_api, papers: articles
+        preparation.prepare_database()
+
+    @staticmethod
+    def _article(name, topic):
+        return {'text': f"{topic} are observed with radio telescopes. " * 30 + f"Paper {name} ends here.",
+                'filename': name, 'sections': [], 'metadata': {'arxiv_id': name},
+                'title': f"{topic} in {name}", 'summary': f"A study of {topic}."}
+
+    def test_rebuilding_the_same_topic_does_not_duplicate_points(self):
+        articles = [self._article("paperA", "Millisecond pulsars"), self._article("paperB", "Magnetars")]
+        self._rebuild(articles)
+        counts = (self.client.count('pulsars').count, self.client.count('pulsars_papers').count)
+        self.assertEqual(counts[1], 2)
+
+        self._rebuild(articles)
+        self._rebuild(articles)
+        self.assertEqual((self.client.count('pulsars').count, self.client.count('pulsars_papers').count), counts)
+
+    def test_rebuild_keeps_papers_of_earlier_runs(self):
+        self._rebuild([self._article("paperA", "Millisecond pulsars")])
+        self._rebuild([self._article("paperB", "Magnetars")])
+        records, _ = self.client.scroll('pulsars_papers', limit=10)
+        self.assertEqual(sorted(record.payload['metadata']['article_name'] for record in records), ["paperA", "paperB"])
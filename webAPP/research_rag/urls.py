@@ -21,4 +21,5 @@ urlpatterns = [
     
     # API endpoints
     path('api/test-model/', views.test_model, name='test_model'),
+    path('api/ask-batch/', views.ask_batch, name='ask_batch'),
 ]
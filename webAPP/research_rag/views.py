@@ -1,16 +1,16 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.conf import settings
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
-from django.core.paginator import Paginator
-from django.db.models import Q
 import json
 import time
 
 from .models import RAGConfiguration, QueryHistory, DatabasePreparationLog
 from .forms import RAGConfigurationForm, QueryForm, DatabasePreparationForm, ModelTestForm
 from .services import RAGService, DatabaseService, ConfigurationService
+from .configcache import get_configuration_cache
 
 
 def index(request):
@@ -19,7 +19,7 @@ def index(request):
     Wyświetla formularz zapytania i historię ostatnich pytań.
     """
     query_form = QueryForm()
-    active_config = RAGConfiguration.get_active_config()
+    active_config = get_configuration_cache().get_active()
     
     # Pobierz ostatnie zapytania
     recent_queries = QueryHistory.objects.select_related('config_used').order_by('-created_at')[:5]
@@ -85,7 +85,7 @@ def configurations(request):
     Strona zarządzania konfiguracjami RAG.
     Wyświetla listę konfiguracji i formularz dodawania nowej.
     """
-    configs = RAGConfiguration.objects.all().order_by('-updated_at')
+    configs = get_configuration_cache().get_all()
     
     context = {
         'configurations': configs,
@@ -123,12 +123,13 @@ def configuration_create(request):
     else:
         form = RAGConfigurationForm()
     
-    # Pobierz dostępne modele
-    available_models = ConfigurationService.get_available_models()
+    # Modele z katalogu w pamięci (bez czekania na serwer Ollama)
+    model_catalog = ConfigurationService.get_model_catalog()
     
     context = {
         'form': form,
-        'available_models': available_models,
+        'available_models': [model['name'] for model in model_catalog['models']],
+        'model_catalog': model_catalog,
         'page_title': 'New RAG Configuration'
     }
     
@@ -165,13 +166,14 @@ def configuration_edit(request, config_id):
     else:
         form = RAGConfigurationForm(instance=config)
     
-    # Pobierz dostępne modele
-    available_models = ConfigurationService.get_available_models()
+    # Modele serwera edytowanej konfiguracji z katalogu w pamięci
+    model_catalog = ConfigurationService.get_model_catalog(config.ollama_url)
     
     context = {
         'form': form,
         'config': config,
-        'available_models': available_models,
+        'available_models': [model['name'] for model in model_catalog['models']],
+        'model_catalog': model_catalog,
         'page_title': f'Edit Configuration: {config.name}'
     }
     
@@ -208,13 +210,16 @@ def database_management(request):
         if form.is_valid():
             search_topic = form.cleaned_data['search_topic']
             custom_max_papers = form.cleaned_data.get('custom_max_papers')
+            ingestion_mode = form.cleaned_data['ingestion_mode']
+            incremental = form.cleaned_data.get('incremental', False)
+            rebuild = form.cleaned_data.get('rebuild', False)
             
             # Inicjalizuj serwis bazy danych
             db_service = DatabaseService()
             
             try:
                 # Rozpocznij przygotowanie bazy danych w tle
-                log_entry = db_service.prepare_database(search_topic, custom_max_papers)
+                log_entry = db_service.prepare_database(search_topic, custom_max_papers, ingestion_mode, incremental, rebuild)
                 
                 messages.success(request, f'Rozpoczęto przygotowanie bazy danych dla tematu: "{search_topic}"')
                 return redirect('database_management')
@@ -242,20 +247,18 @@ def query_history(request):
     """
     Strona historii zapytań użytkowników.
     """
-    # Wyszukiwanie
+    # Wyszukiwanie pełnotekstowe
     search_query = request.GET.get('search', '')
-    queryset = QueryHistory.objects.select_related('config_used').order_by('-created_at')
+    queryset = QueryHistory.objects.select_related('config_used')
     
     if search_query:
-        queryset = queryset.filter(
-            Q(query_text__icontains=search_query) | 
-            Q(response_text__icontains=search_query)
-        )
+        queryset = queryset.search(search_query)
     
-    # Paginacja
-    paginator = Paginator(queryset, 20)
-    page_number = request.GET.get('page')
-    queries = paginator.get_page(page_number)
+    # Paginacja kursorowa (bez COUNT(*) i OFFSET)
+    try:
+        queries = queryset.keyset_page(after=request.GET.get('after'), before=request.GET.get('before'), size=20)
+    except ValueError:
+        queries = queryset.keyset_page(size=20)
     
     context = {
         'queries': queries,
@@ -306,6 +309,59 @@ def test_model(request):
         })
 
 
+@csrf_exempt
+@require_http_methods(["POST"])
+def ask_batch(request):
+    """
+    JSON endpoint answering many questions in one request.
+    
+    Expects {"queries": [...], "max_workers": 4, "filters": {"year_from": 2022}}
+    ("filters" optional; at most RAG_MAX_BATCH_QUERIES queries) and streams
+    one JSON object per line (NDJSON) as answers finish, in completion order.
+    """
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Invalid JSON body'}, status=400)
+    
+    queries = data.get('queries')
+    if not isinstance(queries, list) or not queries or not all(isinstance(q, str) for q in queries):
+        return JsonResponse({'success': False, 'error': '"queries" must be a non-empty list of strings'}, status=400)
+    max_queries = getattr(settings, 'RAG_MAX_BATCH_QUERIES', 100)
+    if len(queries) > max_queries:
+        return JsonResponse({'success': False, 'error': f'At most {max_queries} queries per request'}, status=400)
+    
+    try:
+        max_workers = max(1, min(int(data.get('max_workers', 4)), 16))
+    except (TypeError, ValueError):
+        return JsonResponse({'success': False, 'error': '"max_workers" must be an integer'}, status=400)
+    
+    filters = data.get('filters')
+    if filters is not None and not isinstance(filters, dict):
+        return JsonResponse({'success': False, 'error': '"filters" must be an object'}, status=400)
+    # Nieznane klucze filtrów to błąd klienta, a nie odpowiedź bez kontekstu
+    from RAG.Retrieval.metadataFilter import build_metadata_filter
+    try:
+        build_metadata_filter(filters)
+    except (TypeError, ValueError) as e:
+        return JsonResponse({'success': False, 'error': f'Invalid "filters": {e}'}, status=400)
+    
+    user_ip = request.META.get('REMOTE_ADDR')
+    user_agent = request.META.get('HTTP_USER_AGENT', '')
+    
+    rag_service = RAGService()
+    
+    def stream_results():
+        try:
+            for result in rag_service.generate_answers_batch(queries, user_ip, user_agent,
+                                                             max_workers=max_workers, filters=filters):
+                yield json.dumps(result) + "\n"
+        except Exception as e:
+            yield json.dumps({'success': False, 'error': f'Error during batch generation: {str(e)}'}) + "\n"
+    
+    return StreamingHttpResponse(stream_results(), content_type='application/x-ndjson')
+
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def activate_configuration(request, config_id):
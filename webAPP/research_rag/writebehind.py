@@ -0,0 +1,248 @@
+import atexit
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from django.db import OperationalError, close_old_connections, connections, transaction
+
+from .models import DatabasePreparationLog, QueryHistory
+
+DEFAULT_MAX_DELAY = 1.0
+DEFAULT_MAX_BATCH = 200
+DEFAULT_MAX_PENDING = 10000
+DEFAULT_RETRIES = 2
+DEFAULT_RETRY_DELAY = 0.5
+
+
+class WriteBehindWriter:
+    """
+    Buffer query history rows and preparation log updates and write them in batches.
+
+    Callers only append to an in-memory buffer, so logging adds no database
+    round trip (and never waits for the SQLite write lock) on the request
+    path. A background thread writes the buffer in one transaction when
+    max_batch entries are pending or the oldest entry is max_delay seconds
+    old; the buffer is also written when the process exits.
+
+    Durability bound: entries buffered less than max_delay seconds ago are
+    lost if the process is killed without running its exit handlers. When
+    max_pending entries are waiting (the database is unavailable) further
+    entries are dropped and counted instead of blocking the caller. A batch
+    failing with an OperationalError (e.g. "database is locked") is retried
+    before it is dropped.
+
+    created_at of a history row is the time its batch is written, at most
+    max_delay seconds after the answer.
+    """
+
+    def __init__(self, max_delay: float = DEFAULT_MAX_DELAY, max_batch: int = DEFAULT_MAX_BATCH,
+                 max_pending: int = DEFAULT_MAX_PENDING, retries: int = DEFAULT_RETRIES,
+                 retry_delay: float = DEFAULT_RETRY_DELAY):
+        """
+        Args:
+            max_delay (float): Maximum time in seconds an entry waits in the buffer
+            max_batch (int): Number of pending entries that triggers a write
+            max_pending (int): Maximum number of buffered entries
+            retries (int): Further attempts of a batch that failed with an OperationalError
+            retry_delay (float): Seconds before the first retry, doubled for each further one
+        """
+        if max_delay <= 0 or max_batch < 1 or max_pending < max_batch:
+            raise ValueError("max_delay must be positive and 1 <= max_batch <= max_pending")
+        if retries < 0 or retry_delay < 0:
+            raise ValueError("retries and retry_delay must not be negative")
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.retries = retries
+        self.retry_delay = retry_delay
+
+        self._history: Deque[QueryHistory] = deque()
+        # Log id -> field values; later updates of a field overwrite earlier ones
+        self._log_updates: Dict[int, Dict[str, Any]] = {}
+        self._oldest: Optional[float] = None
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._closed = False
+
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.retried = 0
+
+        self._thread = threading.Thread(target=self._run, name='history-write-behind', daemon=True)
+        self._thread.start()
+
+    def _pending(self) -> int:
+        return len(self._history) + len(self._log_updates)
+
+    def _enqueue(self, add) -> bool:
+        with self._lock:
+            if self._closed or self._pending() >= self.max_pending:
+                self.dropped += 1
+                return False
+            add()
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            if self._pending() >= self.max_batch:
+                self._wakeup.notify()
+        return True
+
+    def record_query(self, **fields) -> bool:
+        """
+        Buffer a QueryHistory row.
+
+        Args:
+            **fields: QueryHistory field values (query_text, response_text, config_used, ...)
+
+        Returns:
+            bool: False if the entry was dropped because the buffer is full
+        """
+        entry = QueryHistory(**fields)
+        return self._enqueue(lambda: self._history.append(entry))
+
+    def update_log(self, log_entry: DatabasePreparationLog, *fields: str, flush: bool = False) -> bool:
+        """
+        Buffer an update of fields of a saved DatabasePreparationLog.
+
+        Args:
+            log_entry (DatabasePreparationLog): Log whose current field values are written
+            *fields (str): Names of the changed fields
+            flush (bool): Write the buffer before returning (for final states of a job)
+
+        Returns:
+            bool: False if the update was dropped because the buffer is full
+        """
+        values = {name: getattr(log_entry, name) for name in fields}
+        queued = self._enqueue(lambda: self._log_updates.setdefault(log_entry.pk, {}).update(values))
+        if flush:
+            self.flush()
+        return queued
+
+    def flush(self) -> int:
+        """
+        Write everything buffered so far in the calling thread.
+
+        Returns:
+            int: Number of entries written
+        """
+        with self._write_lock:
+            with self._lock:
+                history, self._history = list(self._history), deque()
+                log_updates, self._log_updates = self._log_updates, {}
+                self._oldest = None
+            if not history and not log_updates:
+                return 0
+            try:
+                self._write_batch(history, log_updates)
+            except Exception as e:
+                # After the retries the batch is lost, so a broken database cannot fill the memory
+                self.dropped += len(history) + len(log_updates)
+                print(f"Could not write {len(history)} query history entries and "
+                      f"{len(log_updates)} log updates: {e}")
+                return 0
+            self.written += len(history) + len(log_updates)
+            self.batches += 1
+            return len(history) + len(log_updates)
+
+    def _write_batch(self, history, log_updates) -> None:
+        """Write one batch in a transaction, retrying transient failures such as a locked database"""
+        delay = self.retry_delay
+        for attempt in range(self.retries + 1):
+            try:
+                with transaction.atomic():
+                    QueryHistory.objects.bulk_create(history, batch_size=self.max_batch)
+                    for log_id, values in log_updates.items():
+                        DatabasePreparationLog.objects.filter(pk=log_id).update(**values)
+                return
+            except OperationalError as e:
+                if attempt == self.retries:
+                    raise
+                print(f"Writing query history failed ({e}), retrying in {delay:.1f} s")
+                self.retried += 1
+                # Rows of the failed attempt must not keep primary keys from the rolled back insert
+                for entry in history:
+                    entry.pk = None
+                time.sleep(delay)
+                delay *= 2
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                while not self._closed:
+                    if self._pending() >= self.max_batch:
+                        break
+                    if self._oldest is not None:
+                        remaining = self._oldest + self.max_delay - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._wakeup.wait(remaining)
+                    else:
+                        self._wakeup.wait()
+                closed = self._closed
+            if closed:
+                break
+            close_old_connections()
+            self.flush()
+        connections.close_all()
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Stop the background thread and write the remaining entries"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._wakeup.notify()
+        self._thread.join(timeout)
+        self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            pending = self._pending()
+        return {'pending': pending, 'written': self.written, 'dropped': self.dropped, 'batches': self.batches,
+                'retried': self.retried}
+
+
+_writer: Optional[WriteBehindWriter] = None
+_writer_pid: Optional[int] = None
+_writer_options: Dict[str, Any] = {}
+_writer_lock = threading.Lock()
+
+
+def configure_history_writer(**options) -> None:
+    """
+    Set the options of the shared writer (see WriteBehindWriter).
+
+    Pass enabled=False to write history and log updates synchronously.
+    """
+    global _writer_options
+    with _writer_lock:
+        _writer_options = dict(options)
+
+
+def get_history_writer() -> Optional[WriteBehindWriter]:
+    """
+    Return the writer shared by the requests of this process, or None if write-behind is disabled.
+
+    The writer is created on first use in each process, so workers forked
+    from a preloading server each get their own background thread.
+    """
+    global _writer, _writer_pid
+    with _writer_lock:
+        options = dict(_writer_options)
+        if not options.pop('enabled', True):
+            return None
+        if _writer is None or _writer_pid != os.getpid():
+            # A writer inherited through fork has no thread and its buffer belongs to the parent
+            _writer = WriteBehindWriter(**options)
+            _writer_pid = os.getpid()
+        return _writer
+
+
+@atexit.register
+def close_history_writer() -> None:
+    """Write the buffered entries of this process's writer (runs at interpreter exit)"""
+    if _writer is not None and _writer_pid == os.getpid():
+        _writer.close()
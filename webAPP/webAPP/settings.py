@@ -77,6 +77,15 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Migration 0007 switches the database file to WAL, which lets readers
+        # (history and log pages) run while a batch is written; IMMEDIATE
+        # transactions take the write lock up front instead of failing with
+        # "database is locked" when upgrading a read lock.
+        'OPTIONS': {
+            'init_command': 'PRAGMA synchronous=NORMAL;',
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
@@ -129,3 +138,66 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 import sys
 import os
 sys.path.append(os.path.join(BASE_DIR.parent))
+
+# Query embedding cache shared by all RAG configurations using the same model.
+# Set 'persist_path' to keep cached embeddings across restarts.
+RAG_QUERY_EMBEDDING_CACHE = {
+    'max_entries': 4096,
+    'persist_path': os.path.join(BASE_DIR.parent, 'cache', 'query_embeddings.npz'),
+}
+
+# Local catalog of arXiv searches; repeated searches within a day are served
+# from it and incremental refreshes fetch only newer submissions.
+RAG_ARXIV_CATALOG_PATH = os.path.join(BASE_DIR.parent, 'cache', 'arxiv_catalog.json')
+
+# Content-addressed cache of chunk embeddings: re-preparing a topic or
+# rebuilding a collection reads known chunks instead of encoding them again.
+# 'max_bytes' bounds each embedding model's cache (least recently used evicted).
+RAG_CHUNK_EMBEDDING_CACHE = {
+    'path': os.path.join(BASE_DIR.parent, 'cache', 'chunk_embeddings'),
+    'max_bytes': 2 * 2 ** 30,
+}
+
+# JSONL record of the near-duplicate chunks and papers skipped by each
+# database preparation (None disables the report).
+RAG_DEDUP_REPORT_PATH = os.path.join(BASE_DIR.parent, 'cache', 'dedup_report.jsonl')
+
+# Backend translating non-English topics before the arXiv search: 'google'
+# (online) or 'argos' (argos-translate models installed on the node).
+RAG_TRANSLATOR_BACKEND = os.environ.get('RAG_TRANSLATOR_BACKEND', 'google')
+
+# Directory of the in-process vector store used by configurations with
+# vector_backend='numpy' (no Qdrant server needed).
+RAG_NUMPY_STORE_PATH = os.path.join(BASE_DIR.parent, 'vectorstore')
+
+# Version counter of the RAG configurations. Saving or deleting a
+# configuration rewrites it, and every worker reloads its cached active
+# configuration and configuration list when the file changes.
+RAG_CONFIG_VERSION_PATH = os.path.join(BASE_DIR.parent, 'cache', 'config_version')
+
+# Largest number of questions accepted by one batch question answering request.
+RAG_MAX_BATCH_QUERIES = 100
+
+# Installed and loaded models of each Ollama server, kept in memory and
+# refreshed in the background when older than 'refresh_interval' seconds.
+RAG_MODEL_CATALOG = {
+    'refresh_interval': 60,
+    'timeout': 10,
+}
+
+# Query history rows and preparation log updates are buffered in memory and
+# written in batches by a background thread (see research_rag.writebehind).
+# Entries wait at most 'max_delay' seconds; a batch hitting a locked database
+# is retried 'retries' times. Set 'enabled' to False to write them synchronously.
+RAG_HISTORY_WRITE_BEHIND = {
+    'enabled': True,
+    'max_delay': 1.0,
+    'max_batch': 200,
+    'max_pending': 10000,
+    'retries': 2,
+}
+
+# Load the embedding and KeyBERT models in the WSGI module so a preforking
+# server (gunicorn --preload, see gunicorn.conf.py) shares them copy-on-write
+# between workers instead of loading one copy per worker.
+RAG_PRELOAD_MODELS = os.environ.get('RAG_PRELOAD_MODELS', '') == '1'
@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'webAPP.settings')
 
 application = get_wsgi_application()
+
+from django.conf import settings
+
+if settings.RAG_PRELOAD_MODELS:
+    from dataPrepraration.embedding.sharedModels import preload_models
+    preload_models()